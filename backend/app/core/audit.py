@@ -3,7 +3,7 @@ from fastapi import Request
 from sqlalchemy.orm import Session
 
 from app.models.auditoria import AuditAction
-from app.services.auditoria_service import create_audit_log
+from app.services.auditoria_service import enqueue_audit_log
 
 def _serialize_model(obj) -> Dict[str, Any]:
     """Convierte un objeto SQLAlchemy en dict (solo columnas)."""
@@ -57,7 +57,7 @@ def log_action(
     user_id = getattr(user, "id", None) if user else None
     username = getattr(user, "username", None) if user else None
 
-    create_audit_log(
+    enqueue_audit_log(
         db,
         user_id=user_id,
         username=username,
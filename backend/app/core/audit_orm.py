@@ -0,0 +1,158 @@
+# app/core/audit_orm.py
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from fastapi import Request
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.models.auditoria import AuditAction
+
+# Claves en session.info
+ACTOR = "auditoria_actor"
+PENDIENTES = "auditoria_pendientes"
+EXTRA = "auditoria_extra"
+
+OCULTO = "***"
+
+
+def _lista(valor: str) -> FrozenSet[str]:
+    return frozenset(v.strip() for v in valor.split(",") if v.strip())
+
+
+@lru_cache(maxsize=1)
+def tablas_auditadas() -> FrozenSet[str]:
+    return _lista(settings.AUDIT_ORM_TABLAS) - {"audit_logs"}
+
+
+@lru_cache(maxsize=1)
+def columnas_ocultas() -> FrozenSet[str]:
+    return _lista(settings.AUDIT_ORM_COLUMNAS_OCULTAS)
+
+
+def fijar_actor(db: Session, user: Any, request: Optional[Request] = None) -> None:
+    """Quién escribe con esta sesión; lo llama la autenticación de cada request"""
+    ip = None
+    if request is not None:
+        xfwd = request.headers.get("x-forwarded-for")
+        ip = xfwd.split(",")[0].strip() if xfwd else (request.client.host if request.client else None)
+    db.info[ACTOR] = {
+        "user_id": getattr(user, "id", None),
+        "username": getattr(user, "username", None),
+        "path": request.url.path if request is not None else None,
+        "method": request.method if request is not None else None,
+        "ip": ip,
+    }
+
+
+def fijar_contexto(db: Session, **extra: Any) -> None:
+    """Datos extra (p. ej. el payload del request) para los registros del próximo commit"""
+    db.info.setdefault(EXTRA, {}).update(extra)
+
+
+def _tabla(estado) -> str:
+    """Nombre con el que se audita: `__auditoria_tabla__` del modelo o el de su tabla"""
+    return getattr(estado.class_, "__auditoria_tabla__", None) or estado.mapper.local_table.name
+
+
+def _record_id(estado) -> Optional[str]:
+    # Los nuevos todavía no tienen identity en after_flush, pero sí la PK en sus atributos
+    clave = estado.identity or [estado.dict.get(c.key) for c in estado.mapper.primary_key]
+    if clave is None or all(v is None for v in clave):
+        return None
+    return ",".join(str(v) for v in clave)
+
+
+def _valor(clave: str, valor: Any) -> Any:
+    return OCULTO if clave in columnas_ocultas() and valor is not None else valor
+
+
+def _valores(estado) -> Dict[str, Any]:
+    """Columnas ya cargadas en memoria (no dispara SELECTs)"""
+    return {
+        attr.key: _valor(attr.key, estado.dict[attr.key])
+        for attr in estado.mapper.column_attrs if attr.key in estado.dict
+    }
+
+
+def _cambios(estado) -> Dict[str, Any]:
+    """Sólo las columnas modificadas, según el historial que ya lleva la sesión"""
+    cambios = {}
+    for attr in estado.mapper.column_attrs:
+        historial = estado.attrs[attr.key].history
+        if not historial.has_changes():
+            continue
+        despues = historial.added[0] if historial.added else None
+        if not historial.deleted:
+            # Valor anterior no cargado (p. ej. atributo expirado): sólo se conoce el nuevo
+            cambios[attr.key] = {"after": _valor(attr.key, despues)}
+        elif historial.deleted[0] != despues:
+            cambios[attr.key] = {"before": _valor(attr.key, historial.deleted[0]), "after": _valor(attr.key, despues)}
+    return cambios
+
+
+def _capturar(session: Session, flush_context) -> None:
+    """
+    after_flush: los ids nuevos ya están asignados y new/dirty/deleted y el historial
+    de atributos todavía muestran el estado previo al flush. Sólo se guardan los
+    cambios en session.info; se escriben al confirmar la transacción.
+    """
+    tablas = tablas_auditadas()
+    registros: List[Dict[str, Any]] = []
+
+    def agregar(obj, accion: AuditAction, details: Dict[str, Any]) -> None:
+        estado = inspect(obj)
+        registros.append({
+            "table_name": _tabla(estado),
+            "action": accion,
+            "record_id": _record_id(estado),
+            "details": details,
+        })
+
+    for obj in session.new:
+        if getattr(obj, "__tablename__", None) in tablas:
+            agregar(obj, AuditAction.CREATE, {"after": _valores(inspect(obj))})
+    for obj in session.dirty:
+        if getattr(obj, "__tablename__", None) in tablas:
+            cambios = _cambios(inspect(obj))
+            if cambios:
+                agregar(obj, AuditAction.UPDATE, {"changes": cambios})
+    for obj in session.deleted:
+        if getattr(obj, "__tablename__", None) in tablas:
+            agregar(obj, AuditAction.DELETE, {"before": _valores(inspect(obj))})
+
+    if registros:
+        session.info.setdefault(PENDIENTES, []).extend(registros)
+
+
+def _confirmar(session: Session) -> None:
+    registros = session.info.pop(PENDIENTES, None)
+    extra = session.info.pop(EXTRA, None)
+    if not registros:
+        return
+    # Import adentro para evitar ciclos
+    from app.services.auditoria_service import enqueue_audit_rows
+
+    actor = session.info.get(ACTOR) or {}
+    if extra:
+        registros = [{**r, "details": {**r["details"], "extra": extra}} for r in registros]
+    enqueue_audit_rows([{**actor, **registro} for registro in registros])
+
+
+def _descartar(session: Session) -> None:
+    session.info.pop(PENDIENTES, None)
+    session.info.pop(EXTRA, None)
+
+
+def instalar_auditoria_orm() -> None:
+    """
+    Auditoría automática de inserts, updates y deletes de las tablas de
+    AUDIT_ORM_TABLAS en cualquier sesión. No ve los UPDATE/DELETE masivos
+    (query.update / query.delete), que no pasan por el flush.
+    """
+    if not settings.AUDIT_ORM or event.contains(Session, "after_flush", _capturar):
+        return
+    event.listen(Session, "after_flush", _capturar)
+    event.listen(Session, "after_commit", _confirmar)
+    event.listen(Session, "after_rollback", _descartar)
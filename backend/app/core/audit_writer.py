@@ -0,0 +1,127 @@
+# app/core/audit_writer.py
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+POLITICAS = ("descartar", "bloquear")
+
+
+class AuditWriter:
+    """
+    Escritura de auditoría en segundo plano: `encolar` deja la fila en una cola acotada
+    y un hilo la inserta en lotes (cada `lote` filas o `intervalo_ms`) con `escribir_lote`,
+    que usa su propia conexión. Con la cola llena, según `politica`:
+      - "descartar": se descarta la fila nueva y se cuenta;
+      - "bloquear": se espera hasta `bloqueo_ms` a que haya lugar y, si no, se descarta.
+    """
+
+    def __init__(self, escribir_lote: Callable[[List[Dict[str, Any]]], None], max_cola: int = 10000,
+                 lote: int = 200, intervalo_ms: int = 500, politica: str = "descartar", bloqueo_ms: int = 50):
+        if politica not in POLITICAS:
+            raise ValueError(f"Política de cola inválida: {politica}")
+        self.escribir_lote = escribir_lote
+        self.lote = lote
+        self.intervalo = intervalo_ms / 1000
+        self.politica = politica
+        self.bloqueo = bloqueo_ms / 1000
+        self._cola: queue.Queue = queue.Queue(maxsize=max_cola)
+        self._lock = threading.Lock()
+        self._vacia = threading.Condition(self._lock)
+        self._pendientes = 0  # encoladas y todavía no escritas (ni descartadas)
+        self._hilo: Optional[threading.Thread] = None
+        self._cerrado = False
+        self.contadores = {"encoladas": 0, "escritas": 0, "descartadas_cola_llena": 0, "descartadas_error": 0, "lotes": 0}
+
+    def iniciar(self) -> None:
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._cerrado = False
+            self._hilo = threading.Thread(target=self._trabajar, name="audit-writer", daemon=True)
+            self._hilo.start()
+
+    def encolar(self, fila: Dict[str, Any]) -> bool:
+        """Encola una fila; devuelve False si se descartó por la política de cola llena"""
+        if self._hilo is None or not self._hilo.is_alive():
+            self.iniciar()
+        with self._lock:
+            self._pendientes += 1
+        try:
+            if self.politica == "bloquear":
+                self._cola.put(fila, timeout=self.bloqueo)
+            else:
+                self._cola.put_nowait(fila)
+        except queue.Full:
+            self._terminadas(1, "descartadas_cola_llena")
+            return False
+        self._contar("encoladas", 1)
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que se escriba todo lo encolado; devuelve False si venció el timeout"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._vacia:
+            while self._pendientes:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._vacia.wait(restante)
+        return True
+
+    def cerrar(self, timeout: float = 10.0) -> None:
+        """Escribe lo pendiente y detiene el hilo (para el shutdown de la app)"""
+        self.flush(timeout)
+        with self._lock:
+            self._cerrado = True
+            hilo, self._hilo = self._hilo, None
+        if hilo is not None:
+            hilo.join(timeout)
+
+    def estadisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.contadores, "en_cola": self._cola.qsize(), "pendientes": self._pendientes}
+
+    def _contar(self, clave: str, n: int) -> None:
+        with self._lock:
+            self.contadores[clave] += n
+
+    def _terminadas(self, n: int, clave: str) -> None:
+        with self._vacia:
+            self.contadores[clave] += n
+            self._pendientes -= n
+            if not self._pendientes:
+                self._vacia.notify_all()
+
+    def _trabajar(self) -> None:
+        while True:
+            try:
+                primera = self._cola.get(timeout=self.intervalo)
+            except queue.Empty:
+                if self._cerrado:
+                    return
+                continue
+            filas = [primera]
+            limite = time.monotonic() + self.intervalo
+            while len(filas) < self.lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    filas.append(self._cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+            self._escribir(filas)
+
+    def _escribir(self, filas: List[Dict[str, Any]]) -> None:
+        try:
+            self.escribir_lote(filas)
+        except Exception as e:
+            logger.error(f"No se pudo escribir un lote de {len(filas)} registros de auditoría: {e}")
+            self._terminadas(len(filas), "descartadas_error")
+            return
+        self._contar("lotes", 1)
+        self._terminadas(len(filas), "escritas")
@@ -0,0 +1,248 @@
+# app/core/cache.py
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class _SingleFlight:
+    """Un lock por clave, para que un solo hilo calcule cada valor y el resto espere"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks: Dict[Hashable, List[Any]] = {}  # clave -> [lock, hilos usándolo]
+
+    def run(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                return fn()
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._locks.pop(key, None)
+
+
+class TTLCache:
+    """Cache simple en memoria con vencimiento por clave (thread-safe)"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._flight = _SingleFlight()
+        self._generation = 0  # cambia en cada invalidate
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Devuelve el valor si existe y no venció"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def _set(self, key: Hashable, value: Any, ttl: float) -> None:
+        ahora = time.monotonic()
+        if len(self._data) >= self.max_entries:
+            # Descartar vencidas; si no alcanza, las más próximas a vencer
+            for k in [k for k, (exp, _) in self._data.items() if exp <= ahora]:
+                del self._data[k]
+            while len(self._data) >= self.max_entries:
+                del self._data[min(self._data, key=lambda k: self._data[k][0])]
+        self._data[key] = (ahora + ttl, value)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Devuelve el valor cacheado o lo calcula con `factory` y lo guarda.
+        Single-flight: ante varios pedidos simultáneos de la misma clave, uno solo
+        ejecuta `factory` y los demás reciben ese resultado.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        return self._flight.run(key, lambda: self._calcular(key, factory))
+
+    def _calcular(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        # Otro hilo pudo haberlo calculado mientras esperábamos el lock
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        generation = self._generation
+        value = factory()
+        with self._lock:
+            # Si se invalidó durante el cálculo, el valor ya puede estar desactualizado
+            if generation == self._generation:
+                self._set(key, value, self.ttl_seconds)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Invalida una clave (o todo el cache si no se indica)"""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+
+class RedisTTLCache:
+    """
+    Misma interfaz que TTLCache sobre Redis, compartida entre procesos. Los valores
+    se guardan como JSON. El single-flight entre procesos usa un lock `SET NX PX` y
+    la generación (INCR en cada invalidate) es una clave más del prefijo.
+    Si Redis falla, se calcula sin cache en lugar de cortar el request.
+    """
+
+    def __init__(self, client, ttl_seconds: float, prefix: str,
+                 lock_timeout: float = 30.0, poll_interval: float = 0.05):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._flight = _SingleFlight()
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.prefix}:{key}"
+
+    def _generation_key(self) -> str:
+        return f"{self.prefix}:__generacion__"
+
+    def _generation(self) -> Optional[int]:
+        """Generación actual (0 si nunca se invalidó); None si Redis no responde"""
+        try:
+            raw = self.client.get(self._generation_key())
+        except Exception as e:
+            logger.warning(f"Cache Redis no disponible ({self.prefix}): {e}")
+            return None
+        return 0 if raw is None else int(raw)
+
+    def _set_si_vigente(self, key: Hashable, value: Any, generation: Optional[int]) -> None:
+        """
+        Guarda el valor sólo si no hubo un invalidate desde que empezó el cálculo.
+        Se vuelve a mirar después del SET: si un invalidate se coló entre la comparación
+        y el SET, se borra lo recién guardado.
+        """
+        if generation is None or self._generation() != generation:
+            return
+        self.set(key, value)
+        if self._generation() != generation:
+            try:
+                self.client.delete(self._key(key))
+            except Exception as e:
+                logger.warning(f"Cache Redis no disponible ({self.prefix}): {e}")
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            raw = self.client.get(self._key(key))
+        except Exception as e:
+            logger.warning(f"Cache Redis no disponible ({self.prefix}): {e}")
+            return default
+        return default if raw is None else json.loads(raw)
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        try:
+            self.client.set(self._key(key), json.dumps(value), px=int(ttl * 1000))
+        except Exception as e:
+            logger.warning(f"Cache Redis no disponible ({self.prefix}): {e}")
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Como TTLCache.get_or_set; los hilos del proceso se coalescen antes de ir a Redis"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        return self._flight.run(key, lambda: self._calcular(key, factory))
+
+    def _calcular(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        lock_key = self._key(key) + ":lock"
+        token = uuid.uuid4().hex
+        limite = time.monotonic() + self.lock_timeout
+        while True:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            try:
+                adquirido = self.client.set(lock_key, token, nx=True, px=int(self.lock_timeout * 1000))
+            except Exception:
+                adquirido = None
+                limite = 0  # sin Redis: calcular directamente
+            if adquirido:
+                try:
+                    value = self.get(key, _MISSING)
+                    if value is _MISSING:
+                        generation = self._generation()
+                        value = factory()
+                        # Si se invalidó durante el cálculo, el valor ya puede estar desactualizado
+                        self._set_si_vigente(key, value, generation)
+                    return value
+                finally:
+                    self._liberar(lock_key, token)
+            if time.monotonic() >= limite:
+                # El dueño del lock no terminó a tiempo (o no hay Redis)
+                return factory()
+            time.sleep(self.poll_interval)
+
+    def _liberar(self, lock_key: str, token: str) -> None:
+        try:
+            actual = self.client.get(lock_key)
+            if actual is not None and (actual.decode() if isinstance(actual, bytes) else actual) == token:
+                self.client.delete(lock_key)
+        except Exception as e:
+            logger.warning(f"Cache Redis no disponible ({self.prefix}): {e}")
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Invalida una clave (o todas las del prefijo si no se indica)"""
+        try:
+            # Primero la generación: los cálculos en curso ya no guardan su valor
+            self.client.incr(self._generation_key())
+            if key is not None:
+                self.client.delete(self._key(key))
+                return
+            nombres = [
+                k.decode() if isinstance(k, bytes) else k
+                for k in self.client.scan_iter(match=f"{self.prefix}:*")
+            ]
+            claves = [k for k in nombres if not k.endswith(":lock") and k != self._generation_key()]
+            if claves:
+                self.client.delete(*claves)
+        except Exception as e:
+            logger.warning(f"No se pudo invalidar el cache Redis ({self.prefix}): {e}")
+
+
+def crear_cache(namespace: str, ttl_seconds: float):
+    """
+    Cache para `namespace`: en Redis si REDIS_URL está configurado (compartido entre
+    workers), o en memoria del proceso si no. Los valores deben ser serializables a JSON.
+    """
+    if settings.REDIS_URL:
+        try:
+            import redis
+        except ImportError:
+            redis = None  # sin el cliente instalado, usamos el cache en memoria
+        if redis is not None:
+            return RedisTTLCache(redis.Redis.from_url(settings.REDIS_URL), ttl_seconds, prefix=namespace)
+    return TTLCache(ttl_seconds)
@@ -2,12 +2,13 @@
 from __future__ import annotations
 
 from typing import Optional
-from fastapi import Depends, HTTPException, Query, status
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
+from app.core.audit_orm import fijar_actor
 from app.core.settings import settings
 from app.db.database import get_db
 from app.models.user_model import User
@@ -16,6 +17,7 @@ from app.models.user_model import User
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/oauth2/token")
 
 def get_current_user(
+    request: Request,
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
 ) -> User:
@@ -39,13 +41,19 @@ def get_current_user(
     user = db.query(User).filter(User.username == username).first()
     if not user:
         raise credentials_exc
+    # Autor de los cambios que registra la auditoría automática del ORM
+    fijar_actor(db, user, request)
     return user
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+def es_admin(user: User) -> bool:
     """Admin si role == 'admin' o is_admin == True."""
-    role_ok = getattr(current_user, "role", None) == "admin"
-    flag_ok = bool(getattr(current_user, "is_admin", False))
-    if not (role_ok or flag_ok):
+    role_ok = getattr(user, "role", None) == "admin"
+    flag_ok = bool(getattr(user, "is_admin", False))
+    return role_ok or flag_ok
+
+def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    """Sólo administradores (ver `es_admin`)."""
+    if not es_admin(current_user):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Solo admin")
     return current_user
 
@@ -0,0 +1,163 @@
+# app/core/eventos.py
+import asyncio
+import json
+import logging
+import select
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Evento:
+    """Evento publicado a los clientes conectados (usuario_id None = para todos)"""
+    canal: str
+    id: int
+    usuario_id: Optional[int] = None
+    datos: Dict[str, Any] = field(default_factory=dict, compare=False)
+
+    def es_para(self, usuario_id: int) -> bool:
+        return self.usuario_id is None or self.usuario_id == usuario_id
+
+
+class Suscripcion:
+    """Cola de eventos de una conexión; vive en el event loop que la creó"""
+
+    def __init__(self, usuario_id: int, max_cola: int):
+        self.usuario_id = usuario_id
+        self.loop = asyncio.get_running_loop()
+        self.cola: asyncio.Queue = asyncio.Queue(maxsize=max_cola)
+        self.desbordada = False  # el cliente no lee: se corta y retoma con Last-Event-ID
+
+    def _entregar(self, evento: Evento) -> None:
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.desbordada = True
+
+
+class EventHub:
+    """
+    Fan-out en memoria del proceso: cada suscripción recibe los eventos de su usuario
+    y los globales. `publicar` puede llamarse desde cualquier hilo (servicios sync);
+    la entrega se agenda en el loop de cada suscripción.
+    Con un `puente` (p. ej. LISTEN/NOTIFY) los eventos se publican a través de él y
+    cada worker los difunde al recibirlos, así todos los procesos ven lo mismo.
+    """
+
+    def __init__(self, max_cola: int = 100):
+        self.max_cola = max_cola
+        self.puente: Optional[Callable[[Evento], None]] = None
+        self._lock = threading.Lock()
+        self._suscripciones: Set[Suscripcion] = set()
+
+    def suscribir(self, usuario_id: int) -> Suscripcion:
+        """Debe llamarse desde el event loop que va a consumir la cola"""
+        suscripcion = Suscripcion(usuario_id, self.max_cola)
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def desuscribir(self, suscripcion: Suscripcion) -> None:
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    @property
+    def conexiones(self) -> int:
+        with self._lock:
+            return len(self._suscripciones)
+
+    def publicar(self, evento: Evento) -> None:
+        """Publica un evento; nunca lanza (un evento perdido se recupera con Last-Event-ID)"""
+        if self.puente is not None:
+            try:
+                self.puente(evento)
+                return
+            except Exception as e:
+                logger.warning(f"No se pudo publicar el evento por el puente, se difunde local: {e}")
+        self.difundir(evento)
+
+    def difundir(self, evento: Evento) -> None:
+        """Entrega el evento a las suscripciones de este proceso"""
+        with self._lock:
+            destinos = [s for s in self._suscripciones if evento.es_para(s.usuario_id)]
+        for suscripcion in destinos:
+            try:
+                suscripcion.loop.call_soon_threadsafe(suscripcion._entregar, evento)
+            except RuntimeError:
+                # El loop ya se cerró
+                self.desuscribir(suscripcion)
+
+
+class PgNotifyBridge:
+    """
+    Comparte eventos entre workers con LISTEN/NOTIFY de PostgreSQL. El payload lleva
+    sólo canal, id y usuario_id (NOTIFY admite ~8 KB); cada worker recarga el evento
+    de la tabla con `cargar(canal, id)` antes de difundirlo.
+    """
+
+    def __init__(self, hub: EventHub, dsn: str, engine, cargar: Callable[[str, int], Optional[Evento]],
+                 canal_pg: str = "eventos", intervalo: float = 5.0):
+        self.hub = hub
+        self.dsn = dsn
+        self.engine = engine
+        self.cargar = cargar
+        self.canal_pg = canal_pg
+        self.intervalo = intervalo
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    def enviar(self, evento: Evento) -> None:
+        from sqlalchemy import text
+
+        payload = json.dumps({"canal": evento.canal, "id": evento.id, "usuario_id": evento.usuario_id})
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT pg_notify(:canal, :payload)"), {"canal": self.canal_pg, "payload": payload})
+            conn.commit()
+
+    def iniciar(self) -> None:
+        self.hub.puente = self.enviar
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._escuchar, name="eventos-pg-notify", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self.hub.puente = None
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=self.intervalo + 1)
+            self._hilo = None
+
+    def _escuchar(self) -> None:
+        import psycopg2
+
+        while not self._detener.is_set():
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.autocommit = True
+                try:
+                    with conn.cursor() as cur:
+                        cur.execute(f'LISTEN "{self.canal_pg}"')
+                    while not self._detener.is_set():
+                        if select.select([conn], [], [], self.intervalo) == ([], [], []):
+                            continue
+                        conn.poll()
+                        while conn.notifies:
+                            self._recibir(conn.notifies.pop(0).payload)
+                finally:
+                    conn.close()
+            except Exception as e:
+                logger.warning(f"LISTEN {self.canal_pg} interrumpido, reintentando: {e}")
+                self._detener.wait(self.intervalo)
+
+    def _recibir(self, payload: str) -> None:
+        try:
+            datos = json.loads(payload)
+            evento = self.cargar(datos["canal"], int(datos["id"]))
+        except Exception as e:
+            logger.warning(f"Evento inválido en {self.canal_pg}: {e}")
+            return
+        if evento is not None:
+            self.hub.difundir(evento)
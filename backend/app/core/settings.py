@@ -18,6 +18,61 @@ class Settings(BaseSettings):
     
     # Backup
     BACKUP_DIR: str = "/app/backups"
+    BACKUP_LOTE_FILAS: int = 5000  # Filas leídas del cursor del servidor y escritas al ZIP por vez
+    
+    # Stock
+    DEPOSITO_DEFAULT_ID: int = 1  # Depósito de compras/ventas que no indican uno (creado por la migración)
+    
+    # Scheduler
+    TRANSICIONES_INTERVALO_SEGUNDOS: int = 60  # Tick de vencimiento/activación de descuentos y precios
+    ALERTAS_INTERVALO_SEGUNDOS: int = 300  # Barrido de alertas de stock
+    
+    # Reordenes por demanda
+    REORDEN_VENTANA_DIAS: int = 90  # Historia de ventas usada para estimar la demanda diaria
+    REORDEN_LEAD_TIME_DIAS: int = 7  # Demora del proveedor
+    REORDEN_NIVEL_SERVICIO_Z: float = 1.65  # ~95% de nivel de servicio
+    REORDEN_COSTO_PEDIDO: float = 50.0  # Costo fijo por orden de compra (EOQ)
+    REORDEN_COSTO_MANTENIMIENTO_ANUAL: float = 0.25  # Fracción del costo unitario por año (EOQ)
+    
+    # Clasificación ABC/XYZ
+    CLASIFICACION_VENTANA_SEMANAS: int = 26  # Historia de ventas usada para clasificar
+    CLASIFICACION_CORTE_A: float = 0.80  # Participación acumulada de ingresos hasta la que un producto es A
+    CLASIFICACION_CORTE_B: float = 0.95  # ... y B (el resto es C)
+    CLASIFICACION_CV_X: float = 0.5  # Coeficiente de variación máximo para X
+    CLASIFICACION_CV_Y: float = 1.0  # ... y para Y (el resto es Z)
+    
+    # Estadísticas de inventario
+    INVENTARIO_ESTADISTICAS_TTL_SEGUNDOS: int = 60  # Cache del endpoint /inventario/estadisticas
+    INVENTARIO_ESTADISTICAS_VENTANA_DIAS: int = 30  # Movimientos considerados en tendencias y rankings
+    
+    # Dashboard
+    DASHBOARD_MAX_WORKERS: int = 7  # Hilos para armar /dashboard/completo en paralelo (uno por parte)
+    DASHBOARD_CACHE_TTL_SEGUNDOS: int = 15  # Cache de los endpoints /dashboard (se invalida al vender)
+    
+    # Notificaciones
+    NOTIFICACIONES_LOTE_LIMPIEZA: int = 1000  # Filas borradas por transacción al limpiar notificaciones antiguas
+    NOTIFICACIONES_GLOBALES_RETENCION_DIAS: int = 180  # Globales borradas por antigüedad aunque alguien no las haya leído (0 = nunca)
+    NOTIFICACIONES_MARGEN_MARCA_SEGUNDOS: int = 60  # La marca de lectura de globales no pasa de las creadas hace menos (commits fuera de orden)
+    
+    # Eventos en tiempo real (/notificaciones/stream)
+    EVENTOS_HEARTBEAT_SEGUNDOS: int = 15  # Comentario SSE periódico para que proxies no corten la conexión
+    EVENTOS_RETRY_MS: int = 3000  # Espera sugerida al cliente antes de reconectar
+    EVENTOS_COLA_MAXIMA: int = 100  # Eventos sin consumir por conexión antes de cortarla (retoma con Last-Event-ID)
+    EVENTOS_PG_NOTIFY: bool = False  # Compartir eventos entre workers con LISTEN/NOTIFY (requiere PostgreSQL)
+    EVENTOS_VENTANA_REANUDACION: int = 20  # Ids por debajo del Last-Event-ID que se releen al reconectar (commits fuera de orden)
+    
+    # Auditoría
+    AUDIT_ASINCRONICO: bool = True  # Escribir audit_logs en segundo plano y en lotes (False: en el request)
+    AUDIT_COLA_MAXIMA: int = 10000  # Registros en espera antes de aplicar la política de cola llena
+    AUDIT_LOTE: int = 200  # Registros por INSERT
+    AUDIT_INTERVALO_MS: int = 500  # Espera máxima para completar un lote
+    AUDIT_POLITICA_COLA_LLENA: str = "descartar"  # "descartar" o "bloquear" (hasta AUDIT_BLOQUEO_MS y luego descartar)
+    AUDIT_BLOQUEO_MS: int = 50
+    AUDIT_RETENCION_MESES: int = 12  # Meses que se conservan (0 = sin límite); se borran particiones enteras
+    AUDIT_PARTICIONES_ADELANTE: int = 3  # Particiones mensuales futuras creadas por adelantado
+    AUDIT_ORM: bool = True  # Registrar automáticamente los cambios hechos con el ORM (app/core/audit_orm.py)
+    AUDIT_ORM_TABLAS: str = "users,productos,clientes,proveedores,depositos,precios_producto,descuentos,promociones,configuracion_inventario"  # Separadas por coma
+    AUDIT_ORM_COLUMNAS_OCULTAS: str = "hashed_password,password_hash,password"  # Se guardan como "***"
     
     # Email (futuro)
     SMTP_HOST: str | None = None
@@ -25,7 +80,7 @@ class Settings(BaseSettings):
     SMTP_USERNAME: str | None = None
     SMTP_PASSWORD: str | None = None
     
-    # Redis (futuro)
+    # Redis (opcional: cache compartido entre workers)
     REDIS_URL: str | None = None
     
     # Logging
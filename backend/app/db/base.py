@@ -4,10 +4,12 @@ from app.db.database import Base  # 👈 TU Base
 from app.models.user_model import User
 from app.models.producto_model import Producto
 from app.models.cliente_model import Cliente
-from app.models.venta_model import Venta
+from app.models.venta_model import Venta, VentaDiaria, VentaProductoDiaria
 from app.models.proveedor_model import Proveedor
-from app.models.compra_model import Compra, CompraItem, StockMovimiento
+from app.models.deposito_model import Deposito
+from app.models.compra_model import Compra, CompraItem, StockMovimiento, StockSaldo, StockSaldoDeposito
 from app.models.auditoria import AuditLog
+from app.models.costo_model import CapaCosto, CostoProducto, CostoVentaDiario
 
 __all__ = [
     "Base",
@@ -15,9 +17,17 @@ __all__ = [
     "Producto",
     "Cliente",
     "Venta",
+    "VentaDiaria",
+    "VentaProductoDiaria",
     "Proveedor",
     "Compra",
     "CompraItem",
     "StockMovimiento",
+    "StockSaldo",
+    "StockSaldoDeposito",
+    "Deposito",
     "AuditLog",
+    "CapaCosto",
+    "CostoProducto",
+    "CostoVentaDiario",
 ]
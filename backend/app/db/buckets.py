@@ -0,0 +1,85 @@
+# app/db/buckets.py
+from datetime import date, datetime, timedelta
+from typing import List, Union
+
+from sqlalchemy import Date
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+UNIDADES = ("day", "week", "month", "year")
+
+# SQLite no tiene date_trunc: inicio del período con modificadores de date()/strftime()
+_SQLITE = {
+    "day": "date({col})",
+    "week": "date({col}, 'weekday 0', '-6 days')",  # lunes, igual que date_trunc('week')
+    "month": "strftime('%Y-%m-01', {col})",
+    "year": "strftime('%Y-01-01', {col})",
+}
+
+
+class fecha_bucket(FunctionElement):
+    """
+    Inicio del período (day/week/month/year) que contiene `columna`, como DATE.
+    Compila a date_trunc en PostgreSQL y a date()/strftime() en SQLite, así el mismo
+    GROUP BY corre en ambos motores y devuelve `date` en los dos.
+    Para filtrar, usar rangos con `inicio_bucket` / `rango_buckets` (sargables).
+    """
+    type = Date()
+    inherit_cache = True
+    name = "fecha_bucket"
+    # La unidad forma parte de la clave del cache de compilación de SQLAlchemy
+    _traverse_internals = FunctionElement._traverse_internals + [("unidad", InternalTraversal.dp_string)]
+
+    def __init__(self, unidad: str, columna):
+        if unidad not in UNIDADES:
+            raise ValueError(f"Unidad de tiempo inválida: {unidad}")
+        self.unidad = unidad
+        super().__init__(columna)
+
+
+@compiles(fecha_bucket)
+def _fecha_bucket_default(element, compiler, **kw):
+    columna = compiler.process(list(element.clauses)[0], **kw)
+    return f"CAST(date_trunc('{element.unidad}', {columna}) AS DATE)"
+
+
+@compiles(fecha_bucket, "sqlite")
+def _fecha_bucket_sqlite(element, compiler, **kw):
+    columna = compiler.process(list(element.clauses)[0], **kw)
+    return _SQLITE[element.unidad].format(col=columna)
+
+
+def inicio_bucket(unidad: str, fecha: Union[date, datetime]) -> date:
+    """Inicio del período que contiene `fecha` (misma regla que `fecha_bucket`, en Python)"""
+    if isinstance(fecha, datetime):
+        fecha = fecha.date()
+    if unidad == "day":
+        return fecha
+    if unidad == "week":
+        return fecha - timedelta(days=fecha.weekday())
+    if unidad == "month":
+        return fecha.replace(day=1)
+    if unidad == "year":
+        return fecha.replace(month=1, day=1)
+    raise ValueError(f"Unidad de tiempo inválida: {unidad}")
+
+
+def sumar_buckets(unidad: str, inicio: date, n: int) -> date:
+    """Inicio del período `n` períodos después (o antes, si n < 0) de `inicio`"""
+    if unidad == "day":
+        return inicio + timedelta(days=n)
+    if unidad == "week":
+        return inicio + timedelta(weeks=n)
+    meses = n * (12 if unidad == "year" else 1)
+    total = inicio.year * 12 + (inicio.month - 1) + meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def rango_buckets(unidad: str, cantidad: int, hasta: Union[date, datetime, None] = None) -> List[date]:
+    """
+    Inicios de los últimos `cantidad` períodos completos o en curso hasta `hasta` (hoy).
+    El primero sirve como límite inferior de un filtro `columna >= desde`.
+    """
+    actual = inicio_bucket(unidad, hasta or date.today())
+    return [sumar_buckets(unidad, actual, -i) for i in range(cantidad - 1, -1, -1)]
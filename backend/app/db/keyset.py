@@ -0,0 +1,19 @@
+# app/db/keyset.py
+import base64
+from datetime import datetime
+from typing import Tuple
+
+
+def codificar_cursor(ts: datetime, id_: int) -> str:
+    """Cursor opaco de paginación por (ts, id): el último elemento de la página"""
+    return base64.urlsafe_b64encode(f"{ts.isoformat()}|{id_}".encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverso de `codificar_cursor`; ValueError si el cursor no es válido"""
+    try:
+        crudo = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, id_ = crudo.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(id_)
+    except Exception as e:
+        raise ValueError(f"Cursor inválido: {cursor}") from e
@@ -0,0 +1,86 @@
+# app/db/particiones.py
+import re
+from datetime import date
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.db.buckets import inicio_bucket, sumar_buckets
+
+# Tablas particionadas por mes: tabla -> columna de la clave de partición
+TABLAS_PARTICIONADAS = {
+    "audit_logs": "created_at",
+    "auditoria": "ts",
+}
+
+_SUFIJO = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def nombre_particion(tabla: str, mes: date) -> str:
+    """Partición mensual: audit_logs_p202501 para enero de 2025"""
+    return f"{tabla}_p{mes:%Y%m}"
+
+
+def es_particionada(conn: Connection, tabla: str) -> bool:
+    """True si `tabla` existe como tabla particionada (siempre False fuera de PostgreSQL)"""
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = :tabla AND pg_table_is_visible(c.oid)"
+        ),
+        {"tabla": tabla}
+    ).first() is not None
+
+
+def particiones(conn: Connection, tabla: str) -> List[Tuple[str, date]]:
+    """Particiones mensuales existentes de `tabla`, con el mes que cubre cada una, en orden"""
+    filas = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :tabla AND pg_table_is_visible(p.oid)"
+        ),
+        {"tabla": tabla}
+    ).scalars().all()
+    resultado = []
+    for nombre in filas:
+        m = _SUFIJO.search(nombre)
+        if m:
+            resultado.append((nombre, date(int(m.group(1)), int(m.group(2)), 1)))
+    return sorted(resultado, key=lambda p: p[1])
+
+
+def crear_particiones(conn: Connection, tabla: str, desde: date, hasta: date) -> List[str]:
+    """Crea (si faltan) las particiones de los meses entre `desde` y `hasta` inclusive"""
+    creadas = []
+    existentes = {nombre for nombre, _ in particiones(conn, tabla)}
+    mes = inicio_bucket("month", desde)
+    while mes <= hasta:
+        siguiente = sumar_buckets("month", mes, 1)
+        nombre = nombre_particion(tabla, mes)
+        if nombre not in existentes:
+            conn.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{nombre}" PARTITION OF "{tabla}" '
+                f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{siguiente.isoformat()}')"
+            ))
+            creadas.append(nombre)
+        mes = siguiente
+    return creadas
+
+
+def eliminar_particiones_anteriores(conn: Connection, tabla: str, antes_de: date) -> List[str]:
+    """
+    Retención: desprende y borra las particiones que terminan antes de `antes_de`.
+    Un DROP TABLE por mes en lugar de un DELETE masivo (sin bloat ni vacuum).
+    """
+    eliminadas = []
+    for nombre, mes in particiones(conn, tabla):
+        if sumar_buckets("month", mes, 1) <= antes_de:
+            conn.execute(text(f'ALTER TABLE "{tabla}" DETACH PARTITION "{nombre}"'))
+            conn.execute(text(f'DROP TABLE "{nombre}"'))
+            eliminadas.append(nombre)
+    return eliminadas
@@ -0,0 +1,13 @@
+# app/db/upsert.py
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def dialect_insert(db: Session, model):
+    """
+    Devuelve un INSERT del dialecto activo (PostgreSQL o SQLite), que soporta
+    `on_conflict_do_update` / `on_conflict_do_nothing` para upserts atómicos.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
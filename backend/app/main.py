@@ -3,6 +3,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from apscheduler.schedulers.background import BackgroundScheduler
 
+from app.core.audit_orm import instalar_auditoria_orm
 from app.core.settings import settings
 from app.routers import register_routers
 
@@ -26,6 +27,9 @@ app.add_middleware(
 # Routers
 register_routers(app)
 
+# Auditoría automática de los cambios hechos con el ORM
+instalar_auditoria_orm()
+
 scheduler: BackgroundScheduler | None = None
 
 def schedule_jobs():
@@ -34,6 +38,10 @@ def schedule_jobs():
         scheduler = BackgroundScheduler(timezone="America/Argentina/Buenos_Aires")
         # Import adentro para evitar ciclos
         from app.services.backup_service import create_backup_zip
+        from app.services.transicion_service import ejecutar_transiciones_programadas
+        from app.services.inventario_service import procesar_alertas_programadas, generar_reordenes_programados
+        from app.services.clasificacion_service import clasificar_productos_programado
+        from app.services.auditoria_service import mantener_particiones_auditoria
         scheduler.add_job(
             create_backup_zip,
             "cron",
@@ -42,12 +50,60 @@ def schedule_jobs():
             id="daily_backup",
             replace_existing=True,
         )
+        scheduler.add_job(
+            ejecutar_transiciones_programadas,
+            "interval",
+            seconds=settings.TRANSICIONES_INTERVALO_SEGUNDOS,
+            id="transiciones_estado",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
+        scheduler.add_job(
+            procesar_alertas_programadas,
+            "interval",
+            seconds=settings.ALERTAS_INTERVALO_SEGUNDOS,
+            id="alertas_inventario",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
+        scheduler.add_job(
+            clasificar_productos_programado,
+            "cron",
+            hour=2,
+            minute=45,
+            id="clasificacion_abc_xyz",
+            replace_existing=True,
+        )
+        scheduler.add_job(
+            generar_reordenes_programados,
+            "cron",
+            hour=3,
+            minute=0,
+            id="reordenes_demanda",
+            replace_existing=True,
+        )
+        scheduler.add_job(
+            mantener_particiones_auditoria,
+            "cron",
+            hour=1,
+            minute=30,
+            id="particiones_auditoria",
+            replace_existing=True,
+        )
         scheduler.start()
-        print("[scheduler] iniciado con job daily_backup a las 02:30")
+        print("[scheduler] iniciado con jobs particiones_auditoria (01:30), daily_backup (02:30), clasificacion_abc_xyz (02:45), reordenes_demanda (03:00), transiciones_estado y alertas_inventario")
 
 @app.on_event("startup")
 def on_startup():
     schedule_jobs()
+    # Import adentro para evitar ciclos
+    from app.services.auditoria_service import mantener_particiones_auditoria
+    from app.services.evento_service import iniciar_puente_pg
+    # Que exista la partición del mes en curso antes del primer insert
+    mantener_particiones_auditoria()
+    iniciar_puente_pg()
 
 @app.on_event("shutdown")
 def on_shutdown():
@@ -55,6 +111,14 @@ def on_shutdown():
     if scheduler:
         scheduler.shutdown(wait=False)
         scheduler = None
+    # Import adentro para evitar ciclos
+    from app.services.dashboard_service import cerrar_executor_dashboard
+    from app.services.evento_service import detener_puente_pg
+    from app.services.auditoria_service import audit_writer
+    cerrar_executor_dashboard()
+    detener_puente_pg()
+    # Escribir la auditoría que quedó en cola
+    audit_writer.cerrar()
 
 @app.get("/", tags=["Health"])
 def root():
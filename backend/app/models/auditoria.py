@@ -15,8 +15,12 @@ class AuditAction(str, enum.Enum):
 class AuditLog(Base):
     __tablename__ = "audit_logs"
 
-    id = Column(Integer, primary_key=True, index=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Particionada por mes sobre created_at (ver app/db/particiones.py): la clave
+    # de partición tiene que ser parte de la PK
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
+
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False)
 
     # Usuario (cacheado por si cambia el username)
     user_id = Column(Integer, nullable=True)
@@ -36,3 +40,9 @@ class AuditLog(Base):
 # Índices útiles para filtros
 Index("ix_audit_tbl_rec_time", AuditLog.table_name, AuditLog.record_id, AuditLog.created_at.desc())
 Index("ix_audit_created_at", AuditLog.created_at.desc())
+# Paginación por cursor (created_at, id) y filtros por actor / acción
+Index("ix_audit_created_id", AuditLog.created_at.desc(), AuditLog.id.desc())
+Index("ix_audit_user_time", AuditLog.username, AuditLog.created_at.desc(), AuditLog.id.desc())
+Index("ix_audit_action_time", AuditLog.action, AuditLog.created_at.desc(), AuditLog.id.desc())
+# Búsqueda por claves / contenido de details (operadores ? y @>)
+Index("ix_audit_details_gin", AuditLog.details, postgresql_using="gin")
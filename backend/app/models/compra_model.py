@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, String, func
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, String, Index, func, text
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -33,7 +33,28 @@ class StockMovimiento(Base):
     producto_id = Column(Integer, ForeignKey("productos.id"), nullable=False, index=True)
     tipo = Column(String, nullable=False)  # 'IN' | 'OUT'
     cantidad = Column(Float, nullable=False)
-    motivo = Column(String, nullable=True)  # 'COMPRA' | 'VENTA' | 'AJUSTE'
-    ref_tipo = Column(String, nullable=True)  # 'compra' | 'venta' | ...
+    motivo = Column(String, nullable=True)  # 'COMPRA' | 'VENTA' | 'AJUSTE' | 'TRANSFERENCIA'
+    ref_tipo = Column(String, nullable=True)  # 'compra' | 'venta' | 'transferencia' | ...
     ref_id = Column(Integer, nullable=True)   # id de la compra/venta
-    fecha = Column(DateTime(timezone=True), server_default=func.now())
+    deposito_id = Column(Integer, ForeignKey("depositos.id"), nullable=False, server_default=text("1"))
+    fecha = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+# Cada sucursal sólo recorre sus propios movimientos
+Index("ix_stock_movimientos_deposito_producto", StockMovimiento.deposito_id, StockMovimiento.producto_id)
+
+# Saldo denormalizado por producto: se actualiza en la misma transacción que cada StockMovimiento
+class StockSaldo(Base):
+    __tablename__ = "stock_saldos"
+
+    producto_id = Column(Integer, ForeignKey("productos.id", ondelete="CASCADE"), primary_key=True)
+    cantidad = Column(Float, nullable=False, default=0)
+    actualizado = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# Saldo por depósito: la PK (deposito_id, producto_id) sirve de índice para las consultas por sucursal
+class StockSaldoDeposito(Base):
+    __tablename__ = "stock_saldos_deposito"
+
+    deposito_id = Column(Integer, ForeignKey("depositos.id", ondelete="CASCADE"), primary_key=True)
+    producto_id = Column(Integer, ForeignKey("productos.id", ondelete="CASCADE"), primary_key=True, index=True)
+    cantidad = Column(Float, nullable=False, default=0)
+    actualizado = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
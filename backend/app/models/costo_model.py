@@ -0,0 +1,45 @@
+# app/models/costo_model.py
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Date, String, Index, text, func
+from app.db.database import Base
+
+# Capa FIFO: cada entrada con costo abre una capa que las salidas van consumiendo en orden
+class CapaCosto(Base):
+    __tablename__ = "capas_costo"
+
+    id = Column(Integer, primary_key=True, index=True)
+    producto_id = Column(Integer, ForeignKey("productos.id", ondelete="CASCADE"), nullable=False, index=True)
+    fecha = Column(DateTime(timezone=True), server_default=func.now())
+    cantidad_inicial = Column(Float, nullable=False)
+    cantidad_restante = Column(Float, nullable=False)
+    costo_unitario = Column(Float, nullable=False)
+    ref_tipo = Column(String, nullable=True)  # 'compra' | 'movimiento_inventario' | 'inicial'
+    ref_id = Column(Integer, nullable=True)
+
+# Sólo las capas abiertas participan del consumo FIFO
+Index(
+    "ix_capas_costo_abiertas",
+    CapaCosto.producto_id,
+    CapaCosto.id,
+    postgresql_where=text("cantidad_restante > 0"),
+    sqlite_where=text("cantidad_restante > 0"),
+)
+
+# Estado de valorización por producto, mantenido incrementalmente en cada entrada/salida
+class CostoProducto(Base):
+    __tablename__ = "costo_productos"
+
+    producto_id = Column(Integer, ForeignKey("productos.id", ondelete="CASCADE"), primary_key=True)
+    cantidad = Column(Float, nullable=False, default=0)
+    costo_promedio = Column(Float, nullable=False, default=0)  # Promedio ponderado móvil
+    valor_fifo = Column(Float, nullable=False, default=0)  # Suma de las capas abiertas
+    actualizado = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# Costo de ventas acumulado por producto y día (COGS por período sin recorrer el ledger)
+class CostoVentaDiario(Base):
+    __tablename__ = "costo_ventas_diario"
+
+    producto_id = Column(Integer, ForeignKey("productos.id", ondelete="CASCADE"), primary_key=True)
+    dia = Column(Date, primary_key=True, index=True)
+    cantidad = Column(Float, nullable=False, default=0)
+    cogs_fifo = Column(Float, nullable=False, default=0)
+    cogs_promedio = Column(Float, nullable=False, default=0)
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String, Boolean
+from app.db.database import Base
+
+class Deposito(Base):
+    __tablename__ = "depositos"
+
+    id = Column(Integer, primary_key=True, index=True)
+    nombre = Column(String, nullable=False, unique=True, index=True)
+    direccion = Column(String, nullable=True)
+    activo = Column(Boolean, nullable=False, default=True)
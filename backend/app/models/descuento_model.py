@@ -1,5 +1,5 @@
 # app/models/descuento_model.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Boolean, ForeignKey, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from enum import Enum as PyEnum
@@ -43,6 +43,7 @@ class Descuento(Base):
     fecha_inicio = Column(DateTime, nullable=False, index=True)
     fecha_fin = Column(DateTime, nullable=True, index=True)
     fecha_creacion = Column(DateTime, default=datetime.utcnow, nullable=False)
+    proxima_transicion = Column(DateTime, nullable=True)  # Próximo cambio de estado programado
     
     # Estado y configuración
     estado = Column(String(20), default=EstadoDescuento.ACTIVO.value, index=True)
@@ -62,6 +63,14 @@ class Descuento(Base):
     def __repr__(self):
         return f"<Descuento(id={self.id}, codigo='{self.codigo}', tipo='{self.tipo}')>"
 
+# Índice parcial: sólo las filas con una transición pendiente
+Index(
+    "ix_descuentos_proxima_transicion",
+    Descuento.proxima_transicion,
+    postgresql_where=Descuento.proxima_transicion.isnot(None),
+    sqlite_where=Descuento.proxima_transicion.isnot(None)
+)
+
 class DescuentoUso(Base):
     __tablename__ = "descuento_usos"
 
@@ -88,6 +97,18 @@ class DescuentoUso(Base):
     def __repr__(self):
         return f"<DescuentoUso(id={self.id}, descuento_id={self.descuento_id}, monto_descuento={self.monto_descuento})>"
 
+class DescuentoUsoMensual(Base):
+    """Acumulado mensual de usos por descuento (se actualiza al registrar cada uso)"""
+    __tablename__ = "descuento_usos_mensual"
+
+    descuento_id = Column(Integer, ForeignKey("descuentos.id", ondelete="CASCADE"), primary_key=True)
+    mes = Column(Date, primary_key=True, index=True)  # Primer día del mes
+    usos = Column(Integer, nullable=False, default=0)
+    monto_descuentado = Column(Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<DescuentoUsoMensual(descuento_id={self.descuento_id}, mes={self.mes}, usos={self.usos})>"
+
 class Promocion(Base):
     __tablename__ = "promociones"
 
@@ -1,5 +1,5 @@
 # app/models/inventario_model.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Enum, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from enum import Enum as PyEnum
@@ -44,6 +44,9 @@ class ConfiguracionInventario(Base):
     alerta_movimiento_grande = Column(Boolean, default=True)
     umbral_movimiento_grande = Column(Float, nullable=True)  # % de cambio para alertar
     
+    # Ajustar umbrales (stock mínimo, nivel de servicio) según la clasificación ABC/XYZ del producto
+    usar_clasificacion = Column(Boolean, default=False, nullable=False)
+    
     # Metadatos
     fecha_creacion = Column(DateTime, default=datetime.utcnow, nullable=False)
     fecha_actualizacion = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -60,8 +63,15 @@ class AlertaInventario(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     producto_id = Column(Integer, ForeignKey("productos.id"), nullable=False, index=True)
-    tipo = Column(Enum(TipoAlertaInventario), nullable=False, index=True)
-    estado = Column(Enum(EstadoAlerta), default=EstadoAlerta.PENDIENTE, index=True)
+    # values_callable: persistir los valores ('stock_bajo'), igual que los tipos ENUM de la migración
+    tipo = Column(
+        Enum(TipoAlertaInventario, name="tipoalertainventario", values_callable=lambda e: [m.value for m in e]),
+        nullable=False, index=True
+    )
+    estado = Column(
+        Enum(EstadoAlerta, name="estadoalerta", values_callable=lambda e: [m.value for m in e]),
+        default=EstadoAlerta.PENDIENTE, index=True
+    )
     
     # Detalles de la alerta
     titulo = Column(String(255), nullable=False)
@@ -76,7 +86,7 @@ class AlertaInventario(Base):
     
     # Metadatos
     fecha_creacion = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
-    fecha_resolucion = Column(DateTime, nullable=True)
+    fecha_resolucion = Column(DateTime, nullable=True, index=True)
     resuelta_por = Column(Integer, ForeignKey("users.id"), nullable=True)
     notas_resolucion = Column(Text, nullable=True)
     
@@ -87,6 +97,16 @@ class AlertaInventario(Base):
     def __repr__(self):
         return f"<AlertaInventario(id={self.id}, tipo='{self.tipo}', estado='{self.estado}')>"
 
+# A lo sumo una alerta pendiente por (producto, tipo): permite INSERT ... ON CONFLICT DO NOTHING
+Index(
+    "ux_alertas_inventario_pendiente",
+    AlertaInventario.producto_id,
+    AlertaInventario.tipo,
+    unique=True,
+    postgresql_where=text("estado = 'pendiente'"),
+    sqlite_where=text("estado = 'pendiente'")
+)
+
 class MovimientoInventario(Base):
     __tablename__ = "movimientos_inventario"
 
@@ -145,3 +165,24 @@ class ReordenAutomatico(Base):
     
     def __repr__(self):
         return f"<ReordenAutomatico(id={self.id}, producto_id={self.producto_id}, cantidad={self.cantidad_sugerida}, estado='{self.estado}')>"
+
+class ProductoClasificacion(Base):
+    __tablename__ = "producto_clasificacion"
+
+    producto_id = Column(Integer, ForeignKey("productos.id", ondelete="CASCADE"), primary_key=True)
+    clase_abc = Column(String(1), nullable=False, index=True)  # 'A', 'B', 'C' por aporte a la facturación
+    clase_xyz = Column(String(1), nullable=False, index=True)  # 'X', 'Y', 'Z' por variabilidad de la demanda
+    
+    # Métricas usadas para clasificar
+    ingresos = Column(Float, nullable=False, default=0.0)
+    participacion_acumulada = Column(Float, nullable=False, default=0.0)
+    demanda_semanal_media = Column(Float, nullable=False, default=0.0)
+    coeficiente_variacion = Column(Float, nullable=True)  # None si no hubo ventas
+    semanas = Column(Integer, nullable=False)
+    fecha_calculo = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Relaciones
+    producto = relationship("Producto", backref="clasificacion")
+    
+    def __repr__(self):
+        return f"<ProductoClasificacion(producto_id={self.producto_id}, abc='{self.clase_abc}', xyz='{self.clase_xyz}')>"
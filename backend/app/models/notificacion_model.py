@@ -1,5 +1,5 @@
 # app/models/notificacion_model.py
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from enum import Enum as PyEnum
@@ -46,11 +46,48 @@ class Notificacion(Base):
     requiere_accion = Column(Boolean, default=False)
     datos_adicionales = Column(Text, nullable=True)  # JSON string con datos extra
     
+    __table_args__ = (
+        # Cubre los conteos de resumen/estadísticas por usuario (index-only scan)
+        Index(
+            "ix_notificaciones_usuario_estado_tipo_fecha",
+            "usuario_id", "estado", "tipo", "fecha_creacion",
+            postgresql_include=["es_urgente"],
+        ),
+    )
+    
     def __repr__(self):
         return f"<Notificacion(id={self.id}, titulo='{self.titulo}', tipo='{self.tipo}')>"
 
+class NotificacionNoLeidas(Base):
+    """
+    Notificaciones propias no leídas por usuario, mantenido en cada cambio de estado.
+    Las globales se cuentan con NotificacionGlobalLectura.
+    """
+    __tablename__ = "notificaciones_no_leidas"
+    
+    usuario_id = Column(Integer, primary_key=True)
+    no_leidas = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<NotificacionNoLeidas(usuario_id={self.usuario_id}, no_leidas={self.no_leidas})>"
+
+class NotificacionGlobalLectura(Base):
+    """
+    Marca de lectura de notificaciones globales por usuario: todas las globales con
+    id <= ultima_leida_id están leídas. Las leídas por encima de la marca quedan como
+    excepciones en NotificacionUsuario hasta que la marca las alcanza.
+    """
+    __tablename__ = "notificaciones_globales_lectura"
+    
+    usuario_id = Column(Integer, primary_key=True)
+    ultima_leida_id = Column(Integer, nullable=False, default=0)
+    fecha_actualizacion = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<NotificacionGlobalLectura(usuario_id={self.usuario_id}, ultima_leida_id={self.ultima_leida_id})>"
+
 class NotificacionUsuario(Base):
-    """Tabla de relación para notificaciones por usuario"""
+    """Estado por usuario de una notificación global (excepciones por encima de la marca de lectura)"""
     __tablename__ = "notificaciones_usuarios"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -59,5 +96,9 @@ class NotificacionUsuario(Base):
     estado = Column(Enum(EstadoNotificacion), default=EstadoNotificacion.PENDIENTE)
     fecha_lectura = Column(DateTime, nullable=True)
     
+    __table_args__ = (
+        Index("ux_notificaciones_usuarios_usuario_notificacion", "usuario_id", "notificacion_id", unique=True),
+    )
+    
     def __repr__(self):
         return f"<NotificacionUsuario(notificacion_id={self.notificacion_id}, usuario_id={self.usuario_id})>"
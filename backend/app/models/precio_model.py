@@ -1,5 +1,5 @@
 # app/models/precio_model.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Enum, Date
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Enum, Date, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, date
 from enum import Enum as PyEnum
@@ -46,6 +46,7 @@ class PrecioProducto(Base):
     # Fechas de vigencia
     fecha_inicio = Column(DateTime, nullable=False, index=True)
     fecha_fin = Column(DateTime, nullable=True, index=True)
+    proxima_transicion = Column(DateTime, nullable=True)  # Próximo cambio de estado programado
     
     # Metadatos
     nombre = Column(String(255), nullable=True)  # Nombre descriptivo del precio
@@ -66,6 +67,14 @@ class PrecioProducto(Base):
     def __repr__(self):
         return f"<PrecioProducto(id={self.id}, producto_id={self.producto_id}, tipo='{self.tipo}', precio_especial={self.precio_especial})>"
 
+# Índice parcial: sólo las filas con una transición pendiente
+Index(
+    "ix_precios_producto_proxima_transicion",
+    PrecioProducto.proxima_transicion,
+    postgresql_where=PrecioProducto.proxima_transicion.isnot(None),
+    sqlite_where=PrecioProducto.proxima_transicion.isnot(None)
+)
+
 class PrecioVolumen(Base):
     __tablename__ = "precios_volumen"
 
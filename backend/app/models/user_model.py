@@ -5,6 +5,7 @@ from app.db.database import Base  # 👈 IMPORTA DIRECTO DE database, NO de base
 
 class User(Base):
     __tablename__ = "users"
+    __auditoria_tabla__ = "usuarios"  # table_name en audit_logs (el que ya usaban los registros existentes)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     username: Mapped[str] = mapped_column(String(50), unique=True, index=True, nullable=False)
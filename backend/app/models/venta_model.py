@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, Float, Date, DateTime, ForeignKey, Index, text
+from sqlalchemy.orm import relationship, backref
 from datetime import datetime
 from app.db.database import Base
 
@@ -8,8 +8,9 @@ class Venta(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     cliente_id = Column(Integer, ForeignKey("clientes.id", ondelete="SET NULL"), nullable=True)
-    fecha = Column(DateTime, default=datetime.utcnow, nullable=False)
+    fecha = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     total = Column(Float, default=0.0, nullable=False)
+    deposito_id = Column(Integer, ForeignKey("depositos.id"), nullable=False, server_default=text("1"))
 
     # LADO MUCHOS a UNO con Cliente (coincide el back_populates)
     cliente = relationship("Cliente", back_populates="ventas")
@@ -25,8 +26,33 @@ class VentaItem(Base):
     precio_unitario = Column(Float, nullable=False)
     subtotal = Column(Float, nullable=False)
 
-    venta = relationship("Venta", backref="items")
+    # Al eliminar la venta se eliminan sus items (antes el ORM intentaba dejarlos con venta_id NULL)
+    venta = relationship("Venta", backref=backref("items", cascade="all, delete-orphan"))
 
+    __table_args__ = (
+        # Agregados por producto a partir de un rango de ventas
+        Index("ix_venta_items_venta_producto", "venta_id", "producto_id"),
+    )
 
 
+class VentaDiaria(Base):
+    """Acumulado diario de ventas por depósito (se actualiza al crear/eliminar cada venta)"""
+    __tablename__ = "ventas_diarias"
 
+    fecha = Column(Date, primary_key=True)
+    deposito_id = Column(Integer, ForeignKey("depositos.id", ondelete="CASCADE"), primary_key=True)
+    cantidad_ventas = Column(Integer, nullable=False, default=0)
+    monto_total = Column(Float, nullable=False, default=0.0)
+    venta_min = Column(Float, nullable=False, default=0.0)
+    venta_max = Column(Float, nullable=False, default=0.0)
+
+
+class VentaProductoDiaria(Base):
+    """Acumulado diario de ventas por producto (se actualiza al crear/eliminar cada venta)"""
+    __tablename__ = "ventas_producto_diarias"
+
+    fecha = Column(Date, primary_key=True)
+    producto_id = Column(Integer, ForeignKey("productos.id", ondelete="CASCADE"), primary_key=True, index=True)
+    cantidad = Column(Float, nullable=False, default=0.0)
+    monto_total = Column(Float, nullable=False, default=0.0)
+    ventas_count = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,5 @@
 # app/routers/auditoria_router.py
+import json
 from datetime import datetime
 from typing import Any, Optional
 
@@ -8,27 +9,41 @@ from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.db.database import get_db
+from app.db.keyset import codificar_cursor, decodificar_cursor
 from app.core.deps import require_admin
+from app.models.auditoria import AuditAction
+from app.schemas.auditoria_schema import AuditLogPagina
+from app.services.auditoria_service import buscar_audit_logs
 
 router = APIRouter(prefix="/auditoria", tags=["Auditoría"])
 
-# Tabla minimal si no existe:
-#   id bigserial pk
+# Tabla minimal si no existe, particionada por mes sobre ts:
+#   id bigserial
 #   ts timestamptz
 #   actor text
 #   accion text
 #   detalle jsonb
+#   pk (id, ts)
 
 DDL_CREATE = text("""
 CREATE TABLE IF NOT EXISTS auditoria (
-    id BIGSERIAL PRIMARY KEY,
+    id BIGSERIAL,
     ts TIMESTAMPTZ NOT NULL DEFAULT NOW(),
     actor TEXT,
     accion TEXT NOT NULL,
-    detalle JSONB
-);
+    detalle JSONB,
+    PRIMARY KEY (id, ts)
+) PARTITION BY RANGE (ts);
 """)
 
+# Paginación por cursor (ts, id), filtros por actor/acción y búsqueda en detalle (GIN)
+DDL_INDICES = [
+    text("CREATE INDEX IF NOT EXISTS ix_auditoria_ts_id ON auditoria (ts DESC, id DESC)"),
+    text("CREATE INDEX IF NOT EXISTS ix_auditoria_actor_ts ON auditoria (actor, ts DESC, id DESC)"),
+    text("CREATE INDEX IF NOT EXISTS ix_auditoria_accion_ts ON auditoria (accion, ts DESC, id DESC)"),
+    text("CREATE INDEX IF NOT EXISTS ix_auditoria_detalle_gin ON auditoria USING gin (detalle)"),
+]
+
 class AuditIn(BaseModel):
     accion: str
     actor: Optional[str] = None
@@ -39,8 +54,13 @@ def ensure_table():
     # Nota: en routers, este evento corre cuando el router se monta.
     # Si preferís centralizar, podés moverlo a main.py
     from app.db.database import engine
+    from app.services.auditoria_service import mantener_particiones_auditoria
     with engine.begin() as conn:
         conn.execute(DDL_CREATE)
+        for ddl in DDL_INDICES:
+            conn.execute(ddl)
+    # Sin particiones la tabla no acepta inserts
+    mantener_particiones_auditoria(["auditoria"])
 
 @router.post("", summary="Registrar evento de auditoría")
 def add_event(data: AuditIn, db: Session = Depends(get_db), _auth=Depends(require_admin)):
@@ -53,18 +73,103 @@ def add_event(data: AuditIn, db: Session = Depends(get_db), _auth=Depends(requir
     db.commit()
     return {"id": row.id, "ts": row.ts, "actor": data.actor, "accion": data.accion}
 
-@router.get("", summary="Listar eventos", description="Paginado simple por offset/limit, ordenado por más recientes")
+def _json_param(valor: Optional[str], nombre: str) -> Optional[Any]:
+    if valor is None:
+        return None
+    try:
+        return json.loads(valor)
+    except ValueError:
+        raise HTTPException(400, f"{nombre} debe ser JSON válido")
+
+@router.get("", summary="Listar eventos", description="Más recientes primero, paginado por cursor (ts, id) con filtros")
 def list_events(
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    offset: int = Query(0, ge=0, description="Obsoleto: usar cursor (se ignora si se indica cursor)"),
     limit: int = Query(50, ge=1, le=200),
+    actor: Optional[str] = Query(None),
+    accion: Optional[str] = Query(None),
+    desde: Optional[datetime] = Query(None, description="ts >= desde"),
+    hasta: Optional[datetime] = Query(None, description="ts < hasta"),
+    clave: Optional[str] = Query(None, description="detalle contiene la clave (operador ?)"),
+    contiene: Optional[str] = Query(None, description='detalle contiene este JSON (operador @>), p. ej. {"tabla": "ventas"}'),
     db: Session = Depends(get_db),
     _auth=Depends(require_admin),
 ):
+    condiciones = []
+    params: dict = {"l": limit + 1}
+    if actor:
+        condiciones.append("actor = :actor")
+        params["actor"] = actor
+    if accion:
+        condiciones.append("accion = :accion")
+        params["accion"] = accion
+    if desde:
+        condiciones.append("ts >= :desde")
+        params["desde"] = desde
+    if hasta:
+        condiciones.append("ts < :hasta")
+        params["hasta"] = hasta
+    if clave:
+        condiciones.append("detalle ? :clave")
+        params["clave"] = clave
+    if contiene is not None:
+        _json_param(contiene, "contiene")
+        condiciones.append("detalle @> CAST(:contiene AS JSONB)")
+        params["contiene"] = contiene
+    if cursor:
+        try:
+            params["cursor_ts"], params["cursor_id"] = decodificar_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        # Comparación de filas: un rango sobre ix_auditoria_ts_id, sin descartar filas previas
+        condiciones.append("(ts, id) < (:cursor_ts, :cursor_id)")
+    
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    paginado = "LIMIT :l"
+    if offset and not cursor:
+        paginado = "OFFSET :o LIMIT :l"
+        params["o"] = offset
     rows = db.execute(
-        text("SELECT id, ts, actor, accion, detalle FROM auditoria ORDER BY ts DESC, id DESC OFFSET :o LIMIT :l"),
-        {"o": offset, "l": limit}
+        text(f"SELECT id, ts, actor, accion, detalle FROM auditoria {where} ORDER BY ts DESC, id DESC {paginado}"),
+        params
     ).mappings().all()
-    return {"items": [dict(r) for r in rows], "offset": offset, "limit": limit}
+    
+    items = [dict(r) for r in rows[:limit]]
+    next_cursor = codificar_cursor(items[-1]["ts"], items[-1]["id"]) if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor, "offset": offset, "limit": limit}
+
+@router.get("/logs", response_model=AuditLogPagina, summary="Buscar en audit_logs",
+            description="Auditoría de la API (audit_logs), más recientes primero, paginada por cursor (created_at, id)")
+def list_audit_logs(
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    limit: int = Query(50, ge=1, le=200),
+    actor: Optional[str] = Query(None, description="username"),
+    accion: Optional[AuditAction] = Query(None),
+    table_name: Optional[str] = Query(None),
+    record_id: Optional[str] = Query(None),
+    desde: Optional[datetime] = Query(None, description="created_at >= desde"),
+    hasta: Optional[datetime] = Query(None, description="created_at < hasta"),
+    clave: Optional[str] = Query(None, description="details contiene la clave (operador ?)"),
+    contiene: Optional[str] = Query(None, description="details contiene este JSON (operador @>)"),
+    db: Session = Depends(get_db),
+    _auth=Depends(require_admin),
+):
+    try:
+        return buscar_audit_logs(
+            db,
+            username=actor,
+            action=accion,
+            table_name=table_name,
+            record_id=record_id,
+            desde=desde,
+            hasta=hasta,
+            clave=clave,
+            contiene=_json_param(contiene, "contiene"),
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
 
 @router.get("/{event_id}", summary="Obtener evento por id")
 def get_event(event_id: int, db: Session = Depends(get_db), _auth=Depends(require_admin)):
@@ -1,12 +1,14 @@
 # app/routers/dashboard_router.py
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import date, datetime
+import time
 
 from app.db.database import get_db
 from app.core.deps import require_user
-from app.services.dashboard_service import DashboardService
+from fastapi.encoders import jsonable_encoder
+from app.services.dashboard_service import DashboardService, dashboard_cache
 from app.schemas.dashboard_schema import (
     VentasResumen, VentasPorPeriodo, ProductoMasVendido, 
     ClienteTop, StockBajoItem, MetricasRendimiento, 
@@ -15,6 +17,14 @@ from app.schemas.dashboard_schema import (
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+def _cacheado(endpoint: str, calcular, **params):
+    """
+    Resultado del endpoint cacheado por (endpoint, parámetros). Si varios usuarios
+    piden la misma clave a la vez, se calcula una sola vez (single-flight).
+    """
+    clave = endpoint + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+    return dashboard_cache.get_or_set(clave, lambda: jsonable_encoder(calcular()))
+
 @router.get("/ventas/resumen", response_model=VentasResumen, summary="Resumen de ventas")
 def get_ventas_resumen(
     fecha_inicio: Optional[date] = Query(None, description="Fecha de inicio (YYYY-MM-DD)"),
@@ -29,7 +39,10 @@ def get_ventas_resumen(
     - Venta mayor y menor
     - Ventas del día actual
     """
-    return DashboardService.get_ventas_resumen(db, fecha_inicio, fecha_fin)
+    return _cacheado(
+        "ventas/resumen", lambda: DashboardService.get_ventas_resumen(db, fecha_inicio, fecha_fin),
+        fecha_inicio=fecha_inicio, fecha_fin=fecha_fin
+    )
 
 @router.get("/ventas/periodo", response_model=List[VentasPorPeriodo], summary="Ventas por período")
 def get_ventas_por_periodo(
@@ -47,11 +60,15 @@ def get_ventas_por_periodo(
     if periodo not in ["dia", "semana", "mes"]:
         raise HTTPException(status_code=400, detail="Período debe ser: dia, semana o mes")
     
-    return DashboardService.get_ventas_por_periodo(db, periodo, limite)
+    return _cacheado(
+        "ventas/periodo", lambda: DashboardService.get_ventas_por_periodo(db, periodo, limite),
+        periodo=periodo, limite=limite
+    )
 
 @router.get("/productos/mas-vendidos", response_model=List[ProductoMasVendido], summary="Productos más vendidos")
 def get_productos_mas_vendidos(
     limite: int = Query(10, ge=1, le=100, description="Número de productos a mostrar"),
+    dias: int = Query(365, ge=1, le=3650, description="Ventana en días"),
     db: Session = Depends(get_db),
     _auth=Depends(require_user)
 ):
@@ -61,7 +78,10 @@ def get_productos_mas_vendidos(
     - Monto total generado
     - Número de ventas
     """
-    return DashboardService.get_productos_mas_vendidos(db, limite)
+    return _cacheado(
+        "productos/mas-vendidos", lambda: DashboardService.get_productos_mas_vendidos(db, limite, dias),
+        limite=limite, dias=dias
+    )
 
 @router.get("/clientes/top", response_model=List[ClienteTop], summary="Clientes top")
 def get_clientes_top(
@@ -75,7 +95,7 @@ def get_clientes_top(
     - Monto total gastado
     - Promedio por compra
     """
-    return DashboardService.get_clientes_top(db, limite)
+    return _cacheado("clientes/top", lambda: DashboardService.get_clientes_top(db, limite), limite=limite)
 
 @router.get("/stock/bajo", response_model=List[StockBajoItem], summary="Stock bajo")
 def get_stock_bajo(
@@ -89,7 +109,7 @@ def get_stock_bajo(
     - Diferencia y porcentaje
     - Alertas de reposición
     """
-    return DashboardService.get_stock_bajo(db, stock_minimo)
+    return _cacheado("stock/bajo", lambda: DashboardService.get_stock_bajo(db, stock_minimo), stock_minimo=stock_minimo)
 
 @router.get("/metricas", response_model=MetricasRendimiento, summary="Métricas de rendimiento")
 def get_metricas_rendimiento(
@@ -104,7 +124,7 @@ def get_metricas_rendimiento(
     - Ticket promedio
     - Tasa de conversión
     """
-    return DashboardService.get_metricas_rendimiento(db)
+    return _cacheado("metricas", lambda: DashboardService.get_metricas_rendimiento(db))
 
 @router.get("/tendencias", response_model=List[TendenciaVentas], summary="Tendencias de ventas")
 def get_tendencias_ventas(
@@ -118,10 +138,12 @@ def get_tendencias_ventas(
     - Monto diario
     - Crecimiento día a día
     """
-    return DashboardService.get_tendencias_ventas(db, dias)
+    return _cacheado("tendencias", lambda: DashboardService.get_tendencias_ventas(db, dias), dias=dias)
 
 @router.get("/completo", response_model=DashboardCompleto, summary="Dashboard completo")
 def get_dashboard_completo(
+    response: Response,
+    paralelo: bool = Query(True, description="Armar las partes en paralelo (una sesión por parte)"),
     db: Session = Depends(get_db),
     _auth=Depends(require_user)
 ):
@@ -134,8 +156,25 @@ def get_dashboard_completo(
     - Stock bajo
     - Métricas de rendimiento
     - Tendencias
+    
+    El tiempo de cada parte se informa en el header `Server-Timing` (sólo `total`
+    cuando la respuesta sale del cache).
     """
-    return DashboardService.get_dashboard_completo(db)
+    tiempos: dict[str, float] = {}
+    inicio = time.perf_counter()
+    
+    def armar():
+        if paralelo:
+            return DashboardService.get_dashboard_completo_paralelo(tiempos)
+        return DashboardService.get_dashboard_completo(db, tiempos)
+    
+    dashboard = _cacheado("completo", armar, paralelo=paralelo)
+    tiempos["total"] = (time.perf_counter() - inicio) * 1000
+    
+    # Sin tiempos por parte significa que la respuesta salió del cache
+    response.headers["Server-Timing"] = ", ".join(f"{nombre};dur={ms:.1f}" for nombre, ms in tiempos.items())
+    response.headers["X-Cache"] = "MISS" if len(tiempos) > 1 else "HIT"
+    return dashboard
 
 @router.get("/ventas/estadisticas", summary="Estadísticas detalladas de ventas")
 def get_ventas_estadisticas(
@@ -148,18 +187,16 @@ def get_ventas_estadisticas(
     Obtiene estadísticas detalladas de ventas con filtros de fecha.
     Incluye análisis de tendencias, comparaciones y métricas avanzadas.
     """
-    resumen = DashboardService.get_ventas_resumen(db, fecha_inicio, fecha_fin)
-    productos = DashboardService.get_productos_mas_vendidos(db, 5)
-    clientes = DashboardService.get_clientes_top(db, 5)
-    tendencias = DashboardService.get_tendencias_ventas(db, 30)
-    
-    return {
-        "resumen": resumen,
-        "productos_destacados": productos,
-        "clientes_destacados": clientes,
-        "tendencias": tendencias,
-        "filtros_aplicados": {
-            "fecha_inicio": fecha_inicio,
-            "fecha_fin": fecha_fin
+    def calcular():
+        return {
+            "resumen": DashboardService.get_ventas_resumen(db, fecha_inicio, fecha_fin),
+            "productos_destacados": DashboardService.get_productos_mas_vendidos(db, 5),
+            "clientes_destacados": DashboardService.get_clientes_top(db, 5),
+            "tendencias": DashboardService.get_tendencias_ventas(db, 30),
+            "filtros_aplicados": {
+                "fecha_inicio": fecha_inicio,
+                "fecha_fin": fecha_fin
+            }
         }
-    }
+    
+    return _cacheado("ventas/estadisticas", calcular, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin)
\ No newline at end of file
@@ -235,8 +235,8 @@ def actualizar_estados(
     current_user=Depends(require_admin)  # Solo admins pueden actualizar estados
 ):
     """
-    Actualiza los estados de los descuentos según las fechas.
-    Útil para ejecutar como tarea programada.
+    Aplica las transiciones de estado vencidas según las fechas.
+    El scheduler ya lo ejecuta periódicamente; esto fuerza un tick manual.
     """
     actualizados = DescuentoService.actualizar_estados_descuentos(db)
     
@@ -292,6 +292,7 @@ def activar_descuento(
     
     descuento.estado = EstadoDescuento.ACTIVO
     descuento.es_activo = True
+    DescuentoService.programar_transicion(descuento)
     
     db.commit()
     db.refresh(descuento)
@@ -314,6 +315,8 @@ def desactivar_descuento(
     
     descuento.estado = EstadoDescuento.INACTIVO
     descuento.es_activo = False
+    # Desactivación manual: sin transición pendiente, el tick no la vuelve a activar al llegar fecha_inicio
+    descuento.proxima_transicion = None
     
     db.commit()
     db.refresh(descuento)
@@ -2,17 +2,20 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, date
 
 from app.db.database import get_db
 from app.core.deps import require_user, require_admin
 from app.services.inventario_service import InventarioService
+from app.services import costo_service
+from app.services.clasificacion_service import ClasificacionService
 from app.schemas.inventario_schema import (
     ConfiguracionInventarioCreate, ConfiguracionInventarioUpdate, ConfiguracionInventarioOut,
     AlertaInventarioCreate, AlertaInventarioUpdate, AlertaInventarioOut,
     MovimientoInventarioCreate, MovimientoInventarioOut,
     ReordenAutomaticoCreate, ReordenAutomaticoUpdate, ReordenAutomaticoOut,
     InventarioResumen, InventarioFiltros, InventarioEstadisticas,
+    ValorizacionInventarioOut, CostoVentasOut, ProductoClasificacionOut,
     TipoAlertaInventario, EstadoAlerta
 )
 
@@ -301,29 +304,75 @@ def obtener_resumen(
     """
     return InventarioService.obtener_resumen(db)
 
+@router.get("/valorizacion", response_model=ValorizacionInventarioOut, summary="Valor actual del inventario")
+def obtener_valorizacion(
+    producto_id: Optional[int] = Query(None, description="Filtrar por producto"),
+    db: Session = Depends(get_db),
+    current_user=Depends(require_user)
+):
+    """
+    Valor del inventario por capas FIFO y por costo promedio ponderado.
+    """
+    return costo_service.valor_inventario(db, producto_id)
+
+@router.get("/costo-ventas", response_model=CostoVentasOut, summary="Costo de la mercadería vendida")
+def obtener_costo_ventas(
+    desde: date = Query(..., description="Día desde (inclusive)"),
+    hasta: date = Query(..., description="Día hasta (inclusive)"),
+    producto_id: Optional[int] = Query(None, description="Filtrar por producto"),
+    db: Session = Depends(get_db),
+    current_user=Depends(require_user)
+):
+    """
+    Costo de la mercadería vendida (FIFO y promedio) entre dos fechas.
+    """
+    if desde > hasta:
+        raise HTTPException(status_code=400, detail="La fecha desde no puede ser posterior a hasta")
+    return costo_service.costo_ventas(db, desde, hasta, producto_id)
+
 @router.get("/estadisticas", response_model=InventarioEstadisticas, summary="Estadísticas del inventario")
 def obtener_estadisticas(
     db: Session = Depends(get_db),
     current_user=Depends(require_admin)  # Solo admins pueden ver estadísticas
 ):
     """
-    Obtiene estadísticas detalladas del inventario.
+    Obtiene estadísticas detalladas del inventario (cacheadas unos segundos).
     Solo usuarios administradores pueden ver estadísticas.
     """
-    # Implementación básica - se puede expandir
-    resumen = InventarioService.obtener_resumen(db)
+    return InventarioService.obtener_estadisticas(db)
+
+# === CLASIFICACIÓN ABC/XYZ ===
+
+@router.get("/clasificacion", response_model=List[ProductoClasificacionOut], summary="Clasificación ABC/XYZ")
+def listar_clasificacion(
+    clase_abc: Optional[str] = Query(None, pattern="^[ABCabc]$", description="Filtrar por clase ABC"),
+    clase_xyz: Optional[str] = Query(None, pattern="^[XYZxyz]$", description="Filtrar por clase XYZ"),
+    skip: int = Query(0, ge=0, description="Número de productos a omitir"),
+    limit: int = Query(100, ge=1, le=1000, description="Número máximo de productos a retornar"),
+    db: Session = Depends(get_db),
+    current_user=Depends(require_user)
+):
+    """
+    Lista la clasificación ABC (facturación) / XYZ (variabilidad) de los productos,
+    de mayor a menor facturación.
+    """
+    return ClasificacionService.obtener_clasificaciones(db, clase_abc, clase_xyz, skip, limit)
+
+@router.post("/clasificacion/recalcular", summary="Recalcular clasificación ABC/XYZ")
+def recalcular_clasificacion(
+    db: Session = Depends(get_db),
+    current_user=Depends(require_admin)  # Solo admins pueden recalcular
+):
+    """
+    Recalcula la clasificación de todos los productos.
+    También corre como tarea programada (job clasificacion_abc_xyz).
+    """
+    resultado = ClasificacionService.calcular_clasificacion(db)
     
-    return InventarioEstadisticas(
-        total_productos=resumen.total_productos,
-        productos_configurados=0,  # Se calcularía
-        alertas_por_tipo={},
-        movimientos_por_tipo={},
-        valor_inventario_por_categoria={},
-        productos_mas_movidos=[],
-        tendencia_stock=[],
-        alertas_resueltas_mes=0,
-        tiempo_promedio_resolucion=0.0
-    )
+    return {
+        "message": f"Productos clasificados: {resultado['productos']}",
+        **resultado
+    }
 
 # === PROCESAMIENTO AUTOMÁTICO ===
 
@@ -334,15 +383,32 @@ def procesar_alertas(
 ):
     """
     Procesa todas las alertas pendientes del sistema.
-    Útil para ejecutar como tarea programada.
+    También corre como tarea programada (job alertas_inventario).
     """
     procesadas = InventarioService.procesar_alertas_pendientes(db)
     
     return {
-        "message": f"Alertas procesadas: {procesadas} productos",
+        "message": f"Alertas procesadas: {procesadas} alertas nuevas",
         "procesadas": procesadas
     }
 
+@router.post("/reordenes/generar-todos", summary="Generar reordenes por demanda para todos los productos")
+def generar_reordenes_todos(
+    db: Session = Depends(get_db),
+    current_user=Depends(require_admin)  # Solo admins pueden generar
+):
+    """
+    Calcula punto de reorden (con stock de seguridad) y cantidad económica de pedido
+    a partir de la demanda diaria de cada producto y genera todos los reordenes de una vez.
+    También corre como tarea nocturna (job reordenes_demanda).
+    """
+    resultado = InventarioService.generar_reordenes_masivos(db)
+    
+    return {
+        "message": f"Reordenes generados: {resultado['generados']}",
+        **resultado
+    }
+
 @router.post("/generar-reorden/{producto_id}", response_model=ReordenAutomaticoOut, summary="Generar reorden automático")
 def generar_reorden(
     producto_id: int,
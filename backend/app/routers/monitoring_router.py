@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.core.monitoring import metrics, health_checker, alert_manager
 from app.core.deps import require_admin
+from app.services.auditoria_service import audit_writer
 from typing import Dict, Any
 
 router = APIRouter(prefix="/monitoring", tags=["Monitoring"])
@@ -54,6 +55,11 @@ async def get_endpoint_stats(admin_user = Depends(require_admin)):
         "total_endpoints": len(metrics.endpoint_stats)
     }
 
+@router.get("/auditoria")
+async def get_audit_writer_stats(admin_user = Depends(require_admin)):
+    """Estado del escritor de auditoría en segundo plano: cola, lotes y descartes (solo admin)"""
+    return audit_writer.estadisticas()
+
 @router.post("/alerts/clear")
 async def clear_alerts(admin_user = Depends(require_admin)):
     """Limpiar alertas (solo admin)"""
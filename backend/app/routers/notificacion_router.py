@@ -1,16 +1,19 @@
 # app/routers/notificacion_router.py
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Body, Depends, Header, Query, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Union
 from datetime import datetime
 
 from app.db.database import get_db
-from app.core.deps import require_user, require_admin
+from app.core.deps import es_admin, require_user, require_admin
 from app.services.notificacion_service import NotificacionService
+from app.services.evento_service import stream_eventos
 from app.schemas.notificacion_schema import (
     NotificacionCreate, NotificacionUpdate, NotificacionOut, 
     NotificacionResumen, NotificacionFiltros, NotificacionStats,
-    NotificacionBulkUpdate, TipoNotificacion, EstadoNotificacion
+    NotificacionBulkUpdate, NotificacionBulkAccion, NotificacionBulkResultado,
+    TipoNotificacion, EstadoNotificacion
 )
 
 router = APIRouter(prefix="/notificaciones", tags=["Notificaciones"])
@@ -60,27 +63,6 @@ def listar_notificaciones(
         limit=limit
     )
 
-@router.get("/{notificacion_id}", response_model=NotificacionOut, summary="Obtener notificación")
-def obtener_notificacion(
-    notificacion_id: int,
-    db: Session = Depends(get_db),
-    current_user=Depends(require_user)
-):
-    """
-    Obtiene una notificación específica por ID.
-    Solo se pueden acceder a notificaciones propias o globales.
-    """
-    notificacion = NotificacionService.obtener_notificacion(db, notificacion_id)
-    
-    if not notificacion:
-        raise HTTPException(status_code=404, detail="Notificación no encontrada")
-    
-    # Verificar acceso (global o del usuario)
-    if notificacion.usuario_id and notificacion.usuario_id != current_user.id:
-        raise HTTPException(status_code=403, detail="No tienes acceso a esta notificación")
-    
-    return notificacion
-
 @router.put("/{notificacion_id}", response_model=NotificacionOut, summary="Actualizar notificación")
 def actualizar_notificacion(
     notificacion_id: int,
@@ -101,7 +83,7 @@ def actualizar_notificacion(
     if notificacion.usuario_id and notificacion.usuario_id != current_user.id:
         raise HTTPException(status_code=403, detail="No tienes acceso a esta notificación")
     
-    return NotificacionService.actualizar_notificacion(db, notificacion_id, notificacion_update)
+    return NotificacionService.actualizar_notificacion(db, notificacion_id, notificacion_update, current_user.id)
 
 @router.patch("/{notificacion_id}/leer", summary="Marcar como leída")
 def marcar_como_leida(
@@ -119,21 +101,75 @@ def marcar_como_leida(
     
     return {"message": "Notificación marcada como leída"}
 
-@router.patch("/bulk/leer", summary="Marcar múltiples como leídas")
+@router.patch("/bulk/leer", response_model=NotificacionBulkResultado, summary="Marcar múltiples como leídas")
 def marcar_multiples_como_leidas(
-    notificacion_ids: List[int],
+    seleccion: Union[List[int], NotificacionBulkAccion] = Body(...),
     db: Session = Depends(get_db),
     current_user=Depends(require_user)
 ):
     """
-    Marca múltiples notificaciones como leídas.
+    Marca múltiples notificaciones como leídas en un solo UPDATE.
+    Acepta una lista de IDs o una selección por IDs y/o filtros.
+    """
+    if isinstance(seleccion, list):
+        seleccion = NotificacionBulkAccion(notificacion_ids=seleccion)
+    try:
+        marcadas = NotificacionService.marcar_leidas_bulk(
+            db, current_user.id, seleccion.notificacion_ids, seleccion.filtros
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"message": f"{marcadas} notificaciones marcadas como leídas", "afectadas": marcadas}
+
+@router.patch("/leer-todas", response_model=NotificacionBulkResultado, summary="Marcar todas como leídas")
+def marcar_todas_como_leidas(
+    db: Session = Depends(get_db),
+    current_user=Depends(require_user)
+):
+    """
+    Marca como leídas todas las notificaciones del usuario (propias y globales).
+    """
+    marcadas = NotificacionService.marcar_todas_leidas(db, current_user.id)
+    
+    return {"message": f"{marcadas} notificaciones marcadas como leídas", "afectadas": marcadas}
+
+@router.patch("/bulk/archivar", response_model=NotificacionBulkResultado, summary="Archivar múltiples")
+def archivar_multiples(
+    seleccion: NotificacionBulkAccion,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_user)
+):
+    """
+    Archiva las notificaciones seleccionadas por IDs y/o filtros.
+    Las globales se archivan para todos, así que sólo las incluyen los administradores.
+    """
+    try:
+        archivadas = NotificacionService.archivar_bulk(
+            db, current_user.id, seleccion.notificacion_ids, seleccion.filtros,
+            incluir_globales=es_admin(current_user)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"message": f"{archivadas} notificaciones archivadas", "afectadas": archivadas}
+
+@router.post("/bulk/eliminar", response_model=NotificacionBulkResultado, summary="Eliminar múltiples")
+def eliminar_multiples(
+    seleccion: NotificacionBulkAccion,
+    db: Session = Depends(get_db),
+    _auth=Depends(require_admin)  # Solo admins pueden eliminar
+):
+    """
+    Elimina las notificaciones seleccionadas por IDs y/o filtros en un solo DELETE.
+    Solo usuarios administradores pueden eliminar notificaciones.
     """
-    marcadas = 0
-    for notificacion_id in notificacion_ids:
-        if NotificacionService.marcar_como_leida(db, notificacion_id, current_user.id):
-            marcadas += 1
+    try:
+        eliminadas = NotificacionService.eliminar_bulk(db, seleccion.notificacion_ids, seleccion.filtros)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return {"message": f"{marcadas} notificaciones marcadas como leídas"}
+    return {"message": f"{eliminadas} notificaciones eliminadas", "afectadas": eliminadas}
 
 @router.get("/resumen", response_model=NotificacionResumen, summary="Resumen de notificaciones")
 def obtener_resumen(
@@ -203,6 +239,54 @@ def obtener_urgentes(
         limit=limit
     )
 
+@router.get("/no-leidas/count", summary="Cantidad de notificaciones no leídas")
+def contar_no_leidas(
+    db: Session = Depends(get_db),
+    current_user=Depends(require_user)
+):
+    """
+    Cantidad de notificaciones no leídas del usuario (propias y globales).
+    Se lee de un contador mantenido en cada cambio, sin recorrer las notificaciones.
+    """
+    return {"no_leidas": NotificacionService.contar_no_leidas(db, current_user.id)}
+
+@router.get("/stream", summary="Eventos en tiempo real (SSE)")
+def stream_notificaciones(
+    last_event_id: Optional[str] = Header(None, description="Último evento recibido, para retomar"),
+    current_user=Depends(require_user)
+):
+    """
+    Canal Server-Sent Events con las notificaciones del usuario (propias y globales)
+    y las alertas de inventario nuevas, en lugar de consultar /pendientes periódicamente.
+    Al reconectar con Last-Event-ID se reenvía lo creado mientras tanto.
+    """
+    return StreamingResponse(
+        stream_eventos(current_user.id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/{notificacion_id}", response_model=NotificacionOut, summary="Obtener notificación")
+def obtener_notificacion(
+    notificacion_id: int,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_user)
+):
+    """
+    Obtiene una notificación específica por ID.
+    Solo se pueden acceder a notificaciones propias o globales.
+    """
+    notificacion = NotificacionService.obtener_notificacion(db, notificacion_id)
+    
+    if not notificacion:
+        raise HTTPException(status_code=404, detail="Notificación no encontrada")
+    
+    # Verificar acceso (global o del usuario)
+    if notificacion.usuario_id and notificacion.usuario_id != current_user.id:
+        raise HTTPException(status_code=403, detail="No tienes acceso a esta notificación")
+    
+    return notificacion
+
 @router.delete("/{notificacion_id}", summary="Eliminar notificación")
 def eliminar_notificacion(
     notificacion_id: int,
@@ -213,14 +297,9 @@ def eliminar_notificacion(
     Elimina una notificación del sistema.
     Solo usuarios administradores pueden eliminar notificaciones.
     """
-    notificacion = NotificacionService.obtener_notificacion(db, notificacion_id)
-    
-    if not notificacion:
+    if not NotificacionService.eliminar_notificacion(db, notificacion_id):
         raise HTTPException(status_code=404, detail="Notificación no encontrada")
     
-    db.delete(notificacion)
-    db.commit()
-    
     return {"message": "Notificación eliminada"}
 
 @router.post("/limpiar", summary="Limpiar notificaciones antiguas")
@@ -231,12 +310,26 @@ def limpiar_antiguas(
 ):
     """
     Limpia notificaciones antiguas del sistema.
-    Solo elimina notificaciones leídas y no urgentes.
+    Elimina las leídas y no urgentes; las globales, cuando ya las leyeron todos
+    los usuarios o superan la retención de globales.
     """
     eliminadas = NotificacionService.limpiar_notificaciones_antiguas(db, dias)
     
     return {"message": f"{eliminadas} notificaciones eliminadas"}
 
+@router.post("/no-leidas/recalcular", summary="Recalcular contadores de no leídas")
+def recalcular_no_leidas(
+    db: Session = Depends(get_db),
+    _auth=Depends(require_admin)  # Solo admins pueden recalcular
+):
+    """
+    Reconstruye los contadores de no leídas desde la tabla de notificaciones.
+    Para corregirlos si se modificaron notificaciones por fuera de la aplicación.
+    """
+    usuarios = NotificacionService.recalcular_no_leidas(db)
+    
+    return {"message": f"Contadores recalculados para {usuarios} usuarios", "usuarios": usuarios}
+
 # Endpoints para notificaciones automáticas (solo para admins)
 @router.post("/stock-bajo", response_model=NotificacionOut, summary="Crear notificación de stock bajo")
 def crear_notificacion_stock_bajo(
@@ -1,18 +1,123 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from pydantic.config import ConfigDict
 from app.db.database import get_db
-from app.services.stock_service import stock_actual
+from app.core.deps import require_admin, require_user
+from app.models.deposito_model import Deposito
+from app.services.stock_service import (
+    stock_actual, verificar_consistencia, reconstruir_saldos,
+    stock_por_deposito, stock_deposito, transferir,
+)
 
 class StockOut(BaseModel):
     producto_id: int
     stock: float
     model_config = ConfigDict(from_attributes=True)
 
+class StockDiferenciaOut(BaseModel):
+    producto_id: int
+    deposito_id: Optional[int] = None  # None: saldo total del producto
+    saldo: float
+    ledger: float
+    diferencia: float
+
+class DepositoIn(BaseModel):
+    nombre: str
+    direccion: Optional[str] = None
+
+class DepositoOut(BaseModel):
+    id: int
+    nombre: str
+    direccion: Optional[str] = None
+    activo: bool
+    model_config = ConfigDict(from_attributes=True)
+
+class StockDepositoOut(BaseModel):
+    deposito_id: int
+    producto_id: int
+    cantidad: float
+    model_config = ConfigDict(from_attributes=True)
+
+class TransferenciaIn(BaseModel):
+    producto_id: int
+    deposito_origen_id: int
+    deposito_destino_id: int
+    cantidad: float = Field(..., gt=0)
+    motivo: Optional[str] = None
+
+class TransferenciaOut(BaseModel):
+    producto_id: int
+    deposito_origen_id: int
+    deposito_destino_id: int
+    cantidad: float
+    stock_origen: float
+    stock_destino: float
+    stock_total: float
+
 router = APIRouter(prefix="/stock", tags=["Stock"])
 
+@router.get("/depositos", response_model=list[DepositoOut])
+def get_depositos(db: Session = Depends(get_db)):
+    return db.query(Deposito).order_by(Deposito.id).all()
+
+@router.post("/depositos", response_model=DepositoOut, status_code=status.HTTP_201_CREATED)
+def post_deposito(data: DepositoIn, db: Session = Depends(get_db), current_user=Depends(require_admin)):
+    if db.query(Deposito.id).filter(Deposito.nombre == data.nombre).first():
+        raise HTTPException(status_code=400, detail="Ya existe un depósito con ese nombre")
+    deposito = Deposito(nombre=data.nombre, direccion=data.direccion, activo=True)
+    db.add(deposito)
+    db.commit()
+    db.refresh(deposito)
+    return deposito
+
+@router.get("/depositos/{deposito_id}", response_model=list[StockDepositoOut])
+def get_stock_deposito(deposito_id: int, db: Session = Depends(get_db)):
+    """Saldos de todos los productos de un depósito"""
+    return stock_deposito(db, deposito_id)
+
+@router.get("/depositos/{deposito_id}/{producto_id}", response_model=StockDepositoOut)
+def get_stock_producto_deposito(deposito_id: int, producto_id: int, db: Session = Depends(get_db)):
+    s = stock_actual(db, producto_id, deposito_id)
+    return StockDepositoOut(deposito_id=deposito_id, producto_id=producto_id, cantidad=s)
+
+@router.post("/transferencias", response_model=TransferenciaOut, status_code=status.HTTP_201_CREATED)
+def post_transferencia(data: TransferenciaIn, db: Session = Depends(get_db), current_user=Depends(require_user)):
+    """Transfiere stock entre depósitos (movimientos OUT/IN en una sola transacción)"""
+    try:
+        saldos = transferir(
+            db, data.producto_id, data.deposito_origen_id, data.deposito_destino_id, data.cantidad, data.motivo
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return TransferenciaOut(
+        producto_id=data.producto_id,
+        deposito_origen_id=data.deposito_origen_id,
+        deposito_destino_id=data.deposito_destino_id,
+        cantidad=data.cantidad,
+        stock_origen=stock_actual(db, data.producto_id, data.deposito_origen_id),
+        stock_destino=saldos.deposito,
+        stock_total=saldos.total,
+    )
+
+@router.get("/consistencia", response_model=list[StockDiferenciaOut])
+def get_consistencia(db: Session = Depends(get_db), current_user=Depends(require_admin)):
+    """Saldos denormalizados (totales y por depósito) que no coinciden con el ledger"""
+    return verificar_consistencia(db)
+
+@router.post("/consistencia/reconstruir")
+def post_reconstruir(db: Session = Depends(get_db), current_user=Depends(require_admin)):
+    """Recalcula desde el ledger los saldos inconsistentes"""
+    corregidos = reconstruir_saldos(db)
+    return {"message": f"Saldos corregidos: {corregidos}", "corregidos": corregidos}
+
 @router.get("/{producto_id}", response_model=StockOut)
 def get_stock(producto_id: int, db: Session = Depends(get_db)):
     s = stock_actual(db, producto_id)
     return StockOut(producto_id=producto_id, stock=s)
+
+@router.get("/{producto_id}/depositos", response_model=list[StockDepositoOut])
+def get_stock_por_deposito(producto_id: int, db: Session = Depends(get_db)):
+    """Saldo del producto en cada depósito"""
+    return stock_por_deposito(db, producto_id)
@@ -1,4 +1,4 @@
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, List
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from app.models.auditoria import AuditAction  # fuente única del enum
@@ -20,3 +20,9 @@ class AuditLogOut(BaseModel):
     details: Optional[Dict[str, Any]] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+class AuditLogPagina(BaseModel):
+    """Página de audit_logs; next_cursor es None en la última"""
+    items: List[AuditLogOut]
+    next_cursor: Optional[str] = None
+    limit: int
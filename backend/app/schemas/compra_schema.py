@@ -13,6 +13,7 @@ class CompraCreate(BaseModel):
     proveedor_id: int
     items: List[CompraItemIn]
     fecha: Optional[datetime] = None  # opcional, por si querés setearla
+    deposito_id: Optional[int] = None  # sin depósito se usa el depósito por defecto
 
 class CompraItemOut(BaseModel):
     id: int
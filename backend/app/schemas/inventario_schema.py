@@ -1,7 +1,7 @@
 # app/schemas/inventario_schema.py
 from pydantic import BaseModel, Field, validator
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import datetime, date
 from app.models.inventario_model import TipoAlertaInventario, EstadoAlerta
 
 class ConfiguracionInventarioBase(BaseModel):
@@ -17,6 +17,7 @@ class ConfiguracionInventarioBase(BaseModel):
     dias_vencimiento_alerta: int = Field(30, ge=1, le=365, description="Días antes del vencimiento para alertar")
     alerta_movimiento_grande: bool = Field(True, description="Activar alerta de movimientos grandes")
     umbral_movimiento_grande: Optional[float] = Field(None, ge=0, le=100, description="Umbral de cambio para alertar (%)")
+    usar_clasificacion: bool = Field(False, description="Ajustar umbrales según la clasificación ABC/XYZ")
 
     @validator('stock_maximo')
     def validar_stock_maximo(cls, v, values):
@@ -46,6 +47,7 @@ class ConfiguracionInventarioUpdate(BaseModel):
     dias_vencimiento_alerta: Optional[int] = Field(None, ge=1, le=365)
     alerta_movimiento_grande: Optional[bool] = None
     umbral_movimiento_grande: Optional[float] = Field(None, ge=0, le=100)
+    usar_clasificacion: Optional[bool] = None
     activo: Optional[bool] = None
 
 class ConfiguracionInventarioOut(ConfiguracionInventarioBase):
@@ -179,3 +181,33 @@ class InventarioEstadisticas(BaseModel):
     tendencia_stock: List[Dict[str, Any]]
     alertas_resueltas_mes: int
     tiempo_promedio_resolucion: float  # En horas
+
+class ValorizacionInventarioOut(BaseModel):
+    """Valor actual del inventario"""
+    productos: int
+    cantidad: float
+    valor_fifo: float
+    valor_promedio: float
+
+class CostoVentasOut(BaseModel):
+    """Costo de la mercadería vendida en un período"""
+    desde: date
+    hasta: date
+    cantidad: float
+    cogs_fifo: float
+    cogs_promedio: float
+
+class ProductoClasificacionOut(BaseModel):
+    """Clasificación ABC/XYZ de un producto"""
+    producto_id: int
+    clase_abc: str
+    clase_xyz: str
+    ingresos: float
+    participacion_acumulada: float
+    demanda_semanal_media: float
+    coeficiente_variacion: Optional[float] = None
+    semanas: int
+    fecha_calculo: datetime
+    
+    class Config:
+        from_attributes = True
@@ -1,7 +1,8 @@
 # app/schemas/notificacion_schema.py
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Optional, Dict, Any, List
 from datetime import datetime
+import json
 from app.models.notificacion_model import TipoNotificacion, EstadoNotificacion
 
 class NotificacionBase(BaseModel):
@@ -35,6 +36,12 @@ class NotificacionOut(NotificacionBase):
     fecha_envio: Optional[datetime] = None
     fecha_lectura: Optional[datetime] = None
     
+    @field_validator("datos_adicionales", mode="before")
+    @classmethod
+    def parsear_datos_adicionales(cls, valor):
+        # En la tabla se guardan como texto JSON
+        return json.loads(valor) if isinstance(valor, str) else valor
+    
     class Config:
         from_attributes = True
 
@@ -61,6 +68,25 @@ class NotificacionBulkUpdate(BaseModel):
     estado: EstadoNotificacion = Field(..., description="Nuevo estado")
     fecha_lectura: Optional[datetime] = Field(None, description="Fecha de lectura")
 
+class NotificacionBulkAccion(BaseModel):
+    """Selección para operaciones masivas: por lista de IDs y/o por filtros"""
+    notificacion_ids: Optional[List[int]] = Field(None, description="IDs de notificaciones")
+    filtros: Optional[NotificacionFiltros] = Field(None, description="Filtros a aplicar")
+    
+    @model_validator(mode="after")
+    def validar_seleccion(self):
+        if self.notificacion_ids is None and self.filtros is None:
+            raise ValueError("Indicar notificacion_ids o filtros")
+        # `{"filtros": {}}` no selecciona nada: sería toda la tabla
+        if self.filtros is not None and all(v is None for v in self.filtros.model_dump().values()):
+            raise ValueError("filtros debe indicar al menos un campo")
+        return self
+
+class NotificacionBulkResultado(BaseModel):
+    """Resultado de una operación masiva"""
+    message: str
+    afectadas: int = Field(..., description="Cantidad de notificaciones afectadas")
+
 class NotificacionStats(BaseModel):
     """Estadísticas de notificaciones"""
     total_notificaciones: int
@@ -13,6 +13,7 @@ class VentaCreate(BaseModel):
     cliente_id: Optional[int] = None
     items: List[VentaItemIn]
     fecha: Optional[datetime] = None
+    deposito_id: Optional[int] = None  # sin depósito se usa el depósito por defecto
 
 class VentaItemOut(BaseModel):
     id: int
@@ -27,5 +28,6 @@ class VentaOut(BaseModel):
     cliente_id: Optional[int] = None
     fecha: datetime
     total: float
+    deposito_id: Optional[int] = None
     items: List[VentaItemOut]
     model_config = ConfigDict(from_attributes=True)
@@ -1,8 +1,19 @@
 # backend/app/services/auditoria_service.py
-from typing import Any, Dict, Optional
+import json
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy import insert, tuple_
 from sqlalchemy.orm import Session
 from fastapi import Request
 
+from app.core.audit_writer import AuditWriter
+from app.core.settings import settings
+from app.db.buckets import inicio_bucket, sumar_buckets
+from app.db.database import engine
+from app.db.keyset import codificar_cursor, decodificar_cursor
+from app.db.particiones import (
+    TABLAS_PARTICIONADAS, crear_particiones, eliminar_particiones_anteriores, es_particionada
+)
 from app.models.auditoria import AuditLog, AuditAction
 
 def create_audit_log(
@@ -34,6 +45,159 @@ def create_audit_log(
     db.refresh(log)
     return log
 
+def _escribir_lote(filas: List[Dict[str, Any]]) -> None:
+    """Inserta un lote de auditoría en una sola transacción, con conexión propia"""
+    with engine.begin() as conn:
+        conn.execute(insert(AuditLog.__table__), filas)
+
+# Escritor en segundo plano compartido por todo el proceso
+audit_writer = AuditWriter(
+    _escribir_lote,
+    max_cola=settings.AUDIT_COLA_MAXIMA,
+    lote=settings.AUDIT_LOTE,
+    intervalo_ms=settings.AUDIT_INTERVALO_MS,
+    politica=settings.AUDIT_POLITICA_COLA_LLENA,
+    bloqueo_ms=settings.AUDIT_BLOQUEO_MS,
+)
+
+def enqueue_audit_log(
+    db: Session,
+    *,
+    user_id: Optional[int],
+    username: Optional[str],
+    table_name: str,
+    action: AuditAction,
+    record_id: Optional[str] = None,
+    details: Optional[Dict[str, Any]] = None,
+    path: Optional[str] = None,
+    method: Optional[str] = None,
+    ip: Optional[str] = None,
+) -> bool:
+    """
+    Registra la auditoría sin esperar a la base: la fila se encola y la escribe el
+    audit_writer en lote. Con AUDIT_ASINCRONICO=False se escribe en el momento con `db`.
+    Devuelve False si se descartó por cola llena.
+    """
+    if not settings.AUDIT_ASINCRONICO:
+        create_audit_log(
+            db, user_id=user_id, username=username, table_name=table_name, action=action,
+            record_id=record_id, details=details, path=path, method=method, ip=ip,
+        )
+        return True
+    return audit_writer.encolar(_fila(
+        user_id=user_id, username=username, table_name=table_name, action=action,
+        record_id=record_id, details=details, path=path, method=method, ip=ip,
+    ))
+
+def _fila(
+    *,
+    table_name: str,
+    action: AuditAction,
+    user_id: Optional[int] = None,
+    username: Optional[str] = None,
+    record_id: Optional[str] = None,
+    details: Optional[Dict[str, Any]] = None,
+    path: Optional[str] = None,
+    method: Optional[str] = None,
+    ip: Optional[str] = None,
+) -> Dict[str, Any]:
+    return {
+        # La hora del hecho, no la de la escritura del lote
+        "created_at": datetime.now(timezone.utc),
+        "user_id": user_id,
+        "username": username,
+        "table_name": table_name,
+        "action": action,
+        "record_id": record_id,
+        # Se serializa ahora: el objeto puede cambiar antes de que se escriba el lote
+        "details": None if details is None else json.loads(json.dumps(details, default=str)),
+        "path": path,
+        "method": method,
+        "ip": ip,
+    }
+
+def enqueue_audit_rows(registros: List[Dict[str, Any]]) -> int:
+    """
+    Registra varios eventos ya armados (los de la auditoría automática del ORM, ver
+    app/core/audit_orm.py). No usa la sesión del request: con AUDIT_ASINCRONICO=False
+    se escriben en el momento con conexión propia. Devuelve cuántos se aceptaron.
+    """
+    filas = [_fila(**registro) for registro in registros]
+    if not settings.AUDIT_ASINCRONICO:
+        _escribir_lote(filas)
+        return len(filas)
+    return sum(1 for fila in filas if audit_writer.encolar(fila))
+
+def mantener_particiones_auditoria(tablas: Optional[List[str]] = None) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Job de particiones de auditoría: crea las de los próximos AUDIT_PARTICIONES_ADELANTE
+    meses y borra las anteriores a AUDIT_RETENCION_MESES. Ignora tablas no particionadas
+    (p. ej. antes de aplicar la migración, o fuera de PostgreSQL).
+    """
+    mes_actual = inicio_bucket("month", date.today())
+    resultado = {}
+    with engine.begin() as conn:
+        for tabla in tablas or list(TABLAS_PARTICIONADAS):
+            if not es_particionada(conn, tabla):
+                continue
+            creadas = crear_particiones(
+                conn, tabla, mes_actual, sumar_buckets("month", mes_actual, settings.AUDIT_PARTICIONES_ADELANTE)
+            )
+            eliminadas = []
+            if settings.AUDIT_RETENCION_MESES > 0:
+                eliminadas = eliminar_particiones_anteriores(
+                    conn, tabla, sumar_buckets("month", mes_actual, -settings.AUDIT_RETENCION_MESES)
+                )
+            resultado[tabla] = {"creadas": creadas, "eliminadas": eliminadas}
+    return resultado
+
+def buscar_audit_logs(
+    db: Session,
+    *,
+    username: Optional[str] = None,
+    action: Optional[AuditAction] = None,
+    table_name: Optional[str] = None,
+    record_id: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    clave: Optional[str] = None,
+    contiene: Optional[Dict[str, Any]] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> Dict[str, Any]:
+    """
+    Página de audit_logs, más recientes primero, con paginación por cursor sobre
+    (created_at, id): cada página es un rango del índice, no importa qué tan profunda.
+    `clave` / `contiene` buscan en details con ? y @> (índice GIN).
+    Lanza ValueError si el cursor no es válido.
+    """
+    query = db.query(AuditLog)
+    if username:
+        query = query.filter(AuditLog.username == username)
+    if action:
+        query = query.filter(AuditLog.action == action)
+    if table_name:
+        query = query.filter(AuditLog.table_name == table_name)
+    if record_id:
+        query = query.filter(AuditLog.record_id == record_id)
+    if desde:
+        query = query.filter(AuditLog.created_at >= desde)
+    if hasta:
+        query = query.filter(AuditLog.created_at < hasta)
+    if clave:
+        query = query.filter(AuditLog.details.has_key(clave))
+    if contiene:
+        query = query.filter(AuditLog.details.contains(contiene))
+    if cursor:
+        ts, id_ = decodificar_cursor(cursor)
+        query = query.filter(tuple_(AuditLog.created_at, AuditLog.id) < tuple_(ts, id_))
+    
+    # Una fila de más para saber si hay página siguiente
+    filas = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit + 1).all()
+    items = filas[:limit]
+    siguiente = codificar_cursor(items[-1].created_at, items[-1].id) if len(filas) > limit else None
+    return {"items": items, "next_cursor": siguiente, "limit": limit}
+
 # --- Helpers cómodos para routers ---
 
 def _to_dict(obj: Any) -> Dict[str, Any]:
@@ -69,14 +233,14 @@ def log_action(
     before: Any = None,
     after: Any = None,
     extra: Optional[Dict[str, Any]] = None,
-) -> AuditLog:
+) -> bool:
     details: Dict[str, Any] = {
         "before": _to_dict(before),
         "after": _to_dict(after),
     }
     if extra:
         details["extra"] = extra
-    return create_audit_log(
+    return enqueue_audit_log(
         db,
         user_id=getattr(user, "id", None),
         username=getattr(user, "username", None),
@@ -4,13 +4,13 @@ import io
 import os
 import zipfile
 from datetime import datetime, timezone
-from typing import Iterable, Optional
+from typing import Iterable, Optional, Sequence
 
 from sqlalchemy import inspect, text
-from sqlalchemy.orm import Session
+from sqlalchemy.engine import Connection
 
 from app.core.settings import settings
-from app.db.database import SessionLocal, engine
+from app.db.database import engine
 
 BACKUP_DIR = settings.BACKUP_DIR
 os.makedirs(BACKUP_DIR, exist_ok=True)
@@ -20,40 +20,52 @@ TABLES = [
     "stock", "compras", "ventas", "auditoria"
 ]
 
-def _fetch_all_as_dicts(db: Session, table: str) -> tuple[list[str], list[dict]]:
-    cols = [c["column_name"] for c in db.execute(text(
-        "SELECT column_name FROM information_schema.columns WHERE table_name=:t ORDER BY ordinal_position"
-    ), {"t": table}).mappings().all()]
-    if not cols:
-        return [], []
-    rows = db.execute(text(f"SELECT * FROM {table}")).mappings().all()
-    return cols, [dict(r) for r in rows]
+def _columnas(inspector, table: str) -> list[str]:
+    return [c["name"] for c in inspector.get_columns(table)]
 
-def _write_csv(cols: list[str], rows: Iterable[dict]) -> bytes:
-    buf = io.StringIO()
-    w = csv.writer(buf)
-    w.writerow(cols)
-    for r in rows:
-        w.writerow([r.get(c) for c in cols])
-    return buf.getvalue().encode("utf-8")
+def _write_csv(zf: zipfile.ZipFile, nombre: str, cols: list[str], lotes: Iterable[Sequence]) -> None:
+    """
+    Escribe el CSV directo en la entrada del ZIP, lote por lote: la memoria no
+    depende del tamaño de la tabla.
+    """
+    with zf.open(nombre, "w", force_zip64=True) as raw, \
+            io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(cols)
+        for filas in lotes:
+            w.writerows(filas)
+
+def _export_table(conn: Connection, zf: zipfile.ZipFile, table: str, cols: list[str], lote: int) -> None:
+    """Exporta una tabla leyéndola con un cursor del lado del servidor (yield_per)"""
+    select = ", ".join(f'"{c}"' for c in cols)
+    result = conn.execution_options(yield_per=lote).execute(text(f'SELECT {select} FROM "{table}"'))
+    _write_csv(zf, f"{table}.csv", cols, result.partitions())
 
 def create_backup_zip() -> str:
     """
-    Crea un ZIP en BACKUP_DIR exportando tablas existentes.
-    Auto-gestiona la sesión para poder usarse desde el scheduler.
+    Crea un ZIP en BACKUP_DIR exportando tablas existentes, de a BACKUP_LOTE_FILAS filas.
+    Se escribe en un .part y se renombra al terminar: un backup a medias nunca
+    queda como el último. Usa su propia conexión para poder usarse desde el scheduler.
     """
     ts = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
     zip_path = os.path.join(BACKUP_DIR, f"backup-{ts}.zip")
+    parcial = f"{zip_path}.part"
 
     inspector = inspect(engine)
     existing = set(inspector.get_table_names())
 
-    with SessionLocal() as db, zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
-        for t in TABLES:
-            if t in existing:
-                cols, rows = _fetch_all_as_dicts(db, t)
-                if cols:
-                    zf.writestr(f"{t}.csv", _write_csv(cols, rows))
+    try:
+        with engine.connect() as conn, zipfile.ZipFile(parcial, "w", zipfile.ZIP_DEFLATED) as zf:
+            for t in TABLES:
+                if t in existing:
+                    cols = _columnas(inspector, t)
+                    if cols:
+                        _export_table(conn, zf, t, cols, settings.BACKUP_LOTE_FILAS)
+        os.replace(parcial, zip_path)
+    except BaseException:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+        raise
 
     return zip_path
 
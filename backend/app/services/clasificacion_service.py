@@ -0,0 +1,159 @@
+# app/services/clasificacion_service.py
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case
+from datetime import datetime
+from typing import List, Optional, Dict, Any
+
+import numpy as np
+
+from app.core.settings import settings
+from app.db.buckets import fecha_bucket, rango_buckets
+from app.db.database import SessionLocal
+from app.db.upsert import dialect_insert
+from app.models.inventario_model import ProductoClasificacion
+from app.models.producto_model import Producto
+from app.models.venta_model import Venta, VentaItem
+
+# Ajustes de umbrales para configuraciones con usar_clasificacion
+FACTOR_STOCK_ABC = {"A": 1.5, "B": 1.0, "C": 0.75}  # Más cobertura para lo que más factura
+FACTOR_STOCK_XYZ = {"X": 1.0, "Y": 1.25, "Z": 1.5}  # Más cobertura cuanto más errática la demanda
+Z_SERVICIO_ABC = {"A": 2.05, "B": 1.65, "C": 1.28}  # Nivel de servicio ~98% / 95% / 90%
+
+class ClasificacionService:
+    """Servicio de clasificación ABC (facturación) / XYZ (variabilidad de demanda)"""
+    
+    @staticmethod
+    def factor_stock_minimo():
+        """Expresión SQL: multiplicador del stock mínimo según la clase ABC/XYZ (1.0 sin clasificar)"""
+        return case(
+            *[(ProductoClasificacion.clase_abc == clase, factor) for clase, factor in FACTOR_STOCK_ABC.items()],
+            else_=1.0
+        ) * case(
+            *[(ProductoClasificacion.clase_xyz == clase, factor) for clase, factor in FACTOR_STOCK_XYZ.items()],
+            else_=1.0
+        )
+    
+    @staticmethod
+    def calcular_clasificacion(db: Session) -> Dict[str, Any]:
+        """
+        Clasifica todos los productos:
+        - ABC por participación acumulada en los ingresos de la ventana
+        - XYZ por coeficiente de variación de la cantidad vendida por semana
+        Lee las ventas con una sola consulta agrupada por (producto, semana) y guarda
+        el resultado con un upsert masivo en producto_clasificacion.
+        """
+        ahora = datetime.utcnow()
+        semanas = settings.CLASIFICACION_VENTANA_SEMANAS
+        inicio = rango_buckets("week", semanas, ahora)[0]  # lunes de la primera semana
+        
+        producto_ids = np.array(sorted(pid for (pid,) in db.query(Producto.id).all()), dtype=int)
+        if len(producto_ids) == 0:
+            return {"productos": 0, "abc": {}, "xyz": {}}
+        
+        semana = fecha_bucket("week", Venta.fecha)
+        filas = db.query(
+            VentaItem.producto_id,
+            semana.label("semana"),
+            func.sum(VentaItem.cantidad).label("cantidad"),
+            func.sum(VentaItem.subtotal).label("ingresos")
+        ).join(Venta, Venta.id == VentaItem.venta_id)\
+         .filter(Venta.fecha >= inicio)\
+         .group_by(VentaItem.producto_id, semana).all()
+        
+        cantidades = np.zeros((len(producto_ids), semanas))
+        ingresos = np.zeros(len(producto_ids))
+        if filas:
+            idx = np.searchsorted(producto_ids, np.array([f.producto_id for f in filas]))
+            offsets = np.array([(f.semana - inicio).days // 7 for f in filas])
+            validos = (offsets >= 0) & (offsets < semanas)
+            np.add.at(cantidades, (idx[validos], offsets[validos]), np.array([float(f.cantidad) for f in filas])[validos])
+            np.add.at(ingresos, idx, np.array([float(f.ingresos) for f in filas]))
+        
+        # ABC: participación acumulada ordenando por ingresos (la que cruza el corte queda adentro)
+        orden = np.argsort(-ingresos, kind="stable")
+        total = ingresos.sum()
+        participacion = ingresos[orden] / total if total > 0 else np.zeros(len(orden))
+        acumulada = np.cumsum(participacion)
+        previa = acumulada - participacion
+        abc_ordenado = np.where(
+            ingresos[orden] <= 0, "C",
+            np.where(previa < settings.CLASIFICACION_CORTE_A, "A",
+                     np.where(previa < settings.CLASIFICACION_CORTE_B, "B", "C"))
+        )
+        clase_abc = np.empty(len(producto_ids), dtype="<U1")
+        clase_abc[orden] = abc_ordenado
+        participacion_acumulada = np.empty(len(producto_ids))
+        participacion_acumulada[orden] = acumulada
+        
+        # XYZ: coeficiente de variación semanal (sin ventas = Z)
+        media = cantidades.mean(axis=1)
+        desvio = cantidades.std(axis=1)
+        cv = np.divide(desvio, media, out=np.full(len(producto_ids), np.nan), where=media > 0)
+        clase_xyz = np.where(
+            np.isnan(cv), "Z",
+            np.where(cv <= settings.CLASIFICACION_CV_X, "X",
+                     np.where(cv <= settings.CLASIFICACION_CV_Y, "Y", "Z"))
+        )
+        
+        filas_clasificacion = [
+            {
+                "producto_id": int(producto_ids[i]),
+                "clase_abc": str(clase_abc[i]),
+                "clase_xyz": str(clase_xyz[i]),
+                "ingresos": round(float(ingresos[i]), 2),
+                "participacion_acumulada": round(float(participacion_acumulada[i]), 6),
+                "demanda_semanal_media": round(float(media[i]), 4),
+                "coeficiente_variacion": None if np.isnan(cv[i]) else round(float(cv[i]), 4),
+                "semanas": semanas,
+                "fecha_calculo": ahora,
+            }
+            for i in range(len(producto_ids))
+        ]
+        
+        stmt = dialect_insert(db, ProductoClasificacion)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ProductoClasificacion.producto_id],
+                set_={
+                    columna: getattr(stmt.excluded, columna)
+                    for columna in (
+                        "clase_abc", "clase_xyz", "ingresos", "participacion_acumulada",
+                        "demanda_semanal_media", "coeficiente_variacion", "semanas", "fecha_calculo"
+                    )
+                }
+            ),
+            filas_clasificacion
+        )
+        db.commit()
+        
+        clases_abc, conteo_abc = np.unique(clase_abc, return_counts=True)
+        clases_xyz, conteo_xyz = np.unique(clase_xyz, return_counts=True)
+        return {
+            "productos": len(producto_ids),
+            "abc": {str(c): int(n) for c, n in zip(clases_abc, conteo_abc)},
+            "xyz": {str(c): int(n) for c, n in zip(clases_xyz, conteo_xyz)},
+        }
+    
+    @staticmethod
+    def obtener_clasificaciones(
+        db: Session,
+        clase_abc: Optional[str] = None,
+        clase_xyz: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[ProductoClasificacion]:
+        """Lista clasificaciones, de mayor a menor facturación"""
+        query = db.query(ProductoClasificacion)
+        if clase_abc:
+            query = query.filter(ProductoClasificacion.clase_abc == clase_abc.upper())
+        if clase_xyz:
+            query = query.filter(ProductoClasificacion.clase_xyz == clase_xyz.upper())
+        return query.order_by(
+            ProductoClasificacion.ingresos.desc(), ProductoClasificacion.producto_id
+        ).offset(skip).limit(limit).all()
+
+
+def clasificar_productos_programado() -> Dict[str, Any]:
+    """Job del scheduler: clasificación ABC/XYZ con su propia sesión"""
+    with SessionLocal() as db:
+        return ClasificacionService.calcular_clasificacion(db)
@@ -1,10 +1,11 @@
 # app/services/compra_service.py
 from sqlalchemy.orm import Session
-from app.models.compra_model import Compra, CompraItem, StockMovimiento
+from app.models.compra_model import Compra, CompraItem
 from app.models.producto_model import Producto
 from app.models.proveedor_model import Proveedor
 from app.schemas.compra_schema import CompraCreate
-from app.services.stock_service import stock_actual  # centralizamos el cálculo
+from app.services.stock_service import stock_actual, registrar_movimiento, validar_deposito  # centralizamos el cálculo
+from app.services import costo_service
 
 def _producto_existe(db: Session, producto_id: int) -> bool:
     return db.query(Producto.id).filter(Producto.id == producto_id).first() is not None
@@ -20,6 +21,9 @@ def crear_compra(db: Session, data: CompraCreate) -> Compra:
     if not data.items:
         raise ValueError("Se requiere al menos un item")
 
+    if data.deposito_id is not None:
+        validar_deposito(db, data.deposito_id)
+
     for it in data.items:
         if not _producto_existe(db, it.producto_id):
             raise ValueError(f"Producto {it.producto_id} no existe")
@@ -49,14 +53,26 @@ def crear_compra(db: Session, data: CompraCreate) -> Compra:
             ))
 
             # Movimiento de stock (IN)
-            db.add(StockMovimiento(
+            registrar_movimiento(
+                db,
                 producto_id=it.producto_id,
                 tipo="IN",
                 cantidad=float(it.cantidad),
                 motivo="COMPRA",
                 ref_tipo="compra",
                 ref_id=compra.id,
-            ))
+                deposito_id=data.deposito_id,
+            )
+
+            # Capa FIFO + costo promedio
+            costo_service.registrar_entrada(
+                db,
+                producto_id=it.producto_id,
+                cantidad=float(it.cantidad),
+                costo_unitario=float(it.costo_unitario),
+                ref_tipo="compra",
+                ref_id=compra.id,
+            )
 
         compra.total = total
         db.commit()
@@ -0,0 +1,158 @@
+# app/services/costo_service.py
+from datetime import date, datetime
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.db.upsert import dialect_insert
+from app.models.costo_model import CapaCosto, CostoProducto, CostoVentaDiario
+
+# Remanentes menores se consideran capa agotada (errores de redondeo Float)
+EPSILON = 1e-9
+
+def _costo_producto(db: Session, producto_id: int) -> CostoProducto:
+    """Fila de valorización del producto bloqueada para esta transacción (se crea si no existe)"""
+    # La sesión no hace autoflush: sin esto populate_existing pisaría los cambios
+    # pendientes de una entrada/salida anterior en la misma transacción
+    db.flush()
+    db.execute(
+        dialect_insert(db, CostoProducto)
+        .values(producto_id=producto_id, cantidad=0, costo_promedio=0, valor_fifo=0)
+        .on_conflict_do_nothing()
+    )
+    return (
+        db.query(CostoProducto)
+        .filter(CostoProducto.producto_id == producto_id)
+        .with_for_update()
+        .populate_existing()
+        .one()
+    )
+
+def registrar_entrada(
+    db: Session,
+    producto_id: int,
+    cantidad: float,
+    costo_unitario: float | None = None,
+    ref_tipo: str | None = None,
+    ref_id: int | None = None,
+) -> CostoProducto:
+    """
+    Abre una capa FIFO y actualiza el costo promedio ponderado.
+    Sin costo_unitario la entrada se valoriza al promedio vigente. No hace commit.
+    """
+    costo = _costo_producto(db, producto_id)
+    cantidad = float(cantidad)
+    costo_unitario = float(costo.costo_promedio if costo_unitario is None else costo_unitario)
+
+    # Si había faltante (se vendió sin capas), la entrada lo cubre primero
+    faltante = max(-costo.cantidad, 0.0)
+    restante = max(cantidad - faltante, 0.0)
+    db.add(CapaCosto(
+        producto_id=producto_id,
+        cantidad_inicial=cantidad,
+        cantidad_restante=restante,
+        costo_unitario=costo_unitario,
+        ref_tipo=ref_tipo,
+        ref_id=ref_id,
+    ))
+
+    existente = max(costo.cantidad, 0.0)
+    if existente + restante > EPSILON:
+        costo.costo_promedio = (existente * costo.costo_promedio + restante * costo_unitario) / (existente + restante)
+    else:
+        costo.costo_promedio = costo_unitario
+    costo.cantidad += cantidad
+    costo.valor_fifo += restante * costo_unitario
+    return costo
+
+def registrar_salida(
+    db: Session,
+    producto_id: int,
+    cantidad: float,
+    es_venta: bool = True,
+    dia: date | None = None,
+) -> tuple[float, float]:
+    """
+    Consume capas FIFO desde la más antigua y devuelve (costo_fifo, costo_promedio) de la salida.
+    Lo que no cubren las capas se valoriza al promedio. Las ventas acumulan el costo
+    en costo_ventas_diario. No hace commit.
+    """
+    costo = _costo_producto(db, producto_id)
+    cantidad = float(cantidad)
+
+    pendiente = cantidad
+    valor_capas = 0.0
+    capas = (
+        db.query(CapaCosto)
+        .filter(CapaCosto.producto_id == producto_id, CapaCosto.cantidad_restante > 0)
+        .order_by(CapaCosto.id)
+        .with_for_update()
+    )
+    for capa in capas:
+        tomado = min(capa.cantidad_restante, pendiente)
+        capa.cantidad_restante = capa.cantidad_restante - tomado
+        if capa.cantidad_restante < EPSILON:
+            capa.cantidad_restante = 0.0
+        valor_capas += tomado * capa.costo_unitario
+        pendiente -= tomado
+        if pendiente < EPSILON:
+            break
+
+    cogs_fifo = valor_capas + max(pendiente, 0.0) * costo.costo_promedio
+    cogs_promedio = cantidad * costo.costo_promedio
+
+    costo.cantidad -= cantidad
+    costo.valor_fifo = max(costo.valor_fifo - valor_capas, 0.0)
+
+    if es_venta:
+        stmt = dialect_insert(db, CostoVentaDiario).values(
+            producto_id=producto_id,
+            dia=dia or datetime.utcnow().date(),
+            cantidad=cantidad,
+            cogs_fifo=cogs_fifo,
+            cogs_promedio=cogs_promedio,
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[CostoVentaDiario.producto_id, CostoVentaDiario.dia],
+            set_={
+                "cantidad": CostoVentaDiario.cantidad + stmt.excluded.cantidad,
+                "cogs_fifo": CostoVentaDiario.cogs_fifo + stmt.excluded.cogs_fifo,
+                "cogs_promedio": CostoVentaDiario.cogs_promedio + stmt.excluded.cogs_promedio,
+            },
+        ))
+
+    return cogs_fifo, cogs_promedio
+
+def valor_inventario(db: Session, producto_id: int | None = None) -> dict:
+    """Valor actual del inventario (FIFO y promedio ponderado) leído del estado por producto"""
+    query = db.query(
+        func.count(CostoProducto.producto_id),
+        func.coalesce(func.sum(CostoProducto.cantidad), 0.0),
+        func.coalesce(func.sum(CostoProducto.valor_fifo), 0.0),
+        func.coalesce(func.sum(CostoProducto.cantidad * CostoProducto.costo_promedio), 0.0),
+    )
+    if producto_id is not None:
+        query = query.filter(CostoProducto.producto_id == producto_id)
+    productos, cantidad, fifo, promedio = query.one()
+    return {
+        "productos": int(productos),
+        "cantidad": round(float(cantidad), 4),
+        "valor_fifo": round(float(fifo), 2),
+        "valor_promedio": round(float(promedio), 2),
+    }
+
+def costo_ventas(db: Session, desde: date, hasta: date, producto_id: int | None = None) -> dict:
+    """Costo de la mercadería vendida entre dos días (inclusive) desde el acumulado diario"""
+    query = db.query(
+        func.coalesce(func.sum(CostoVentaDiario.cantidad), 0.0),
+        func.coalesce(func.sum(CostoVentaDiario.cogs_fifo), 0.0),
+        func.coalesce(func.sum(CostoVentaDiario.cogs_promedio), 0.0),
+    ).filter(CostoVentaDiario.dia >= desde, CostoVentaDiario.dia <= hasta)
+    if producto_id is not None:
+        query = query.filter(CostoVentaDiario.producto_id == producto_id)
+    cantidad, fifo, promedio = query.one()
+    return {
+        "desde": desde,
+        "hasta": hasta,
+        "cantidad": round(float(cantidad), 4),
+        "cogs_fifo": round(float(fifo), 2),
+        "cogs_promedio": round(float(promedio), 2),
+    }
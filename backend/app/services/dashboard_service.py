@@ -1,45 +1,68 @@
 # app/services/dashboard_service.py
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, and_, or_
+from sqlalchemy import func, desc, and_, or_, distinct
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Tuple
 from decimal import Decimal
+import threading
+import time
 
-from app.models.venta_model import Venta, VentaItem
+from app.core.cache import crear_cache
+from app.core.settings import settings
+from app.db.buckets import fecha_bucket, rango_buckets
+from app.db.database import SessionLocal
+
+from app.models.venta_model import Venta, VentaItem, VentaDiaria, VentaProductoDiaria
 from app.models.producto_model import Producto
 from app.models.cliente_model import Cliente
-from app.models.compra_model import StockMovimiento
+from app.models.compra_model import StockSaldo
 from app.schemas.dashboard_schema import (
     VentasResumen, VentasPorPeriodo, ProductoMasVendido, 
     ClienteTop, StockBajoItem, MetricasRendimiento, 
     TendenciaVentas, DashboardCompleto
 )
 
+# Resultados de los endpoints del dashboard, por (endpoint, parámetros).
+# Se invalida al crear o eliminar ventas; el TTL acota lo demás (p. ej. stock por compras).
+dashboard_cache = crear_cache("dashboard", settings.DASHBOARD_CACHE_TTL_SEGUNDOS)
+
 class DashboardService:
     
     @staticmethod
     def get_ventas_resumen(db: Session, fecha_inicio: Optional[date] = None, fecha_fin: Optional[date] = None) -> VentasResumen:
-        """Obtiene resumen general de ventas"""
-        query = db.query(Venta)
+        """Obtiene resumen general de ventas (desde el acumulado diario)"""
+        query = db.query(VentaDiaria)
         
         if fecha_inicio:
-            query = query.filter(Venta.fecha >= fecha_inicio)
+            query = query.filter(VentaDiaria.fecha >= fecha_inicio)
         if fecha_fin:
-            query = query.filter(Venta.fecha <= fecha_fin)
+            query = query.filter(VentaDiaria.fecha <= fecha_fin)
         
-        # Estadísticas generales
-        total_ventas = query.count()
-        total_monto = query.with_entities(func.sum(Venta.total)).scalar() or 0.0
+        # Un solo SELECT: totales y "hoy" como agregados condicionales.
+        # "Hoy" es un rango [hoy, mañana) sobre la columna, así puede usar el índice.
+        hoy = date.today()
+        es_hoy = and_(VentaDiaria.fecha >= hoy, VentaDiaria.fecha < hoy + timedelta(days=1))
+        fila = query.with_entities(
+            func.sum(VentaDiaria.cantidad_ventas).label('cantidad'),
+            func.sum(VentaDiaria.monto_total).label('monto'),
+            func.max(VentaDiaria.venta_max).label('mayor'),
+            func.min(VentaDiaria.venta_min).label('menor'),
+            func.sum(VentaDiaria.cantidad_ventas).filter(es_hoy).label('cantidad_hoy'),
+            func.sum(VentaDiaria.monto_total).filter(es_hoy).label('monto_hoy')
+        ).one()
+        
+        total_ventas = fila.cantidad or 0
+        total_monto = fila.monto or 0.0
         promedio_venta = total_monto / total_ventas if total_ventas > 0 else 0.0
         
         # Venta mayor y menor
-        venta_mayor = query.with_entities(func.max(Venta.total)).scalar() or 0.0
-        venta_menor = query.with_entities(func.min(Venta.total)).scalar() or 0.0
+        venta_mayor = fila.mayor or 0.0
+        venta_menor = fila.menor or 0.0
         
         # Ventas de hoy
-        hoy = date.today()
-        ventas_hoy = query.filter(func.date(Venta.fecha) == hoy).count()
-        monto_hoy = query.filter(func.date(Venta.fecha) == hoy).with_entities(func.sum(Venta.total)).scalar() or 0.0
+        ventas_hoy = fila.cantidad_hoy or 0
+        monto_hoy = fila.monto_hoy or 0.0
         
         return VentasResumen(
             total_ventas=total_ventas,
@@ -53,61 +76,60 @@ class DashboardService:
     
     @staticmethod
     def get_ventas_por_periodo(db: Session, periodo: str = "dia", limite: int = 30) -> List[VentasPorPeriodo]:
-        """Obtiene ventas agrupadas por período"""
-        query = db.query(Venta)
+        """Obtiene ventas de los últimos `limite` períodos (desde el acumulado diario)"""
+        unidad, format_str = {
+            "dia": ("day", "%Y-%m-%d"),
+            "mes": ("month", "%Y-%m"),
+        }.get(periodo, ("week", "%Y-%U"))
         
-        if periodo == "dia":
-            # Últimos N días
-            fecha_inicio = date.today() - timedelta(days=limite-1)
-            query = query.filter(Venta.fecha >= fecha_inicio)
-            group_by = func.date(Venta.fecha)
-            format_str = "%Y-%m-%d"
-        elif periodo == "mes":
-            # Últimos N meses
-            fecha_inicio = date.today() - timedelta(days=limite*30)
-            query = query.filter(Venta.fecha >= fecha_inicio)
-            group_by = func.date_trunc('month', Venta.fecha)
-            format_str = "%Y-%m"
-        else:
-            # Semana
-            fecha_inicio = date.today() - timedelta(weeks=limite)
-            query = query.filter(Venta.fecha >= fecha_inicio)
-            group_by = func.date_trunc('week', Venta.fecha)
-            format_str = "%Y-%U"
-        
-        results = query.with_entities(
-            group_by.label('periodo'),
-            func.count(Venta.id).label('cantidad_ventas'),
-            func.sum(Venta.total).label('monto_total'),
-            func.avg(Venta.total).label('promedio')
-        ).group_by(group_by).order_by(group_by).all()
+        # Filtro por rango desde el inicio del primer período (usa el índice);
+        # la agrupación es portable entre PostgreSQL y SQLite
+        desde = rango_buckets(unidad, limite)[0]
+        bucket = fecha_bucket(unidad, VentaDiaria.fecha)
+        results = db.query(
+            bucket.label('periodo'),
+            func.sum(VentaDiaria.cantidad_ventas).label('cantidad_ventas'),
+            func.sum(VentaDiaria.monto_total).label('monto_total')
+        ).filter(VentaDiaria.fecha >= desde)\
+         .group_by(bucket).order_by(bucket).all()
         
         return [
             VentasPorPeriodo(
-                periodo=row.periodo.strftime(format_str) if hasattr(row.periodo, 'strftime') else str(row.periodo),
+                periodo=row.periodo.strftime(format_str),
                 cantidad_ventas=row.cantidad_ventas,
                 monto_total=round(row.monto_total or 0.0, 2),
-                promedio=round(row.promedio or 0.0, 2)
+                promedio=round((row.monto_total or 0.0) / row.cantidad_ventas, 2) if row.cantidad_ventas else 0.0
             )
             for row in results
         ]
     
     @staticmethod
-    def get_productos_mas_vendidos(db: Session, limite: int = 10) -> List[ProductoMasVendido]:
-        """Obtiene productos más vendidos (simplificado sin venta_items)"""
-        # Como no hay venta_items, retornamos productos con datos simulados
-        # En un sistema real, esto se implementaría con la tabla correcta
-        productos = db.query(Producto).limit(limite).all()
+    def get_productos_mas_vendidos(db: Session, limite: int = 10, dias: int = 365) -> List[ProductoMasVendido]:
+        """Obtiene productos más vendidos en los últimos `dias` (desde el acumulado diario por producto)"""
+        fecha_inicio = date.today() - timedelta(days=dias-1)
+        cantidad = func.sum(VentaProductoDiaria.cantidad)
+        
+        results = db.query(
+            VentaProductoDiaria.producto_id,
+            Producto.nombre.label('producto_nombre'),
+            cantidad.label('cantidad_vendida'),
+            func.sum(VentaProductoDiaria.monto_total).label('monto_total'),
+            func.sum(VentaProductoDiaria.ventas_count).label('ventas_count')
+        ).join(Producto, VentaProductoDiaria.producto_id == Producto.id)\
+         .filter(VentaProductoDiaria.fecha >= fecha_inicio)\
+         .group_by(VentaProductoDiaria.producto_id, Producto.nombre)\
+         .order_by(desc(cantidad))\
+         .limit(limite).all()
         
         return [
             ProductoMasVendido(
-                producto_id=producto.id,
-                producto_nombre=producto.nombre,
-                cantidad_vendida=0.0,  # Simulado
-                monto_total=0.0,  # Simulado
-                ventas_count=0  # Simulado
+                producto_id=row.producto_id,
+                producto_nombre=row.producto_nombre,
+                cantidad_vendida=round(row.cantidad_vendida or 0.0, 2),
+                monto_total=round(row.monto_total or 0.0, 2),
+                ventas_count=row.ventas_count or 0
             )
-            for producto in productos
+            for row in results
         ]
     
     @staticmethod
@@ -138,27 +160,14 @@ class DashboardService:
     @staticmethod
     def get_stock_bajo(db: Session, stock_minimo: float = 10.0) -> List[StockBajoItem]:
         """Obtiene productos con stock bajo"""
-        # Calcular stock actual por producto usando CASE de SQLAlchemy
-        from sqlalchemy import case
-        
-        stock_actual = db.query(
-            StockMovimiento.producto_id,
-            func.sum(
-                case(
-                    (StockMovimiento.tipo == 'IN', StockMovimiento.cantidad),
-                    else_=-StockMovimiento.cantidad
-                )
-            ).label('stock_actual')
-        ).group_by(StockMovimiento.producto_id).subquery()
-        
-        # Obtener productos con stock bajo
+        # Stock actual desde el saldo denormalizado (misma fuente que inventario y ventas)
         results = db.query(
-            stock_actual.c.producto_id,
+            StockSaldo.producto_id,
             Producto.nombre.label('producto_nombre'),
-            stock_actual.c.stock_actual
-        ).join(Producto, stock_actual.c.producto_id == Producto.id)\
-         .filter(stock_actual.c.stock_actual < stock_minimo)\
-         .order_by(stock_actual.c.stock_actual).all()
+            StockSaldo.cantidad.label('stock_actual')
+        ).join(Producto, StockSaldo.producto_id == Producto.id)\
+         .filter(StockSaldo.cantidad < stock_minimo)\
+         .order_by(StockSaldo.cantidad).all()
         
         return [
             StockBajoItem(
@@ -175,31 +184,37 @@ class DashboardService:
     @staticmethod
     def get_metricas_rendimiento(db: Session) -> MetricasRendimiento:
         """Obtiene métricas de rendimiento del sistema"""
-        # Ventas último mes
-        mes_pasado = date.today() - timedelta(days=30)
-        ventas_ultimo_mes = db.query(Venta).filter(Venta.fecha >= mes_pasado).count()
-        
-        # Crecimiento de ventas (comparar con mes anterior)
-        mes_anterior_inicio = date.today() - timedelta(days=60)
-        mes_anterior_fin = date.today() - timedelta(days=30)
-        ventas_mes_anterior = db.query(Venta).filter(
-            and_(Venta.fecha >= mes_anterior_inicio, Venta.fecha < mes_anterior_fin)
-        ).count()
+        # Último mes, mes anterior y ticket histórico en un solo SELECT sobre el acumulado diario
+        hoy = date.today()
+        mes_pasado = hoy - timedelta(days=30)
+        mes_anterior_inicio = hoy - timedelta(days=60)
+        fila = db.query(
+            func.sum(VentaDiaria.cantidad_ventas).filter(VentaDiaria.fecha >= mes_pasado).label('ultimo_mes'),
+            func.sum(VentaDiaria.cantidad_ventas).filter(
+                and_(VentaDiaria.fecha >= mes_anterior_inicio, VentaDiaria.fecha < mes_pasado)
+            ).label('mes_anterior'),
+            func.sum(VentaDiaria.monto_total).label('monto'),
+            func.sum(VentaDiaria.cantidad_ventas).label('cantidad')
+        ).one()
+        ventas_ultimo_mes = fila.ultimo_mes or 0
+        ventas_mes_anterior = fila.mes_anterior or 0
         
         crecimiento_ventas = 0.0
         if ventas_mes_anterior > 0:
             crecimiento_ventas = ((ventas_ultimo_mes - ventas_mes_anterior) / ventas_mes_anterior) * 100
         
-        # Productos activos (con stock > 0)
-        productos_activos = db.query(StockMovimiento.producto_id).distinct().count()
+        # Productos activos (con stock > 0, desde el saldo denormalizado)
+        productos_activos = db.query(func.count(StockSaldo.producto_id)).filter(
+            StockSaldo.cantidad > 0
+        ).scalar() or 0
         
-        # Clientes activos (con al menos una venta en los últimos 30 días)
-        clientes_activos = db.query(Venta.cliente_id).filter(
-            Venta.fecha >= mes_pasado
-        ).distinct().count()
+        # Clientes activos (con al menos una venta en los últimos 30 días; rango sobre ventas.fecha)
+        clientes_activos = db.query(func.count(distinct(Venta.cliente_id))).filter(
+            Venta.fecha >= datetime.combine(mes_pasado, datetime.min.time())
+        ).scalar() or 0
         
         # Ticket promedio
-        ticket_promedio = db.query(func.avg(Venta.total)).scalar() or 0.0
+        ticket_promedio = (fila.monto or 0.0) / fila.cantidad if fila.cantidad else 0.0
         
         # Conversion rate (simulado - en un sistema real sería más complejo)
         conversion_rate = 15.0  # Porcentaje simulado
@@ -215,16 +230,16 @@ class DashboardService:
     
     @staticmethod
     def get_tendencias_ventas(db: Session, dias: int = 30) -> List[TendenciaVentas]:
-        """Obtiene tendencias de ventas por día"""
+        """Obtiene tendencias de ventas por día (desde el acumulado diario)"""
         fecha_inicio = date.today() - timedelta(days=dias-1)
         
         results = db.query(
-            func.date(Venta.fecha).label('fecha'),
-            func.count(Venta.id).label('ventas'),
-            func.sum(Venta.total).label('monto')
-        ).filter(Venta.fecha >= fecha_inicio)\
-         .group_by(func.date(Venta.fecha))\
-         .order_by(func.date(Venta.fecha)).all()
+            VentaDiaria.fecha.label('fecha'),
+            func.sum(VentaDiaria.cantidad_ventas).label('ventas'),
+            func.sum(VentaDiaria.monto_total).label('monto')
+        ).filter(VentaDiaria.fecha >= fecha_inicio)\
+         .group_by(VentaDiaria.fecha)\
+         .order_by(VentaDiaria.fecha).all()
         
         tendencias = []
         monto_anterior = 0.0
@@ -246,15 +261,82 @@ class DashboardService:
         return tendencias
     
     @staticmethod
-    def get_dashboard_completo(db: Session) -> DashboardCompleto:
-        """Obtiene dashboard completo con todas las métricas"""
-        return DashboardCompleto(
-            resumen_ventas=DashboardService.get_ventas_resumen(db),
-            ventas_por_periodo=DashboardService.get_ventas_por_periodo(db, "dia", 30),
-            productos_mas_vendidos=DashboardService.get_productos_mas_vendidos(db, 10),
-            clientes_top=DashboardService.get_clientes_top(db, 10),
-            stock_bajo=DashboardService.get_stock_bajo(db, 10.0),
-            metricas=DashboardService.get_metricas_rendimiento(db),
-            tendencias=DashboardService.get_tendencias_ventas(db, 30),
-            ultima_actualizacion=datetime.now()
-        )
+    def get_dashboard_completo(db: Session, tiempos: Optional[Dict[str, float]] = None) -> DashboardCompleto:
+        """
+        Obtiene dashboard completo con todas las métricas, una parte tras otra en la
+        misma sesión. Si se pasa `tiempos`, se completa con los ms de cada parte.
+        """
+        resultados = {}
+        for nombre, parte in _PARTES_DASHBOARD.items():
+            resultados[nombre], ms = _medir(parte, db)
+            if tiempos is not None:
+                tiempos[nombre] = ms
+        return DashboardCompleto(**resultados, ultima_actualizacion=datetime.now())
+    
+    @staticmethod
+    def get_dashboard_completo_paralelo(tiempos: Optional[Dict[str, float]] = None) -> DashboardCompleto:
+        """
+        Igual que get_dashboard_completo, pero cada parte corre en un hilo con su propia
+        sesión del pool: la latencia total queda cerca de la de la parte más lenta.
+        """
+        executor = _executor_dashboard()
+        futuros = {
+            nombre: executor.submit(_ejecutar_parte, parte)
+            for nombre, parte in _PARTES_DASHBOARD.items()
+        }
+        resultados = {}
+        for nombre, futuro in futuros.items():
+            resultados[nombre], ms = futuro.result()
+            if tiempos is not None:
+                tiempos[nombre] = ms
+        return DashboardCompleto(**resultados, ultima_actualizacion=datetime.now())
+
+
+# Partes independientes del dashboard completo (campo de DashboardCompleto -> consulta)
+_PARTES_DASHBOARD: Dict[str, Callable[[Session], Any]] = {
+    "resumen_ventas": lambda db: DashboardService.get_ventas_resumen(db),
+    "ventas_por_periodo": lambda db: DashboardService.get_ventas_por_periodo(db, "dia", 30),
+    "productos_mas_vendidos": lambda db: DashboardService.get_productos_mas_vendidos(db, 10),
+    "clientes_top": lambda db: DashboardService.get_clientes_top(db, 10),
+    "stock_bajo": lambda db: DashboardService.get_stock_bajo(db, 10.0),
+    "metricas": lambda db: DashboardService.get_metricas_rendimiento(db),
+    "tendencias": lambda db: DashboardService.get_tendencias_ventas(db, 30),
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _executor_dashboard() -> ThreadPoolExecutor:
+    """Pool de hilos compartido (se crea una sola vez, no por request)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.DASHBOARD_MAX_WORKERS,
+                    thread_name_prefix="dashboard"
+                )
+    return _executor
+
+
+def cerrar_executor_dashboard() -> None:
+    """Libera los hilos del pool (al apagar la aplicación)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+def _medir(parte: Callable[[Session], Any], db: Session) -> Tuple[Any, float]:
+    """Ejecuta una parte y devuelve (resultado, milisegundos)"""
+    inicio = time.perf_counter()
+    resultado = parte(db)
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+
+def _ejecutar_parte(parte: Callable[[Session], Any]) -> Tuple[Any, float]:
+    """Corre una parte en su propia sesión: las sesiones no se comparten entre hilos"""
+    with SessionLocal() as db:
+        return _medir(parte, db)
@@ -1,11 +1,15 @@
 # app/services/descuento_service.py
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, text
-from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, func, desc, text, case
+from datetime import datetime, date, timedelta
 from typing import List, Optional, Dict, Any, Tuple
 import json
 
-from app.models.descuento_model import Descuento, DescuentoUso, Promocion, TipoDescuento, EstadoDescuento
+from app.db.upsert import dialect_insert
+from app.services.transicion_service import calcular_proxima_transicion
+from app.models.descuento_model import (
+    Descuento, DescuentoUso, DescuentoUsoMensual, Promocion, TipoDescuento, EstadoDescuento
+)
 from app.schemas.descuento_schema import (
     DescuentoCreate, DescuentoUpdate, DescuentoAplicacion, 
     DescuentoResultado, DescuentoEstadisticas, DescuentoFiltros
@@ -43,6 +47,7 @@ class DescuentoService:
             estado=EstadoDescuento.ACTIVO.value,  # Convertir a string
             es_activo=True
         )
+        DescuentoService.programar_transicion(db_descuento)
         
         db.add(db_descuento)
         db.commit()
@@ -127,6 +132,8 @@ class DescuentoService:
             db_descuento.estado = descuento_update.estado
             db_descuento.es_activo = descuento_update.estado == EstadoDescuento.ACTIVO
         
+        DescuentoService.programar_transicion(db_descuento)
+        
         db.commit()
         db.refresh(db_descuento)
         
@@ -260,6 +267,8 @@ class DescuentoService:
         user_agent: Optional[str] = None
     ) -> DescuentoUso:
         """Registra el uso de un descuento"""
+        ahora = datetime.utcnow()
+        
         # Crear registro de uso
         uso = DescuentoUso(
             descuento_id=descuento_id,
@@ -268,12 +277,16 @@ class DescuentoService:
             monto_original=monto_original,
             monto_descuento=monto_descuento,
             monto_final=monto_final,
+            fecha_uso=ahora,
             ip_cliente=ip_cliente,
             user_agent=user_agent
         )
         
         db.add(uso)
         
+        # Acumular en el rollup mensual (misma transacción que el uso)
+        DescuentoService._acumular_uso_mensual(db, descuento_id, ahora, monto_descuento)
+        
         # Actualizar contador de usos
         descuento = db.query(Descuento).filter(Descuento.id == descuento_id).first()
         if descuento:
@@ -283,39 +296,84 @@ class DescuentoService:
             if descuento.limite_usos and descuento.usos_actuales >= descuento.limite_usos:
                 descuento.estado = EstadoDescuento.AGOTADO
                 descuento.es_activo = False
+                descuento.proxima_transicion = None
         
         db.commit()
         db.refresh(uso)
         
         return uso
     
+    @staticmethod
+    def _acumular_uso_mensual(db: Session, descuento_id: int, fecha_uso: datetime, monto_descuento: float):
+        """Suma un uso al acumulado mensual del descuento (upsert atómico)"""
+        stmt = dialect_insert(db, DescuentoUsoMensual).values(
+            descuento_id=descuento_id,
+            mes=fecha_uso.date().replace(day=1),
+            usos=1,
+            monto_descuentado=monto_descuento or 0.0
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DescuentoUsoMensual.descuento_id, DescuentoUsoMensual.mes],
+            set_={
+                "usos": DescuentoUsoMensual.usos + stmt.excluded.usos,
+                "monto_descuentado": DescuentoUsoMensual.monto_descuentado + stmt.excluded.monto_descuentado
+            }
+        )
+        db.execute(stmt)
+    
     @staticmethod
     def obtener_estadisticas(db: Session) -> DescuentoEstadisticas:
-        """Obtiene estadísticas de descuentos"""
-        # Estadísticas básicas
-        total_descuentos = db.query(Descuento).count()
-        descuentos_activos = db.query(Descuento).filter(Descuento.es_activo == True).count()
-        descuentos_expirados = db.query(Descuento).filter(Descuento.estado == EstadoDescuento.EXPIRADO).count()
-        
-        # Estadísticas de usos
-        total_usos = db.query(DescuentoUso).count()
-        monto_total_descuentado = db.query(func.sum(DescuentoUso.monto_descuento)).scalar() or 0.0
-        
-        # Descuentos por tipo
-        descuentos_por_tipo = {}
-        for tipo in TipoDescuento:
-            count = db.query(Descuento).filter(Descuento.tipo == tipo).count()
-            descuentos_por_tipo[tipo.value] = count
-        
-        # Top descuentos por uso
+        """Obtiene estadísticas de descuentos (desde descuentos + rollup mensual)"""
+        # Una sola pasada agrupada sobre descuentos: total, activos y expirados por tipo
+        por_tipo = db.query(
+            Descuento.tipo,
+            func.count(Descuento.id).label('total'),
+            func.sum(case((Descuento.es_activo == True, 1), else_=0)).label('activos'),
+            func.sum(case((Descuento.estado == EstadoDescuento.EXPIRADO.value, 1), else_=0)).label('expirados')
+        ).group_by(Descuento.tipo).all()
+        
+        descuentos_por_tipo = {tipo.value: 0 for tipo in TipoDescuento}
+        total_descuentos = descuentos_activos = descuentos_expirados = 0
+        for row in por_tipo:
+            descuentos_por_tipo[row.tipo] = row.total
+            total_descuentos += row.total
+            descuentos_activos += row.activos or 0
+            descuentos_expirados += row.expirados or 0
+        
+        # Usos por mes desde el rollup (una fila por mes, sin tocar descuento_usos)
+        usos_por_mes = db.query(
+            DescuentoUsoMensual.mes,
+            func.sum(DescuentoUsoMensual.usos).label('usos'),
+            func.sum(DescuentoUsoMensual.monto_descuentado).label('monto_descuentado')
+        ).group_by(DescuentoUsoMensual.mes)\
+         .order_by(DescuentoUsoMensual.mes).all()
+        
+        total_usos = sum(row.usos or 0 for row in usos_por_mes)
+        monto_total_descuentado = sum(row.monto_descuentado or 0.0 for row in usos_por_mes)
+        
+        # Últimos 12 meses
+        hoy = date.today()
+        mes_desde = date(hoy.year - 1, hoy.month, 1)
+        usos_por_mes_list = [
+            {
+                "mes": row.mes.strftime("%Y-%m"),
+                "usos": row.usos,
+                "monto_descuentado": round(row.monto_descuentado or 0.0, 2)
+            }
+            for row in usos_por_mes
+            if row.mes >= mes_desde
+        ]
+        
+        # Top descuentos por uso (agregado sobre el rollup)
+        usos_col = func.sum(DescuentoUsoMensual.usos).label('usos')
         top_descuentos = db.query(
             Descuento.codigo,
             Descuento.nombre,
-            func.count(DescuentoUso.id).label('usos'),
-            func.sum(DescuentoUso.monto_descuento).label('monto_descuentado')
-        ).join(DescuentoUso, Descuento.id == DescuentoUso.descuento_id)\
+            usos_col,
+            func.sum(DescuentoUsoMensual.monto_descuentado).label('monto_descuentado')
+        ).join(DescuentoUsoMensual, Descuento.id == DescuentoUsoMensual.descuento_id)\
          .group_by(Descuento.id, Descuento.codigo, Descuento.nombre)\
-         .order_by(desc('usos'))\
+         .order_by(desc(usos_col))\
          .limit(10).all()
         
         top_descuentos_list = [
@@ -328,25 +386,6 @@ class DescuentoService:
             for row in top_descuentos
         ]
         
-        # Usos por mes (últimos 12 meses)
-        fecha_inicio = datetime.utcnow() - timedelta(days=365)
-        usos_por_mes = db.query(
-            func.date_trunc('month', DescuentoUso.fecha_uso).label('mes'),
-            func.count(DescuentoUso.id).label('usos'),
-            func.sum(DescuentoUso.monto_descuento).label('monto_descuentado')
-        ).filter(DescuentoUso.fecha_uso >= fecha_inicio)\
-         .group_by(func.date_trunc('month', DescuentoUso.fecha_uso))\
-         .order_by('mes').all()
-        
-        usos_por_mes_list = [
-            {
-                "mes": row.mes.strftime("%Y-%m"),
-                "usos": row.usos,
-                "monto_descuentado": round(row.monto_descuentado or 0.0, 2)
-            }
-            for row in usos_por_mes
-        ]
-        
         return DescuentoEstadisticas(
             total_descuentos=total_descuentos,
             descuentos_activos=descuentos_activos,
@@ -358,26 +397,40 @@ class DescuentoService:
             usos_por_mes=usos_por_mes_list
         )
     
+    @staticmethod
+    def programar_transicion(descuento: Descuento) -> None:
+        """Recalcula la próxima transición de estado según estado y fechas"""
+        descuento.proxima_transicion = calcular_proxima_transicion(
+            descuento.estado, descuento.fecha_inicio, descuento.fecha_fin
+        )
+    
     @staticmethod
     def actualizar_estados_descuentos(db: Session) -> int:
-        """Actualiza los estados de los descuentos según las fechas"""
+        """
+        Aplica las transiciones de estado vencidas (activo -> expirado, inactivo -> activo).
+        Sólo recorre las filas con `proxima_transicion <= ahora`.
+        """
         ahora = datetime.utcnow()
+        vencidos = Descuento.proxima_transicion <= ahora
         
         # Marcar como expirados
         expirados = db.query(Descuento).filter(
             and_(
-                Descuento.estado == EstadoDescuento.ACTIVO,
-                Descuento.fecha_fin < ahora
+                vencidos,
+                Descuento.estado == EstadoDescuento.ACTIVO.value,
+                Descuento.fecha_fin <= ahora
             )
         ).update({
-            Descuento.estado: EstadoDescuento.EXPIRADO,
-            Descuento.es_activo: False
-        })
+            Descuento.estado: EstadoDescuento.EXPIRADO.value,
+            Descuento.es_activo: False,
+            Descuento.proxima_transicion: None
+        }, synchronize_session=False)
         
-        # Marcar como activos los que están en rango
+        # Activar los que llegaron a su fecha de inicio (la próxima transición pasa a ser fecha_fin)
         activos = db.query(Descuento).filter(
             and_(
-                Descuento.estado == EstadoDescuento.INACTIVO,
+                vencidos,
+                Descuento.estado == EstadoDescuento.INACTIVO.value,
                 Descuento.fecha_inicio <= ahora,
                 or_(
                     Descuento.fecha_fin.is_(None),
@@ -385,9 +438,15 @@ class DescuentoService:
                 )
             )
         ).update({
-            Descuento.estado: EstadoDescuento.ACTIVO,
-            Descuento.es_activo: True
-        })
+            Descuento.estado: EstadoDescuento.ACTIVO.value,
+            Descuento.es_activo: True,
+            Descuento.proxima_transicion: Descuento.fecha_fin
+        }, synchronize_session=False)
+        
+        # Cualquier resto vencido ya no tiene transición pendiente
+        db.query(Descuento).filter(vencidos).update(
+            {Descuento.proxima_transicion: None}, synchronize_session=False
+        )
         
         db.commit()
         
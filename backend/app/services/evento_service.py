@@ -0,0 +1,229 @@
+# app/services/evento_service.py
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.eventos import EventHub, Evento, PgNotifyBridge
+from app.core.settings import settings
+from app.db.database import SessionLocal, engine
+from app.models.inventario_model import AlertaInventario, EstadoAlerta
+from app.models.notificacion_model import Notificacion
+from app.schemas.inventario_schema import AlertaInventarioOut
+from app.schemas.notificacion_schema import NotificacionOut
+
+logger = logging.getLogger(__name__)
+
+CANAL_NOTIFICACION = "notificacion"
+CANAL_ALERTA = "alerta_inventario"
+
+# Hub del proceso al que se suscriben las conexiones de /notificaciones/stream
+hub = EventHub(max_cola=settings.EVENTOS_COLA_MAXIMA)
+_puente: Optional[PgNotifyBridge] = None
+
+# Cursor de reanudación: (último id de notificación, último id de alerta).
+# Es el mayor id enviado, pero los ids se asignan al insertar y no al confirmar: una fila
+# con id menor que confirma después de una mayor quedaría por debajo del cursor. Por eso
+# al reanudar se relee una ventana de EVENTOS_VENTANA_REANUDACION ids por debajo
+# (entrega "al menos una vez": el cliente puede recibir repetidos y los descarta por id).
+Cursor = Tuple[int, int]
+
+
+def _evento_notificacion(notificacion: Notificacion) -> Evento:
+    return Evento(
+        canal=CANAL_NOTIFICACION,
+        id=notificacion.id,
+        usuario_id=notificacion.usuario_id,
+        datos=NotificacionOut.model_validate(notificacion).model_dump(mode="json")
+    )
+
+
+def _evento_alerta(alerta: AlertaInventario) -> Evento:
+    # Las alertas de inventario no tienen destinatario: van a todos los conectados
+    return Evento(
+        canal=CANAL_ALERTA,
+        id=alerta.id,
+        datos=AlertaInventarioOut.model_validate(alerta).model_dump(mode="json")
+    )
+
+
+def _hay_oyentes() -> bool:
+    """Sin conexiones ni puente entre workers no hace falta armar eventos"""
+    return hub.puente is not None or hub.conexiones > 0
+
+
+def publicar_notificacion(notificacion: Notificacion) -> None:
+    """Publica una notificación ya confirmada (llamar después del commit)"""
+    if not _hay_oyentes():
+        return
+    try:
+        hub.publicar(_evento_notificacion(notificacion))
+    except Exception as e:
+        # La notificación ya está guardada: se recupera al reconectar con Last-Event-ID
+        logger.warning(f"No se pudo publicar la notificación {notificacion.id}: {e}")
+
+
+def publicar_alertas(db: Session, alerta_ids: Iterable[int]) -> None:
+    """Publica alertas de inventario recién creadas (llamar después del commit)"""
+    alerta_ids = list(alerta_ids)
+    if not alerta_ids or not _hay_oyentes():
+        return
+    try:
+        alertas = db.query(AlertaInventario).filter(AlertaInventario.id.in_(alerta_ids))\
+            .order_by(AlertaInventario.id).all()
+        for alerta in alertas:
+            hub.publicar(_evento_alerta(alerta))
+    except Exception as e:
+        logger.warning(f"No se pudieron publicar {len(alerta_ids)} alertas de inventario: {e}")
+
+
+def cargar_evento(canal: str, evento_id: int) -> Optional[Evento]:
+    """Reconstruye un evento desde su tabla (lo usa el puente LISTEN/NOTIFY)"""
+    db = SessionLocal()
+    try:
+        if canal == CANAL_NOTIFICACION:
+            notificacion = db.query(Notificacion).filter(Notificacion.id == evento_id).first()
+            return _evento_notificacion(notificacion) if notificacion else None
+        if canal == CANAL_ALERTA:
+            alerta = db.query(AlertaInventario).filter(AlertaInventario.id == evento_id).first()
+            return _evento_alerta(alerta) if alerta else None
+        return None
+    finally:
+        db.close()
+
+
+def parsear_cursor(last_event_id: Optional[str]) -> Optional[Cursor]:
+    """Last-Event-ID con formato '<id notificación>.<id alerta>'; None si falta o es inválido"""
+    if not last_event_id:
+        return None
+    try:
+        notificacion_id, alerta_id = last_event_id.split(".")
+        return int(notificacion_id), int(alerta_id)
+    except ValueError:
+        return None
+
+
+def _avanzar(cursor: Cursor, evento: Evento) -> Cursor:
+    if evento.canal == CANAL_NOTIFICACION:
+        return max(cursor[0], evento.id), cursor[1]
+    return cursor[0], max(cursor[1], evento.id)
+
+
+def cursor_actual() -> Cursor:
+    """Últimos ids existentes: el punto de partida de una conexión nueva"""
+    db = SessionLocal()
+    try:
+        return (
+            db.query(func.coalesce(func.max(Notificacion.id), 0)).scalar(),
+            db.query(func.coalesce(func.max(AlertaInventario.id), 0)).scalar()
+        )
+    finally:
+        db.close()
+
+
+def eventos_desde(usuario_id: int, cursor: Cursor, limite: int = 500) -> List[Evento]:
+    """
+    Una página de eventos posteriores al cursor, leídos de las tablas: hasta `limite`
+    notificaciones del usuario o globales y hasta `limite` alertas pendientes.
+    Es lo que se reenvía al reconectar con Last-Event-ID (ver `_reanudar`).
+    """
+    db = SessionLocal()
+    try:
+        notificaciones = db.query(Notificacion).filter(
+            Notificacion.id > cursor[0],
+            or_(Notificacion.usuario_id == usuario_id, Notificacion.usuario_id.is_(None))
+        ).order_by(Notificacion.id).limit(limite).all()
+        alertas = db.query(AlertaInventario).filter(
+            AlertaInventario.id > cursor[1],
+            AlertaInventario.estado == EstadoAlerta.PENDIENTE
+        ).order_by(AlertaInventario.id).limit(limite).all()
+        return [_evento_notificacion(n) for n in notificaciones] + [_evento_alerta(a) for a in alertas]
+    finally:
+        db.close()
+
+
+async def _reanudar(usuario_id: int, cursor: Cursor) -> AsyncIterator[Evento]:
+    """
+    Todos los eventos desde el cursor menos la ventana de reanudación (ver `Cursor`),
+    página por página hasta que no quedan: si la reanudación se cortara en la primera
+    página, los eventos en vivo moverían el cursor por encima del resto y se perderían.
+    """
+    ventana = settings.EVENTOS_VENTANA_REANUDACION
+    desde = (max(cursor[0] - ventana, 0), max(cursor[1] - ventana, 0))
+    while True:
+        pagina = await run_in_threadpool(eventos_desde, usuario_id, desde)
+        if not pagina:
+            return
+        for evento in pagina:
+            desde = _avanzar(desde, evento)
+            yield evento
+
+
+def _formatear(evento: Evento, cursor: Cursor) -> str:
+    return (
+        f"id: {cursor[0]}.{cursor[1]}\n"
+        f"event: {evento.canal}\n"
+        f"data: {json.dumps(evento.datos, ensure_ascii=False)}\n\n"
+    )
+
+
+async def stream_eventos(usuario_id: int, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Flujo SSE de un usuario. Se suscribe al hub antes de leer las tablas para no perder
+    eventos entre la reanudación y el primer evento en vivo; los repetidos se descartan.
+    Si el cliente no consume y su cola se llena, se corta: al reconectar retoma desde
+    su Last-Event-ID.
+    """
+    suscripcion = hub.suscribir(usuario_id)
+    try:
+        cursor = parsear_cursor(last_event_id)
+        reanudar = cursor is not None
+        if not reanudar:
+            cursor = await run_in_threadpool(cursor_actual)
+
+        yield f"retry: {settings.EVENTOS_RETRY_MS}\n\n"
+
+        enviados = set()
+        if reanudar:
+            async for evento in _reanudar(usuario_id, cursor):
+                enviados.add((evento.canal, evento.id))
+                cursor = _avanzar(cursor, evento)
+                yield _formatear(evento, cursor)
+
+        while not suscripcion.desbordada:
+            try:
+                evento = await asyncio.wait_for(suscripcion.cola.get(), timeout=settings.EVENTOS_HEARTBEAT_SEGUNDOS)
+            except asyncio.TimeoutError:
+                # Heartbeat: mantiene viva la conexión a través de proxies
+                yield ": ping\n\n"
+                continue
+            if (evento.canal, evento.id) in enviados:
+                continue
+            cursor = _avanzar(cursor, evento)
+            yield _formatear(evento, cursor)
+    finally:
+        hub.desuscribir(suscripcion)
+
+
+def iniciar_puente_pg() -> None:
+    """Arranca el puente LISTEN/NOTIFY si está habilitado (sólo PostgreSQL)"""
+    global _puente
+    if not settings.EVENTOS_PG_NOTIFY or _puente is not None:
+        return
+    if engine.dialect.name != "postgresql":
+        logger.warning("EVENTOS_PG_NOTIFY requiere PostgreSQL; los eventos quedan locales a cada worker")
+        return
+    dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+    _puente = PgNotifyBridge(hub, dsn, engine, cargar_evento)
+    _puente.iniciar()
+
+
+def detener_puente_pg() -> None:
+    global _puente
+    if _puente is not None:
+        _puente.detener()
+        _puente = None
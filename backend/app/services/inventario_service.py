@@ -1,13 +1,27 @@
 # app/services/inventario_service.py
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, text
-from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, func, desc, text, select, case, cast, literal, null, union_all, String, Float
+from datetime import datetime, date, timedelta
 from typing import List, Optional, Dict, Any, Tuple
 import json
 
+import numpy as np
+
+from app.core.cache import TTLCache
+from app.core.settings import settings
+from app.db.database import SessionLocal
+from app.db.upsert import dialect_insert
+from app.models.compra_model import Compra, CompraItem, StockMovimiento, StockSaldo
+from app.models.costo_model import CostoProducto
+from app.services.stock_service import stock_actual, registrar_movimiento
+from app.services import costo_service
+from app.services.evento_service import publicar_alertas
+from app.services.clasificacion_service import (
+    ClasificacionService, FACTOR_STOCK_ABC, FACTOR_STOCK_XYZ, Z_SERVICIO_ABC
+)
 from app.models.inventario_model import (
     ConfiguracionInventario, AlertaInventario, MovimientoInventario, 
-    ReordenAutomatico, TipoAlertaInventario, EstadoAlerta
+    ReordenAutomatico, ProductoClasificacion, TipoAlertaInventario, EstadoAlerta
 )
 from app.schemas.inventario_schema import (
     ConfiguracionInventarioCreate, ConfiguracionInventarioUpdate,
@@ -16,6 +30,12 @@ from app.schemas.inventario_schema import (
     InventarioResumen, InventarioFiltros, InventarioEstadisticas
 )
 
+# Stock crítico = 50% del stock mínimo configurado
+FACTOR_STOCK_CRITICO = 0.5
+
+# Estadísticas del inventario: se recalculan a lo sumo una vez por TTL
+_cache_estadisticas = TTLCache(settings.INVENTARIO_ESTADISTICAS_TTL_SEGUNDOS)
+
 class InventarioService:
     
     @staticmethod
@@ -35,7 +55,8 @@ class InventarioService:
             alerta_vencimiento=configuracion.alerta_vencimiento,
             dias_vencimiento_alerta=configuracion.dias_vencimiento_alerta,
             alerta_movimiento_grande=configuracion.alerta_movimiento_grande,
-            umbral_movimiento_grande=configuracion.umbral_movimiento_grande
+            umbral_movimiento_grande=configuracion.umbral_movimiento_grande,
+            usar_clasificacion=configuracion.usar_clasificacion
         )
         
         db.add(db_configuracion)
@@ -92,165 +113,192 @@ class InventarioService:
         movimiento: MovimientoInventarioCreate,
         usuario_id: Optional[int] = None
     ) -> MovimientoInventario:
-        """Crea un movimiento de inventario"""
-        # Obtener stock actual del producto
+        """
+        Crea un movimiento de inventario. El stock se mueve a través del ledger
+        stock_movimientos + saldo denormalizado (misma fuente que compras y ventas).
+        """
         from app.models.producto_model import Producto
-        producto = db.query(Producto).filter(Producto.id == movimiento.producto_id).first()
+        producto = db.query(Producto.id).filter(Producto.id == movimiento.producto_id).first()
         
         if not producto:
             raise ValueError("Producto no encontrado")
         
-        cantidad_anterior = producto.stock or 0.0
-        cantidad_nueva = cantidad_anterior + movimiento.cantidad
-        
-        # Crear movimiento
-        db_movimiento = MovimientoInventario(
-            producto_id=movimiento.producto_id,
-            tipo_movimiento=movimiento.tipo_movimiento,
-            cantidad=movimiento.cantidad,
-            cantidad_anterior=cantidad_anterior,
-            cantidad_nueva=cantidad_nueva,
-            referencia_tipo=movimiento.referencia_tipo,
-            referencia_id=movimiento.referencia_id,
-            motivo=movimiento.motivo,
-            costo_unitario=movimiento.costo_unitario,
-            costo_total=movimiento.costo_total,
-            usuario_id=usuario_id
-        )
-        
-        db.add(db_movimiento)
-        
-        # Actualizar stock del producto
-        producto.stock = cantidad_nueva
+        delta = InventarioService._delta_movimiento(movimiento.tipo_movimiento, movimiento.cantidad)
+        
+        try:
+            db_movimiento = MovimientoInventario(
+                producto_id=movimiento.producto_id,
+                tipo_movimiento=movimiento.tipo_movimiento,
+                cantidad=movimiento.cantidad,
+                cantidad_anterior=0.0,
+                cantidad_nueva=0.0,
+                referencia_tipo=movimiento.referencia_tipo,
+                referencia_id=movimiento.referencia_id,
+                motivo=movimiento.motivo,
+                costo_unitario=movimiento.costo_unitario,
+                costo_total=movimiento.costo_total,
+                usuario_id=usuario_id
+            )
+            db.add(db_movimiento)
+            db.flush()  # para obtener db_movimiento.id
+            
+            # Ledger + saldo en la misma transacción
+            saldos = registrar_movimiento(
+                db,
+                producto_id=movimiento.producto_id,
+                tipo="IN" if delta >= 0 else "OUT",
+                cantidad=abs(delta),
+                motivo=movimiento.tipo_movimiento.upper(),
+                ref_tipo="movimiento_inventario",
+                ref_id=db_movimiento.id
+            )
+            if saldos.deposito < 0:
+                raise ValueError(
+                    f"Stock insuficiente para producto {movimiento.producto_id} (disp: {saldos.deposito - delta})"
+                )
+            cantidad_nueva = saldos.total
+            
+            # Valorización: las entradas abren capa, las salidas la consumen (no cuentan como costo de ventas)
+            if delta > 0:
+                costo_service.registrar_entrada(
+                    db,
+                    producto_id=movimiento.producto_id,
+                    cantidad=delta,
+                    costo_unitario=movimiento.costo_unitario,
+                    ref_tipo="movimiento_inventario",
+                    ref_id=db_movimiento.id
+                )
+            elif delta < 0:
+                costo_service.registrar_salida(db, movimiento.producto_id, -delta, es_venta=False)
+            
+            db_movimiento.cantidad_anterior = cantidad_nueva - delta
+            db_movimiento.cantidad_nueva = cantidad_nueva
+            
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
         
-        db.commit()
         db.refresh(db_movimiento)
         
         # Verificar si se debe crear una alerta
-        InventarioService._verificar_alertas_stock(db, movimiento.producto_id, cantidad_nueva)
+        InventarioService._verificar_alertas_stock(db, movimiento.producto_id)
         
         return db_movimiento
     
     @staticmethod
-    def _verificar_alertas_stock(db: Session, producto_id: int, stock_actual: float):
-        """Verifica si se deben crear alertas de stock"""
-        configuracion = db.query(ConfiguracionInventario).filter(
-            and_(
-                ConfiguracionInventario.producto_id == producto_id,
-                ConfiguracionInventario.activo == True
-            )
-        ).first()
-        
-        if not configuracion:
-            return
-        
-        # Verificar stock bajo
-        if configuracion.alerta_stock_bajo and stock_actual <= configuracion.stock_minimo:
-            InventarioService._crear_alerta_stock_bajo(
-                db, producto_id, stock_actual, configuracion.stock_minimo
-            )
-        
-        # Verificar stock crítico (50% del mínimo)
-        stock_critico = configuracion.stock_minimo * 0.5
-        if configuracion.alerta_stock_critico and stock_actual <= stock_critico:
-            InventarioService._crear_alerta_stock_critico(
-                db, producto_id, stock_actual, stock_critico
-            )
-        
-        # Verificar stock agotado
-        if stock_actual <= 0:
-            InventarioService._crear_alerta_stock_agotado(db, producto_id)
+    def _delta_movimiento(tipo_movimiento: str, cantidad: float) -> float:
+        """Variación de stock de un movimiento: entrada suma, salida resta, ajuste usa el signo dado"""
+        tipo = (tipo_movimiento or "").lower()
+        if tipo == "entrada":
+            return abs(cantidad)
+        if tipo == "salida":
+            return -abs(cantidad)
+        return cantidad
     
     @staticmethod
-    def _crear_alerta_stock_bajo(
-        db: Session, 
-        producto_id: int, 
-        stock_actual: float, 
-        stock_minimo: float
-    ):
-        """Crea alerta de stock bajo"""
-        # Verificar si ya existe una alerta pendiente
-        alerta_existente = db.query(AlertaInventario).filter(
-            and_(
-                AlertaInventario.producto_id == producto_id,
-                AlertaInventario.tipo == TipoAlertaInventario.STOCK_BAJO,
-                AlertaInventario.estado == EstadoAlerta.PENDIENTE
-            )
-        ).first()
-        
-        if alerta_existente:
-            return
-        
-        alerta = AlertaInventario(
-            producto_id=producto_id,
-            tipo=TipoAlertaInventario.STOCK_BAJO,
-            titulo=f"Stock bajo - Producto {producto_id}",
-            mensaje=f"El producto tiene stock bajo. Actual: {stock_actual}, Mínimo: {stock_minimo}",
-            prioridad=2,
-            stock_actual=stock_actual,
-            stock_minimo=stock_minimo
+    def _insertar_alertas_stock(db: Session, producto_id: Optional[int] = None) -> int:
+        """
+        Crea en un solo INSERT ... SELECT las alertas de stock bajo, crítico y agotado
+        que falten, leyendo el saldo denormalizado de stock_saldos. Las pendientes existentes se respetan vía ON CONFLICT DO NOTHING
+        sobre el índice único parcial (producto_id, tipo) WHERE estado = 'pendiente'.
+        Devuelve la cantidad de alertas creadas.
+        """
+        # Niveles de stock vs umbrales de cada configuración activa (un solo JOIN)
+        filtros = [ConfiguracionInventario.activo == True]
+        if producto_id is not None:
+            filtros.append(ConfiguracionInventario.producto_id == producto_id)
+        
+        # Con usar_clasificacion el mínimo se ajusta según la clase ABC/XYZ del producto
+        stock_minimo = case(
+            (
+                ConfiguracionInventario.usar_clasificacion == True,
+                ConfiguracionInventario.stock_minimo * ClasificacionService.factor_stock_minimo()
+            ),
+            else_=ConfiguracionInventario.stock_minimo
         )
-        
-        db.add(alerta)
-        db.commit()
-    
-    @staticmethod
-    def _crear_alerta_stock_critico(
-        db: Session, 
-        producto_id: int, 
-        stock_actual: float, 
-        stock_critico: float
-    ):
-        """Crea alerta de stock crítico"""
-        alerta_existente = db.query(AlertaInventario).filter(
-            and_(
-                AlertaInventario.producto_id == producto_id,
-                AlertaInventario.tipo == TipoAlertaInventario.STOCK_CRITICO,
-                AlertaInventario.estado == EstadoAlerta.PENDIENTE
+        niveles = select(
+            ConfiguracionInventario.producto_id.label("producto_id"),
+            func.coalesce(StockSaldo.cantidad, 0.0).label("stock_actual"),
+            stock_minimo.label("stock_minimo"),
+            (stock_minimo * FACTOR_STOCK_CRITICO).label("stock_critico"),
+            ConfiguracionInventario.alerta_stock_bajo.label("alerta_stock_bajo"),
+            ConfiguracionInventario.alerta_stock_critico.label("alerta_stock_critico")
+        ).select_from(ConfiguracionInventario)\
+         .outerjoin(StockSaldo, StockSaldo.producto_id == ConfiguracionInventario.producto_id)\
+         .outerjoin(ProductoClasificacion, ProductoClasificacion.producto_id == ConfiguracionInventario.producto_id)\
+         .where(and_(*filtros))\
+         .cte("niveles")
+        
+        tipo_type = AlertaInventario.__table__.c.tipo.type
+        estado_type = AlertaInventario.__table__.c.estado.type
+        ahora = datetime.utcnow()
+        producto_txt = cast(niveles.c.producto_id, String)
+        actual_txt = cast(niveles.c.stock_actual, String)
+        
+        def _alertas(tipo, titulo, mensaje, prioridad, condicion, stock_minimo, stock_critico):
+            return select(
+                niveles.c.producto_id,
+                cast(literal(tipo, tipo_type), tipo_type),
+                cast(literal(EstadoAlerta.PENDIENTE, estado_type), estado_type),
+                literal(titulo, String) + producto_txt,
+                mensaje,
+                literal(prioridad),
+                niveles.c.stock_actual,
+                stock_minimo,
+                stock_critico,
+                literal(ahora)
+            ).where(condicion)
+        
+        candidatas = union_all(
+            _alertas(
+                TipoAlertaInventario.STOCK_BAJO,
+                "Stock bajo - Producto ",
+                literal("El producto tiene stock bajo. Actual: ", String) + actual_txt
+                + literal(", Mínimo: ", String) + cast(niveles.c.stock_minimo, String),
+                2,
+                and_(niveles.c.alerta_stock_bajo == True, niveles.c.stock_actual <= niveles.c.stock_minimo),
+                niveles.c.stock_minimo,
+                cast(null(), Float)
+            ),
+            _alertas(
+                TipoAlertaInventario.STOCK_CRITICO,
+                "Stock crítico - Producto ",
+                literal("El producto tiene stock crítico. Actual: ", String) + actual_txt
+                + literal(", Crítico: ", String) + cast(niveles.c.stock_critico, String),
+                1,
+                and_(niveles.c.alerta_stock_critico == True, niveles.c.stock_actual <= niveles.c.stock_critico),
+                cast(null(), Float),
+                niveles.c.stock_critico
+            ),
+            _alertas(
+                TipoAlertaInventario.STOCK_AGOTADO,
+                "Stock agotado - Producto ",
+                literal("El producto se ha agotado completamente", String),
+                1,
+                niveles.c.stock_actual <= 0,
+                cast(null(), Float),
+                cast(null(), Float)
             )
-        ).first()
-        
-        if alerta_existente:
-            return
-        
-        alerta = AlertaInventario(
-            producto_id=producto_id,
-            tipo=TipoAlertaInventario.STOCK_CRITICO,
-            titulo=f"Stock crítico - Producto {producto_id}",
-            mensaje=f"El producto tiene stock crítico. Actual: {stock_actual}, Crítico: {stock_critico}",
-            prioridad=1,
-            stock_actual=stock_actual,
-            stock_critico=stock_critico
         )
         
-        db.add(alerta)
+        stmt = dialect_insert(db, AlertaInventario).from_select(
+            [
+                "producto_id", "tipo", "estado", "titulo", "mensaje", "prioridad",
+                "stock_actual", "stock_minimo", "stock_critico", "fecha_creacion"
+            ],
+            candidatas
+        ).on_conflict_do_nothing().returning(AlertaInventario.id)
+        
+        creadas = [alerta_id for (alerta_id,) in db.execute(stmt).fetchall()]
         db.commit()
+        publicar_alertas(db, creadas)
+        return len(creadas)
     
     @staticmethod
-    def _crear_alerta_stock_agotado(db: Session, producto_id: int):
-        """Crea alerta de stock agotado"""
-        alerta_existente = db.query(AlertaInventario).filter(
-            and_(
-                AlertaInventario.producto_id == producto_id,
-                AlertaInventario.tipo == TipoAlertaInventario.STOCK_AGOTADO,
-                AlertaInventario.estado == EstadoAlerta.PENDIENTE
-            )
-        ).first()
-        
-        if alerta_existente:
-            return
-        
-        alerta = AlertaInventario(
-            producto_id=producto_id,
-            tipo=TipoAlertaInventario.STOCK_AGOTADO,
-            titulo=f"Stock agotado - Producto {producto_id}",
-            mensaje="El producto se ha agotado completamente",
-            prioridad=1,
-            stock_actual=0.0
-        )
-        
-        db.add(alerta)
-        db.commit()
+    def _verificar_alertas_stock(db: Session, producto_id: int) -> int:
+        """Verifica si se deben crear alertas de stock para un producto"""
+        return InventarioService._insertar_alertas_stock(db, producto_id)
     
     @staticmethod
     def obtener_alertas(
@@ -351,11 +399,157 @@ class InventarioService:
             productos_agotados=productos_agotados,
             alertas_pendientes=alertas_pendientes,
             alertas_urgentes=alertas_urgentes,
-            valor_total_inventario=0.0,  # Se calcularía con precios
+            valor_total_inventario=costo_service.valor_inventario(db)["valor_fifo"],
             movimientos_hoy=movimientos_hoy,
             reordenes_pendientes=reordenes_pendientes
         )
     
+    @staticmethod
+    def _segundos_entre(db: Session, desde, hasta):
+        """Diferencia en segundos entre dos columnas DateTime, según el dialecto"""
+        if db.get_bind().dialect.name == "sqlite":
+            return (func.julianday(hasta) - func.julianday(desde)) * 86400.0
+        return func.extract("epoch", hasta - desde)
+    
+    @staticmethod
+    def obtener_estadisticas(db: Session) -> InventarioEstadisticas:
+        """Estadísticas del inventario (cacheadas por INVENTARIO_ESTADISTICAS_TTL_SEGUNDOS)"""
+        return _cache_estadisticas.get_or_set(
+            "estadisticas", lambda: InventarioService._calcular_estadisticas(db)
+        )
+    
+    @staticmethod
+    def _calcular_estadisticas(db: Session) -> InventarioEstadisticas:
+        """
+        Calcula las estadísticas con un puñado de agregados agrupados (FILTER para
+        obtener varias métricas por pasada). Movimientos y tendencias se limitan a la
+        ventana configurada, así el costo no crece con el histórico.
+        """
+        from app.models.producto_model import Producto
+        
+        ahora = datetime.utcnow()
+        desde = ahora - timedelta(days=settings.INVENTARIO_ESTADISTICAS_VENTANA_DIAS)
+        inicio_mes = ahora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        
+        # 1) Conteos generales
+        total_productos, productos_configurados = db.execute(select(
+            select(func.count(Producto.id)).scalar_subquery(),
+            select(func.count(ConfiguracionInventario.id))
+            .where(ConfiguracionInventario.activo == True).scalar_subquery()
+        )).one()
+        
+        # 2) Valor del inventario (FIFO) por situación de stock
+        cantidad = CostoProducto.cantidad
+        minimo = ConfiguracionInventario.stock_minimo
+        maximo = ConfiguracionInventario.stock_maximo
+        configurado = ConfiguracionInventario.id.isnot(None)
+        valores = db.query(
+            func.coalesce(func.sum(CostoProducto.valor_fifo).filter(~configurado), 0.0),
+            func.coalesce(func.sum(CostoProducto.valor_fifo).filter(configurado, cantidad <= minimo), 0.0),
+            func.coalesce(func.sum(CostoProducto.valor_fifo).filter(
+                configurado, cantidad > minimo, or_(maximo.is_(None), cantidad <= maximo)
+            ), 0.0),
+            func.coalesce(func.sum(CostoProducto.valor_fifo).filter(configurado, cantidad > maximo), 0.0)
+        ).select_from(CostoProducto).outerjoin(
+            ConfiguracionInventario,
+            and_(
+                ConfiguracionInventario.producto_id == CostoProducto.producto_id,
+                ConfiguracionInventario.activo == True
+            )
+        ).one()
+        valor_por_categoria = {
+            categoria: round(float(valor), 2)
+            for categoria, valor in zip(("sin_configuracion", "stock_bajo", "normal", "sobre_stock"), valores)
+        }
+        
+        # 3) Alertas: pendientes por tipo + resueltas en el mes y su demora
+        resuelta_mes = and_(
+            AlertaInventario.estado == EstadoAlerta.RESUELTA,
+            AlertaInventario.fecha_resolucion >= inicio_mes
+        )
+        alertas = db.query(
+            AlertaInventario.tipo,
+            func.count(AlertaInventario.id).filter(AlertaInventario.estado == EstadoAlerta.PENDIENTE).label("pendientes"),
+            func.count(AlertaInventario.id).filter(resuelta_mes).label("resueltas"),
+            func.sum(InventarioService._segundos_entre(
+                db, AlertaInventario.fecha_creacion, AlertaInventario.fecha_resolucion
+            )).filter(resuelta_mes).label("segundos")
+        ).filter(
+            or_(AlertaInventario.estado == EstadoAlerta.PENDIENTE, AlertaInventario.fecha_resolucion >= inicio_mes)
+        ).group_by(AlertaInventario.tipo).all()
+        
+        alertas_por_tipo = {
+            getattr(a.tipo, "value", a.tipo): int(a.pendientes) for a in alertas if a.pendientes
+        }
+        alertas_resueltas_mes = sum(int(a.resueltas) for a in alertas)
+        segundos_resolucion = sum(float(a.segundos or 0.0) for a in alertas)
+        tiempo_promedio_resolucion = (
+            round(segundos_resolucion / alertas_resueltas_mes / 3600.0, 2) if alertas_resueltas_mes else 0.0
+        )
+        
+        # 4) Movimientos de inventario por tipo (ventana)
+        movimientos_por_tipo = {
+            tipo: int(cantidad_tipo)
+            for tipo, cantidad_tipo in db.query(
+                MovimientoInventario.tipo_movimiento,
+                func.count(MovimientoInventario.id)
+            ).filter(
+                MovimientoInventario.fecha_movimiento >= desde
+            ).group_by(MovimientoInventario.tipo_movimiento).all()
+        }
+        
+        # 5) Tendencia diaria de entradas/salidas del ledger (ventana)
+        es_entrada = StockMovimiento.tipo == "IN"
+        dia = func.date(StockMovimiento.fecha)
+        tendencia_stock = [
+            {
+                "fecha": str(t.dia),
+                "entradas": round(float(t.entradas), 2),
+                "salidas": round(float(t.salidas), 2),
+                "neto": round(float(t.entradas) - float(t.salidas), 2)
+            }
+            for t in db.query(
+                dia.label("dia"),
+                func.coalesce(func.sum(StockMovimiento.cantidad).filter(es_entrada), 0.0).label("entradas"),
+                func.coalesce(func.sum(StockMovimiento.cantidad).filter(~es_entrada), 0.0).label("salidas")
+            ).filter(StockMovimiento.fecha >= desde).group_by(dia).order_by(dia).all()
+        ]
+        
+        # 6) Productos más movidos (ventana)
+        movimientos = func.count(StockMovimiento.id)
+        productos_mas_movidos = [
+            {
+                "producto_id": p.producto_id,
+                "producto_nombre": p.nombre,
+                "movimientos": int(p.movimientos),
+                "entradas": round(float(p.entradas), 2),
+                "salidas": round(float(p.salidas), 2)
+            }
+            for p in db.query(
+                StockMovimiento.producto_id,
+                Producto.nombre,
+                movimientos.label("movimientos"),
+                func.coalesce(func.sum(StockMovimiento.cantidad).filter(es_entrada), 0.0).label("entradas"),
+                func.coalesce(func.sum(StockMovimiento.cantidad).filter(~es_entrada), 0.0).label("salidas")
+            ).join(Producto, Producto.id == StockMovimiento.producto_id)
+             .filter(StockMovimiento.fecha >= desde)
+             .group_by(StockMovimiento.producto_id, Producto.nombre)
+             .order_by(desc(movimientos))
+             .limit(10).all()
+        ]
+        
+        return InventarioEstadisticas(
+            total_productos=int(total_productos),
+            productos_configurados=int(productos_configurados),
+            alertas_por_tipo=alertas_por_tipo,
+            movimientos_por_tipo=movimientos_por_tipo,
+            valor_inventario_por_categoria=valor_por_categoria,
+            productos_mas_movidos=productos_mas_movidos,
+            tendencia_stock=tendencia_stock,
+            alertas_resueltas_mes=alertas_resueltas_mes,
+            tiempo_promedio_resolucion=tiempo_promedio_resolucion
+        )
+    
     @staticmethod
     def generar_reorden_automatico(
         db: Session,
@@ -372,11 +566,8 @@ class InventarioService:
         if not configuracion or not configuracion.punto_reorden:
             return None
         
-        # Obtener stock actual
-        from app.models.producto_model import Producto
-        producto = db.query(Producto).filter(Producto.id == producto_id).first()
-        
-        if not producto or (producto.stock or 0) > configuracion.punto_reorden:
+        # Stock actual desde el saldo denormalizado
+        if stock_actual(db, producto_id) > configuracion.punto_reorden:
             return None
         
         # Verificar si ya existe un reorden pendiente
@@ -405,23 +596,212 @@ class InventarioService:
         return reorden
     
     @staticmethod
-    def procesar_alertas_pendientes(db: Session) -> int:
-        """Procesa todas las alertas pendientes del sistema"""
-        alertas_procesadas = 0
+    def _ventas_por_dia(db: Session, desde: date) -> List[Any]:
+        """Salidas por venta agrupadas por (producto, día) desde la fecha dada (una sola consulta)"""
+        dia = func.date(StockMovimiento.fecha)
+        return db.query(
+            StockMovimiento.producto_id,
+            dia.label("dia"),
+            func.sum(StockMovimiento.cantidad).label("cantidad")
+        ).filter(
+            StockMovimiento.tipo == "OUT",
+            StockMovimiento.motivo == "VENTA",
+            StockMovimiento.fecha >= desde
+        ).group_by(StockMovimiento.producto_id, dia).all()
+    
+    @staticmethod
+    def _demanda_diaria(filas: List[Any], producto_ids: np.ndarray, desde: date, dias: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Media y desvío de la demanda diaria de cada producto de `producto_ids` (ordenado).
+        Los días sin ventas cuentan como 0.
+        """
+        matriz = np.zeros((len(producto_ids), dias))
+        if filas:
+            pids = np.array([f.producto_id for f in filas])
+            # SQLite devuelve el día como texto, PostgreSQL como date
+            offsets = np.array([
+                ((date.fromisoformat(f.dia) if isinstance(f.dia, str) else f.dia) - desde).days
+                for f in filas
+            ])
+            filas_idx = np.searchsorted(producto_ids, pids)
+            validos = (
+                (filas_idx < len(producto_ids))
+                & (producto_ids[np.minimum(filas_idx, len(producto_ids) - 1)] == pids)
+                & (offsets >= 0) & (offsets < dias)
+            )
+            np.add.at(
+                matriz,
+                (filas_idx[validos], offsets[validos]),
+                np.array([float(f.cantidad) for f in filas])[validos]
+            )
         
-        # Obtener configuraciones activas
-        configuraciones = db.query(ConfiguracionInventario).filter(
-            ConfiguracionInventario.activo == True
+        desvio = matriz.std(axis=1, ddof=1) if dias > 1 else np.zeros(len(producto_ids))
+        return matriz.mean(axis=1), desvio
+    
+    @staticmethod
+    def _ultima_compra_por_producto(db: Session) -> Dict[int, Tuple[Optional[int], Optional[float]]]:
+        """(proveedor_id, costo_unitario) de la compra más reciente de cada producto"""
+        orden = func.row_number().over(
+            partition_by=CompraItem.producto_id,
+            order_by=(desc(Compra.fecha), desc(Compra.id))
+        ).label("orden")
+        ultimas = select(
+            CompraItem.producto_id,
+            Compra.proveedor_id,
+            CompraItem.costo_unitario,
+            orden
+        ).join(Compra, Compra.id == CompraItem.compra_id).subquery()
+        
+        filas = db.execute(
+            select(ultimas.c.producto_id, ultimas.c.proveedor_id, ultimas.c.costo_unitario)
+            .where(ultimas.c.orden == 1)
         ).all()
+        return {f.producto_id: (f.proveedor_id, f.costo_unitario) for f in filas}
+    
+    @staticmethod
+    def generar_reordenes_masivos(db: Session) -> Dict[str, Any]:
+        """
+        Genera los reordenes de todos los productos en una pasada:
+        - demanda diaria (media y desvío) de la ventana configurada
+        - stock de seguridad = z * σ * √L, punto de reorden = μ * L + SS
+        - cantidad = EOQ = √(2 * D * S / H), como mínimo lo necesario para volver al punto de reorden
+        Sin historia de ventas se usan punto_reorden / cantidad_reorden de la configuración.
+        Con usar_clasificacion, z y el punto de reorden fijo dependen de la clase ABC/XYZ.
+        Todos los reordenes se insertan en un solo INSERT, agrupados por proveedor.
+        """
+        ahora = datetime.utcnow()
+        dias = settings.REORDEN_VENTANA_DIAS
+        lead_time = settings.REORDEN_LEAD_TIME_DIAS
+        desde = ahora.date() - timedelta(days=dias - 1)
+        
+        # Universo: productos con configuración activa o con ventas en la ventana
+        configs = {
+            c.producto_id: c
+            for c in db.query(ConfiguracionInventario).all()
+        }
+        clasificaciones = {
+            c.producto_id: c
+            for c in db.query(ProductoClasificacion).filter(
+                ProductoClasificacion.producto_id.in_(
+                    [pid for pid, c in configs.items() if c.activo and c.usar_clasificacion]
+                )
+            ).all()
+        }
+        ventas = InventarioService._ventas_por_dia(db, desde)
+        con_ventas = {f.producto_id for f in ventas}
+        universo = sorted(
+            {pid for pid, c in configs.items() if c.activo}
+            | {pid for pid in con_ventas if pid not in configs}
+        )
+        if not universo:
+            return {"generados": 0, "por_proveedor": []}
         
-        for config in configuraciones:
-            # Obtener stock actual del producto
-            from app.models.producto_model import Producto
-            producto = db.query(Producto).filter(Producto.id == config.producto_id).first()
-            
-            if producto:
-                stock_actual = producto.stock or 0.0
-                InventarioService._verificar_alertas_stock(db, config.producto_id, stock_actual)
-                alertas_procesadas += 1
+        producto_ids = np.array(universo)
+        media, desvio = InventarioService._demanda_diaria(ventas, producto_ids, desde, dias)
         
-        return alertas_procesadas
+        saldos = dict(db.query(StockSaldo.producto_id, StockSaldo.cantidad).filter(
+            StockSaldo.producto_id.in_(universo)
+        ).all())
+        pendientes = {
+            pid for (pid,) in db.query(ReordenAutomatico.producto_id).filter(
+                ReordenAutomatico.estado == "pendiente"
+            ).distinct()
+        }
+        compras = InventarioService._ultima_compra_por_producto(db)
+        
+        def _columna(valor):
+            return np.array([valor(pid) for pid in universo], dtype=float)
+        
+        stock = _columna(lambda pid: saldos.get(pid) or 0.0)
+        costo = _columna(lambda pid: compras.get(pid, (None, None))[1] or 0.0)
+        rop_config = _columna(lambda pid: (configs[pid].punto_reorden or 0.0) if pid in configs else 0.0)
+        
+        # Productos con usar_clasificacion: nivel de servicio y punto de reorden fijo según la clase
+        z_servicio = _columna(
+            lambda pid: Z_SERVICIO_ABC[clasificaciones[pid].clase_abc]
+            if pid in clasificaciones else settings.REORDEN_NIVEL_SERVICIO_Z
+        )
+        rop_config = rop_config * _columna(
+            lambda pid: FACTOR_STOCK_ABC[clasificaciones[pid].clase_abc] * FACTOR_STOCK_XYZ[clasificaciones[pid].clase_xyz]
+            if pid in clasificaciones else 1.0
+        )
+        cantidad_config = _columna(
+            lambda pid: (configs[pid].cantidad_reorden or configs[pid].stock_minimo * 2) if pid in configs else 0.0
+        )
+        ya_pendiente = np.array([pid in pendientes for pid in universo])
+        
+        # Punto de reorden con stock de seguridad
+        stock_seguridad = z_servicio * desvio * np.sqrt(lead_time)
+        con_demanda = media > 0
+        punto_reorden = np.where(con_demanda, media * lead_time + stock_seguridad, rop_config)
+        
+        # Cantidad económica de pedido
+        demanda_anual = media * 365
+        costo_mantenimiento = costo * settings.REORDEN_COSTO_MANTENIMIENTO_ANUAL
+        usa_eoq = con_demanda & (costo_mantenimiento > 0)
+        eoq = np.sqrt(
+            2 * demanda_anual * settings.REORDEN_COSTO_PEDIDO
+            / np.where(usa_eoq, costo_mantenimiento, 1.0)
+        )
+        cantidad = np.where(usa_eoq, eoq, np.where(con_demanda, media * lead_time, cantidad_config))
+        cantidad = np.ceil(np.maximum(cantidad, punto_reorden - stock))
+        
+        generar = (stock <= punto_reorden) & (punto_reorden > 0) & (cantidad > 0) & ~ya_pendiente
+        
+        filas = []
+        for i in np.flatnonzero(generar):
+            pid = universo[i]
+            proveedor_id = compras.get(pid, (None, None))[0]
+            filas.append({
+                "producto_id": pid,
+                "proveedor_id": proveedor_id,
+                "cantidad_sugerida": float(cantidad[i]),
+                "costo_estimado": round(float(cantidad[i] * costo[i]), 2) if costo[i] > 0 else None,
+                "fecha_sugerida": ahora,
+                "estado": "pendiente",
+                "fecha_creacion": ahora,
+                "notas": (
+                    f"Reorden por demanda: {media[i]:.2f}/día (σ {desvio[i]:.2f}), "
+                    f"punto de reorden {punto_reorden[i]:.1f}, stock {stock[i]:.1f}"
+                    if con_demanda[i] else "Reorden automático generado por sistema"
+                )
+            })
+        
+        if not filas:
+            return {"generados": 0, "por_proveedor": []}
+        
+        # Agrupados por proveedor (sin proveedor al final)
+        filas.sort(key=lambda f: (f["proveedor_id"] is None, f["proveedor_id"] or 0, f["producto_id"]))
+        db.execute(ReordenAutomatico.__table__.insert(), filas)
+        db.commit()
+        
+        por_proveedor: Dict[Optional[int], Dict[str, Any]] = {}
+        for f in filas:
+            grupo = por_proveedor.setdefault(
+                f["proveedor_id"],
+                {"proveedor_id": f["proveedor_id"], "reordenes": 0, "costo_estimado": 0.0}
+            )
+            grupo["reordenes"] += 1
+            grupo["costo_estimado"] = round(grupo["costo_estimado"] + (f["costo_estimado"] or 0.0), 2)
+        
+        return {"generados": len(filas), "por_proveedor": list(por_proveedor.values())}
+    
+    @staticmethod
+    def procesar_alertas_pendientes(db: Session) -> int:
+        """
+        Barrido de alertas de stock de todo el sistema en un único INSERT ... SELECT.
+        Devuelve la cantidad de alertas nuevas creadas.
+        """
+        return InventarioService._insertar_alertas_stock(db)
+
+
+def procesar_alertas_programadas() -> int:
+    """Job del scheduler: barrido de alertas con su propia sesión"""
+    with SessionLocal() as db:
+        return InventarioService.procesar_alertas_pendientes(db)
+
+
+def generar_reordenes_programados() -> Dict[str, Any]:
+    """Job nocturno del scheduler: reordenes por demanda con su propia sesión"""
+    with SessionLocal() as db:
+        return InventarioService.generar_reordenes_masivos(db)
@@ -1,18 +1,253 @@
 # app/services/notificacion_service.py
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc
+from sqlalchemy import and_, or_, not_, func, desc, update, delete, select, literal, cast, case
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import Iterable, List, Optional, Dict, Any
 import json
 
-from app.models.notificacion_model import Notificacion, NotificacionUsuario, TipoNotificacion, EstadoNotificacion
+from app.core.settings import settings
+
+from app.db.upsert import dialect_insert
+from app.models.notificacion_model import (
+    Notificacion, NotificacionUsuario, NotificacionNoLeidas, NotificacionGlobalLectura,
+    TipoNotificacion, EstadoNotificacion
+)
+from app.models.user_model import User
+from app.services.evento_service import publicar_notificacion
 from app.schemas.notificacion_schema import (
     NotificacionCreate, NotificacionUpdate, NotificacionResumen, 
     NotificacionFiltros, NotificacionStats, NotificacionTemplate
 )
 
+# Estados que cuentan como "no leída"
+ESTADOS_NO_LEIDA = (EstadoNotificacion.PENDIENTE, EstadoNotificacion.ENVIADA)
+
 class NotificacionService:
     
+    @staticmethod
+    def _ajustar_no_leidas(db: Session, usuario_id: Optional[int], delta: int) -> None:
+        """
+        Suma `delta` al contador de no leídas del usuario, en la misma transacción.
+        Las globales no tienen contador: se cuentan con la marca de lectura de cada usuario.
+        """
+        if not delta or usuario_id is None:
+            return
+        stmt = dialect_insert(db, NotificacionNoLeidas).values(
+            usuario_id=usuario_id,
+            no_leidas=max(delta, 0)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[NotificacionNoLeidas.usuario_id],
+            set_={"no_leidas": NotificacionNoLeidas.no_leidas + delta}
+        )
+        db.execute(stmt)
+    
+    @staticmethod
+    def contar_no_leidas(db: Session, usuario_id: int) -> int:
+        """
+        No leídas del usuario: las propias salen del contador (lectura por clave primaria)
+        y las globales de un rango sobre la marca de lectura del usuario.
+        """
+        propias = db.query(NotificacionNoLeidas.no_leidas).filter(
+            NotificacionNoLeidas.usuario_id == usuario_id
+        ).scalar() or 0
+        return propias + NotificacionService._globales_no_leidas(db, usuario_id)
+    
+    @staticmethod
+    def _marca_global(usuario_id: int):
+        """Marca de lectura de globales del usuario como subconsulta escalar (0 si no tiene)"""
+        return func.coalesce(
+            select(NotificacionGlobalLectura.ultima_leida_id)
+            .where(NotificacionGlobalLectura.usuario_id == usuario_id)
+            .scalar_subquery(),
+            0
+        )
+    
+    @staticmethod
+    def _leida_como_excepcion(usuario_id: int):
+        """EXISTS de la excepción 'leída' del usuario para la notificación de la consulta externa"""
+        return select(NotificacionUsuario.id).where(
+            NotificacionUsuario.usuario_id == usuario_id,
+            NotificacionUsuario.notificacion_id == Notificacion.id,
+            NotificacionUsuario.estado == EstadoNotificacion.LEIDA
+        ).exists()
+    
+    @staticmethod
+    def _global_leida_por(usuario_id: int):
+        """Notificación global, no leída en su fila, que el usuario ya leyó (por marca o excepción)"""
+        return and_(
+            Notificacion.usuario_id.is_(None),
+            Notificacion.estado.in_(ESTADOS_NO_LEIDA),
+            or_(
+                Notificacion.id <= NotificacionService._marca_global(usuario_id),
+                NotificacionService._leida_como_excepcion(usuario_id)
+            )
+        )
+    
+    @staticmethod
+    def _globales_no_leidas(db: Session, usuario_id: int) -> int:
+        """Globales no leídas por el usuario: rango id > marca menos las excepciones"""
+        return db.query(func.count(Notificacion.id)).filter(
+            Notificacion.usuario_id.is_(None),
+            Notificacion.id > NotificacionService._marca_global(usuario_id),
+            Notificacion.estado.in_(ESTADOS_NO_LEIDA),
+            not_(NotificacionService._leida_como_excepcion(usuario_id))
+        ).scalar()
+    
+    @staticmethod
+    def _marcar_globales_leidas(db: Session, usuario_id: int, condiciones: list) -> int:
+        """
+        Marca como leídas para el usuario las globales que cumplen `condiciones`, sin tocar
+        la fila compartida: un INSERT ... SELECT de excepciones por encima de la marca.
+        Después intenta avanzar la marca. Devuelve cuántas quedaron leídas.
+        """
+        estado_type = NotificacionUsuario.__table__.c.estado.type
+        seleccion = select(
+            Notificacion.id,
+            literal(usuario_id),
+            cast(literal(EstadoNotificacion.LEIDA, estado_type), estado_type),
+            literal(datetime.utcnow())
+        ).where(
+            *condiciones,
+            Notificacion.usuario_id.is_(None),
+            Notificacion.id > NotificacionService._marca_global(usuario_id),
+            Notificacion.estado.in_(ESTADOS_NO_LEIDA),
+            not_(NotificacionService._leida_como_excepcion(usuario_id))
+        )
+        stmt = dialect_insert(db, NotificacionUsuario).from_select(
+            ["notificacion_id", "usuario_id", "estado", "fecha_lectura"], seleccion
+        ).on_conflict_do_nothing().returning(NotificacionUsuario.notificacion_id)
+        
+        marcadas = len(db.execute(stmt).fetchall())
+        if marcadas:
+            NotificacionService._avanzar_marca_global(db, usuario_id)
+        return marcadas
+    
+    @staticmethod
+    def _tope_marca_global(db: Session) -> int:
+        """
+        Hasta dónde puede llegar una marca de lectura: la última global creada hace más de
+        NOTIFICACIONES_MARGEN_MARCA_SEGUNDOS. Los ids se asignan al insertar y no al confirmar,
+        así que una global con id menor que todavía no se ve podría aparecer después; si la
+        marca la cubriera quedaría leída sin que nadie la viera. Por encima del tope las
+        lecturas quedan como excepciones.
+        """
+        limite = datetime.utcnow() - timedelta(seconds=settings.NOTIFICACIONES_MARGEN_MARCA_SEGUNDOS)
+        return db.query(func.max(Notificacion.id)).filter(
+            Notificacion.usuario_id.is_(None),
+            Notificacion.fecha_creacion < limite
+        ).scalar() or 0
+    
+    @staticmethod
+    def _avanzar_marca_global(db: Session, usuario_id: int) -> None:
+        """
+        Lleva la marca hasta justo antes de la primera global que el usuario no leyó
+        (o hasta el tope si leyó todas) y borra las excepciones que quedan cubiertas.
+        Nunca pasa del tope (ver `_tope_marca_global`).
+        """
+        marca = db.query(NotificacionGlobalLectura.ultima_leida_id).filter(
+            NotificacionGlobalLectura.usuario_id == usuario_id
+        ).scalar() or 0
+        primera_no_leida = db.query(func.min(Notificacion.id)).filter(
+            Notificacion.usuario_id.is_(None),
+            Notificacion.id > marca,
+            Notificacion.estado.in_(ESTADOS_NO_LEIDA),
+            not_(NotificacionService._leida_como_excepcion(usuario_id))
+        ).scalar()
+        nueva = NotificacionService._tope_marca_global(db)
+        if primera_no_leida is not None:
+            nueva = min(nueva, primera_no_leida - 1)
+        if nueva > marca:
+            NotificacionService._fijar_marca_global(db, usuario_id, nueva)
+    
+    @staticmethod
+    def _fijar_marca_global(db: Session, usuario_id: int, nueva: int) -> None:
+        """Guarda la marca de lectura de globales y borra las excepciones que quedan cubiertas"""
+        ahora = datetime.utcnow()
+        stmt = dialect_insert(db, NotificacionGlobalLectura).values(
+            usuario_id=usuario_id, ultima_leida_id=nueva, fecha_actualizacion=ahora
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[NotificacionGlobalLectura.usuario_id],
+            set_={"ultima_leida_id": nueva, "fecha_actualizacion": ahora}
+        )
+        db.execute(stmt)
+        db.query(NotificacionUsuario).filter(
+            NotificacionUsuario.usuario_id == usuario_id,
+            NotificacionUsuario.notificacion_id <= nueva,
+            NotificacionUsuario.estado == EstadoNotificacion.LEIDA
+        ).delete(synchronize_session=False)
+    
+    @staticmethod
+    def recalcular_no_leidas(db: Session) -> int:
+        """Reconstruye los contadores desde `notificaciones` (por si se modificó la tabla por fuera)"""
+        filas = db.query(Notificacion.usuario_id, func.count().label('no_leidas'))\
+            .filter(Notificacion.usuario_id.isnot(None), Notificacion.estado.in_(ESTADOS_NO_LEIDA))\
+            .group_by(Notificacion.usuario_id).all()
+        
+        db.query(NotificacionNoLeidas).delete(synchronize_session=False)
+        db.add_all([NotificacionNoLeidas(usuario_id=f.usuario_id, no_leidas=f.no_leidas) for f in filas])
+        db.commit()
+        return len(filas)
+    
+    @staticmethod
+    def _descontar_no_leidas(db: Session, usuario_ids: Iterable[Optional[int]]) -> None:
+        """Descuenta una no leída por cada usuario_id (repetidos incluidos), una sentencia por usuario"""
+        for usuario_id, cantidad in Counter(u for u in usuario_ids if u is not None).items():
+            NotificacionService._ajustar_no_leidas(db, usuario_id, -cantidad)
+    
+    @staticmethod
+    def _condiciones(
+        usuario_id: Optional[int] = None,
+        filtros: Optional[NotificacionFiltros] = None,
+        notificacion_ids: Optional[List[int]] = None
+    ) -> list:
+        """Condiciones WHERE comunes a los listados y a las operaciones masivas"""
+        condiciones = []
+        
+        # Filtrar por usuario (notificaciones globales + del usuario)
+        if usuario_id:
+            condiciones.append(or_(
+                Notificacion.usuario_id == usuario_id,
+                Notificacion.usuario_id.is_(None)  # Notificaciones globales
+            ))
+        
+        if notificacion_ids is not None:
+            condiciones.append(Notificacion.id.in_(notificacion_ids))
+        
+        # Aplicar filtros adicionales
+        if filtros:
+            if filtros.tipo:
+                condiciones.append(Notificacion.tipo == filtros.tipo)
+            if filtros.estado and usuario_id and filtros.estado in ESTADOS_NO_LEIDA:
+                # Las globales que el usuario ya leyó no cuentan como pendientes
+                condiciones.append(and_(
+                    Notificacion.estado == filtros.estado,
+                    not_(NotificacionService._global_leida_por(usuario_id))
+                ))
+            elif filtros.estado == EstadoNotificacion.LEIDA and usuario_id:
+                condiciones.append(or_(
+                    Notificacion.estado == EstadoNotificacion.LEIDA,
+                    NotificacionService._global_leida_por(usuario_id)
+                ))
+            elif filtros.estado:
+                condiciones.append(Notificacion.estado == filtros.estado)
+            if filtros.es_urgente is not None:
+                condiciones.append(Notificacion.es_urgente == filtros.es_urgente)
+            if filtros.fecha_desde:
+                condiciones.append(Notificacion.fecha_creacion >= filtros.fecha_desde)
+            if filtros.fecha_hasta:
+                condiciones.append(Notificacion.fecha_creacion <= filtros.fecha_hasta)
+        
+        return condiciones
+    
+    @staticmethod
+    def _exigir_seleccion(condiciones: list) -> None:
+        """Las operaciones masivas nunca actúan sobre toda la tabla: sin IDs ni filtros, ValueError"""
+        if not condiciones:
+            raise ValueError("Indicar notificacion_ids o al menos un filtro")
+    
     @staticmethod
     def crear_notificacion(db: Session, notificacion: NotificacionCreate) -> Notificacion:
         """Crea una nueva notificación"""
@@ -35,8 +270,10 @@ class NotificacionService:
         )
         
         db.add(db_notificacion)
+        NotificacionService._ajustar_no_leidas(db, notificacion.usuario_id, 1)
         db.commit()
         db.refresh(db_notificacion)
+        publicar_notificacion(db_notificacion)
         
         return db_notificacion
     
@@ -49,31 +286,27 @@ class NotificacionService:
         limit: int = 100
     ) -> List[Notificacion]:
         """Obtiene notificaciones con filtros"""
-        query = db.query(Notificacion)
+        query = db.query(Notificacion).filter(*NotificacionService._condiciones(usuario_id, filtros))
+        notificaciones = query.order_by(desc(Notificacion.fecha_creacion)).offset(skip).limit(limit).all()
         
-        # Filtrar por usuario (notificaciones globales + del usuario)
         if usuario_id:
-            query = query.filter(
-                or_(
-                    Notificacion.usuario_id == usuario_id,
-                    Notificacion.usuario_id.is_(None)  # Notificaciones globales
-                )
-            )
-        
-        # Aplicar filtros adicionales
-        if filtros:
-            if filtros.tipo:
-                query = query.filter(Notificacion.tipo == filtros.tipo)
-            if filtros.estado:
-                query = query.filter(Notificacion.estado == filtros.estado)
-            if filtros.es_urgente is not None:
-                query = query.filter(Notificacion.es_urgente == filtros.es_urgente)
-            if filtros.fecha_desde:
-                query = query.filter(Notificacion.fecha_creacion >= filtros.fecha_desde)
-            if filtros.fecha_hasta:
-                query = query.filter(Notificacion.fecha_creacion <= filtros.fecha_hasta)
-        
-        return query.order_by(desc(Notificacion.fecha_creacion)).offset(skip).limit(limit).all()
+            NotificacionService._aplicar_lectura_global(db, usuario_id, notificaciones)
+        return notificaciones
+    
+    @staticmethod
+    def _aplicar_lectura_global(db: Session, usuario_id: int, notificaciones: List[Notificacion]) -> None:
+        """Muestra como leídas las globales que el usuario ya leyó (sin modificar la fila compartida)"""
+        ids = [n.id for n in notificaciones if n.usuario_id is None and n.estado in ESTADOS_NO_LEIDA]
+        if not ids:
+            return
+        leidas = {id_ for (id_,) in db.query(Notificacion.id).filter(
+            Notificacion.id.in_(ids),
+            NotificacionService._global_leida_por(usuario_id)
+        ).all()}
+        for notificacion in notificaciones:
+            if notificacion.id in leidas:
+                db.expunge(notificacion)
+                notificacion.estado = EstadoNotificacion.LEIDA
     
     @staticmethod
     def obtener_notificacion(db: Session, notificacion_id: int) -> Optional[Notificacion]:
@@ -84,7 +317,8 @@ class NotificacionService:
     def actualizar_notificacion(
         db: Session, 
         notificacion_id: int, 
-        notificacion_update: NotificacionUpdate
+        notificacion_update: NotificacionUpdate,
+        usuario_id: Optional[int] = None
     ) -> Optional[Notificacion]:
         """Actualiza una notificación"""
         db_notificacion = db.query(Notificacion).filter(Notificacion.id == notificacion_id).first()
@@ -92,6 +326,17 @@ class NotificacionService:
         if not db_notificacion:
             return None
         
+        # Leer una global es por usuario: no se toca la fila compartida
+        if (usuario_id and db_notificacion.usuario_id is None
+                and notificacion_update.estado == EstadoNotificacion.LEIDA):
+            NotificacionService._marcar_globales_leidas(db, usuario_id, [Notificacion.id == notificacion_id])
+            db.commit()
+            db.refresh(db_notificacion)
+            NotificacionService._aplicar_lectura_global(db, usuario_id, [db_notificacion])
+            return db_notificacion
+        
+        no_leida_antes = db_notificacion.estado in ESTADOS_NO_LEIDA
+        
         if notificacion_update.estado:
             db_notificacion.estado = notificacion_update.estado
             
@@ -106,6 +351,9 @@ class NotificacionService:
         if notificacion_update.fecha_lectura:
             db_notificacion.fecha_lectura = notificacion_update.fecha_lectura
         
+        no_leida_ahora = db_notificacion.estado in ESTADOS_NO_LEIDA
+        NotificacionService._ajustar_no_leidas(db, db_notificacion.usuario_id, int(no_leida_ahora) - int(no_leida_antes))
+        
         db.commit()
         db.refresh(db_notificacion)
         
@@ -123,18 +371,60 @@ class NotificacionService:
         if usuario_id and db_notificacion.usuario_id and db_notificacion.usuario_id != usuario_id:
             return False
         
-        db_notificacion.estado = EstadoNotificacion.LEIDA
-        db_notificacion.fecha_lectura = datetime.utcnow()
+        # Global: se registra la lectura del usuario, la fila compartida no cambia
+        if usuario_id and db_notificacion.usuario_id is None:
+            NotificacionService._marcar_globales_leidas(db, usuario_id, [Notificacion.id == notificacion_id])
+            db.commit()
+            return True
+        
+        # UPDATE condicional: sólo descuenta si esta llamada fue la que la marcó como leída
+        marcadas = db.query(Notificacion).filter(
+            Notificacion.id == notificacion_id,
+            Notificacion.estado.in_(ESTADOS_NO_LEIDA)
+        ).update(
+            {Notificacion.estado: EstadoNotificacion.LEIDA, Notificacion.fecha_lectura: datetime.utcnow()},
+            synchronize_session=False
+        )
+        NotificacionService._ajustar_no_leidas(db, db_notificacion.usuario_id, -marcadas)
         
         db.commit()
         return True
     
     @staticmethod
-    def obtener_resumen(db: Session, usuario_id: Optional[int] = None) -> NotificacionResumen:
-        """Obtiene resumen de notificaciones"""
-        query = db.query(Notificacion)
+    def _conteos(db: Session, usuario_id: Optional[int] = None, con_periodos: bool = False) -> Dict[str, Any]:
+        """
+        Conteos de notificaciones en una sola consulta: GROUP BY (tipo, estado) con
+        agregados condicionales para urgentes y, opcionalmente, por período de creación.
+        Con usuario, las globales que ya leyó se cuentan como leídas.
+        """
+        estado = Notificacion.estado
+        if usuario_id:
+            estado_type = Notificacion.__table__.c.estado.type
+            estado = case(
+                (NotificacionService._global_leida_por(usuario_id), literal(EstadoNotificacion.LEIDA, estado_type)),
+                else_=Notificacion.estado
+            )
+        columnas = [
+            Notificacion.tipo,
+            estado.label('estado'),
+            func.count().label('total'),
+            func.count().filter(Notificacion.es_urgente == True).label('urgentes'),
+        ]
+        if con_periodos:
+            # Rangos sobre fecha_creacion (sargables), no func.date(...)
+            hoy = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+            columnas += [
+                func.count().filter(and_(
+                    Notificacion.fecha_creacion >= hoy,
+                    Notificacion.fecha_creacion < hoy + timedelta(days=1)
+                )).label('hoy'),
+                func.count().filter(Notificacion.fecha_creacion >= hoy - timedelta(days=7)).label('semana'),
+                func.count().filter(Notificacion.fecha_creacion >= hoy - timedelta(days=30)).label('mes'),
+            ]
+        
+        query = db.query(*columnas)
         
-        # Filtrar por usuario
+        # Filtrar por usuario (notificaciones globales + del usuario)
         if usuario_id:
             query = query.filter(
                 or_(
@@ -143,75 +433,55 @@ class NotificacionService:
                 )
             )
         
-        # Contar totales
-        total = query.count()
-        pendientes = query.filter(Notificacion.estado == EstadoNotificacion.PENDIENTE).count()
-        leidas = query.filter(Notificacion.estado == EstadoNotificacion.LEIDA).count()
-        urgentes = query.filter(Notificacion.es_urgente == True).count()
-        
-        # Contar por tipo
-        por_tipo = {}
-        for tipo in TipoNotificacion:
-            count = query.filter(Notificacion.tipo == tipo).count()
-            por_tipo[tipo.value] = count
+        conteos = {
+            "total": 0, "urgentes": 0, "hoy": 0, "semana": 0, "mes": 0,
+            "por_estado": {estado.value: 0 for estado in EstadoNotificacion},
+            "por_tipo": {tipo.value: 0 for tipo in TipoNotificacion},
+        }
+        for fila in query.group_by(Notificacion.tipo, estado).all():
+            conteos["total"] += fila.total
+            conteos["urgentes"] += fila.urgentes
+            conteos["por_tipo"][fila.tipo.value] += fila.total
+            if fila.estado is not None:
+                conteos["por_estado"][fila.estado.value] += fila.total
+            if con_periodos:
+                conteos["hoy"] += fila.hoy
+                conteos["semana"] += fila.semana
+                conteos["mes"] += fila.mes
+        return conteos
+    
+    @staticmethod
+    def obtener_resumen(db: Session, usuario_id: Optional[int] = None) -> NotificacionResumen:
+        """Obtiene resumen de notificaciones (una sola consulta agrupada)"""
+        conteos = NotificacionService._conteos(db, usuario_id)
         
         return NotificacionResumen(
-            total=total,
-            pendientes=pendientes,
-            leidas=leidas,
-            urgentes=urgentes,
-            por_tipo=por_tipo
+            total=conteos["total"],
+            pendientes=conteos["por_estado"][EstadoNotificacion.PENDIENTE.value],
+            leidas=conteos["por_estado"][EstadoNotificacion.LEIDA.value],
+            urgentes=conteos["urgentes"],
+            por_tipo=conteos["por_tipo"]
         )
     
     @staticmethod
     def obtener_estadisticas(db: Session, usuario_id: Optional[int] = None) -> NotificacionStats:
-        """Obtiene estadísticas detalladas de notificaciones"""
-        query = db.query(Notificacion)
-        
-        # Filtrar por usuario
-        if usuario_id:
-            query = query.filter(
-                or_(
-                    Notificacion.usuario_id == usuario_id,
-                    Notificacion.usuario_id.is_(None)
-                )
-            )
-        
-        # Estadísticas básicas
-        total_notificaciones = query.count()
-        
-        # Notificaciones por período
-        hoy = datetime.utcnow().date()
-        semana_pasada = hoy - timedelta(days=7)
-        mes_pasado = hoy - timedelta(days=30)
-        
-        notificaciones_hoy = query.filter(func.date(Notificacion.fecha_creacion) == hoy).count()
-        notificaciones_semana = query.filter(Notificacion.fecha_creacion >= semana_pasada).count()
-        notificaciones_mes = query.filter(Notificacion.fecha_creacion >= mes_pasado).count()
+        """Obtiene estadísticas detalladas de notificaciones (una sola consulta agrupada)"""
+        conteos = NotificacionService._conteos(db, usuario_id, con_periodos=True)
         
         # Tasa de lectura
-        leidas = query.filter(Notificacion.estado == EstadoNotificacion.LEIDA).count()
+        total_notificaciones = conteos["total"]
+        leidas = conteos["por_estado"][EstadoNotificacion.LEIDA.value]
         tasa_lectura = (leidas / total_notificaciones * 100) if total_notificaciones > 0 else 0.0
         
-        # Por tipo
-        notificaciones_por_tipo = {}
-        for tipo in TipoNotificacion:
-            count = query.filter(Notificacion.tipo == tipo).count()
-            notificaciones_por_tipo[tipo.value] = count
-        
-        # Urgentes y pendientes
-        notificaciones_urgentes = query.filter(Notificacion.es_urgente == True).count()
-        notificaciones_pendientes = query.filter(Notificacion.estado == EstadoNotificacion.PENDIENTE).count()
-        
         return NotificacionStats(
             total_notificaciones=total_notificaciones,
-            notificaciones_hoy=notificaciones_hoy,
-            notificaciones_semana=notificaciones_semana,
-            notificaciones_mes=notificaciones_mes,
+            notificaciones_hoy=conteos["hoy"],
+            notificaciones_semana=conteos["semana"],
+            notificaciones_mes=conteos["mes"],
             tasa_lectura=round(tasa_lectura, 2),
-            notificaciones_por_tipo=notificaciones_por_tipo,
-            notificaciones_urgentes=notificaciones_urgentes,
-            notificaciones_pendientes=notificaciones_pendientes
+            notificaciones_por_tipo=conteos["por_tipo"],
+            notificaciones_urgentes=conteos["urgentes"],
+            notificaciones_pendientes=conteos["por_estado"][EstadoNotificacion.PENDIENTE.value]
         )
     
     @staticmethod
@@ -292,18 +562,203 @@ class NotificacionService:
         return NotificacionService.crear_notificacion(db, notificacion)
     
     @staticmethod
-    def limpiar_notificaciones_antiguas(db: Session, dias: int = 30) -> int:
-        """Limpia notificaciones antiguas (más de X días)"""
-        fecha_limite = datetime.utcnow() - timedelta(days=dias)
-        
-        # Solo eliminar notificaciones leídas y no urgentes
-        notificaciones_eliminadas = db.query(Notificacion).filter(
-            and_(
-                Notificacion.fecha_creacion < fecha_limite,
-                Notificacion.estado == EstadoNotificacion.LEIDA,
-                Notificacion.es_urgente == False
-            )
-        ).delete()
+    def eliminar_notificacion(db: Session, notificacion_id: int) -> bool:
+        """Elimina una notificación (descontándola de las no leídas si correspondía)"""
+        db_notificacion = db.query(Notificacion).filter(Notificacion.id == notificacion_id).first()
+        if not db_notificacion:
+            return False
         
+        if db_notificacion.estado in ESTADOS_NO_LEIDA:
+            NotificacionService._ajustar_no_leidas(db, db_notificacion.usuario_id, -1)
+        db.delete(db_notificacion)
+        db.commit()
+        return True
+    
+    @staticmethod
+    def marcar_leidas_bulk(
+        db: Session,
+        usuario_id: Optional[int],
+        notificacion_ids: Optional[List[int]] = None,
+        filtros: Optional[NotificacionFiltros] = None
+    ) -> int:
+        """
+        Marca como leídas las notificaciones seleccionadas; devuelve cuántas cambió.
+        Las propias con un solo UPDATE y, si hay usuario, las globales con un solo
+        INSERT ... SELECT de lecturas (ver `_marcar_globales_leidas`).
+        """
+        if notificacion_ids is not None and not notificacion_ids:
+            return 0
+        # El alcance del usuario no cuenta como selección
+        NotificacionService._exigir_seleccion(NotificacionService._condiciones(None, filtros, notificacion_ids))
+        condiciones = NotificacionService._condiciones(usuario_id, filtros, notificacion_ids)
+        
+        stmt = update(Notificacion).where(
+            *condiciones,
+            Notificacion.estado.in_(ESTADOS_NO_LEIDA),
+            *([Notificacion.usuario_id.isnot(None)] if usuario_id else [])
+        ).values(
+            estado=EstadoNotificacion.LEIDA,
+            fecha_lectura=datetime.utcnow()
+        ).returning(Notificacion.usuario_id).execution_options(synchronize_session=False)
+        
+        usuarios = db.execute(stmt).scalars().all()
+        NotificacionService._descontar_no_leidas(db, usuarios)
+        globales = NotificacionService._marcar_globales_leidas(db, usuario_id, condiciones) if usuario_id else 0
+        db.commit()
+        return len(usuarios) + globales
+    
+    @staticmethod
+    def marcar_todas_leidas(db: Session, usuario_id: int) -> int:
+        """
+        Marca como leídas todas las notificaciones del usuario: un UPDATE de las propias
+        y, para las globales, la marca de lectura llevada directamente al tope (sin una fila
+        por notificación); las más recientes quedan como excepciones. Devuelve cuántas
+        quedaron leídas.
+        """
+        propias = db.execute(
+            update(Notificacion)
+            .where(Notificacion.usuario_id == usuario_id, Notificacion.estado.in_(ESTADOS_NO_LEIDA))
+            .values(estado=EstadoNotificacion.LEIDA, fecha_lectura=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        NotificacionService._ajustar_no_leidas(db, usuario_id, -propias)
+        
+        globales = NotificacionService._globales_no_leidas(db, usuario_id)
+        tope = NotificacionService._tope_marca_global(db)
+        marca = db.query(NotificacionGlobalLectura.ultima_leida_id).filter(
+            NotificacionGlobalLectura.usuario_id == usuario_id
+        ).scalar() or 0
+        if tope > marca:
+            NotificacionService._fijar_marca_global(db, usuario_id, tope)
+        NotificacionService._marcar_globales_leidas(db, usuario_id, [])
         db.commit()
-        return notificaciones_eliminadas
+        return propias + globales
+    
+    @staticmethod
+    def archivar_bulk(
+        db: Session,
+        usuario_id: Optional[int],
+        notificacion_ids: Optional[List[int]] = None,
+        filtros: Optional[NotificacionFiltros] = None,
+        incluir_globales: bool = False
+    ) -> int:
+        """
+        Archiva las notificaciones seleccionadas; devuelve cuántas cambió. Son dos UPDATE
+        en la misma transacción (no leídas y leídas) para saber cuánto descontar del contador.
+        Archivar una global cambia la fila compartida (para todos los usuarios): con usuario
+        sólo se archivan sus propias notificaciones, salvo `incluir_globales` (admins).
+        """
+        if notificacion_ids is not None and not notificacion_ids:
+            return 0
+        # El alcance del usuario no cuenta como selección
+        NotificacionService._exigir_seleccion(NotificacionService._condiciones(None, filtros, notificacion_ids))
+        if usuario_id and not incluir_globales:
+            condiciones = NotificacionService._condiciones(None, filtros, notificacion_ids)
+            condiciones.append(Notificacion.usuario_id == usuario_id)
+        else:
+            condiciones = NotificacionService._condiciones(usuario_id, filtros, notificacion_ids)
+        
+        usuarios = db.execute(
+            update(Notificacion)
+            .where(*condiciones, Notificacion.estado.in_(ESTADOS_NO_LEIDA))
+            .values(estado=EstadoNotificacion.ARCHIVADA)
+            .returning(Notificacion.usuario_id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        leidas = db.execute(
+            update(Notificacion)
+            .where(*condiciones, Notificacion.estado == EstadoNotificacion.LEIDA)
+            .values(estado=EstadoNotificacion.ARCHIVADA)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        
+        NotificacionService._descontar_no_leidas(db, usuarios)
+        db.commit()
+        return len(usuarios) + leidas
+    
+    @staticmethod
+    def eliminar_bulk(
+        db: Session,
+        notificacion_ids: Optional[List[int]] = None,
+        filtros: Optional[NotificacionFiltros] = None
+    ) -> int:
+        """
+        Elimina las notificaciones seleccionadas con un solo DELETE; devuelve cuántas borró.
+        ValueError si no hay IDs ni filtros (no borra toda la tabla).
+        """
+        if notificacion_ids is not None and not notificacion_ids:
+            return 0
+        condiciones = NotificacionService._condiciones(None, filtros, notificacion_ids)
+        if filtros and filtros.usuario_id:
+            condiciones.append(Notificacion.usuario_id == filtros.usuario_id)
+        NotificacionService._exigir_seleccion(condiciones)
+        
+        eliminadas = db.execute(
+            delete(Notificacion)
+            .where(*condiciones)
+            .returning(Notificacion.usuario_id, Notificacion.estado)
+            .execution_options(synchronize_session=False)
+        ).all()
+        
+        NotificacionService._descontar_no_leidas(
+            db, (usuario for usuario, estado in eliminadas if estado in ESTADOS_NO_LEIDA)
+        )
+        db.commit()
+        return len(eliminadas)
+    
+    @staticmethod
+    def _marca_minima_global(db: Session) -> int:
+        """Mayor id de global que ya leyeron todos los usuarios (0 si alguno no leyó ninguna)"""
+        return db.query(func.min(func.coalesce(NotificacionGlobalLectura.ultima_leida_id, 0))).select_from(User)\
+            .outerjoin(NotificacionGlobalLectura, NotificacionGlobalLectura.usuario_id == User.id).scalar() or 0
+    
+    @staticmethod
+    def _borrar_en_lotes(db: Session, condiciones: list, lote: int) -> int:
+        """Borra las notificaciones que cumplen `condiciones` (y sus lecturas por usuario), un lote por transacción"""
+        total = 0
+        while True:
+            ids = [id_ for (id_,) in db.query(Notificacion.id).filter(*condiciones).limit(lote).all()]
+            if not ids:
+                break
+            
+            db.query(NotificacionUsuario).filter(NotificacionUsuario.notificacion_id.in_(ids))\
+                .delete(synchronize_session=False)
+            total += db.query(Notificacion).filter(Notificacion.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+            if len(ids) < lote:
+                break
+        return total
+    
+    @staticmethod
+    def limpiar_notificaciones_antiguas(db: Session, dias: int = 30, lote: Optional[int] = None) -> int:
+        """
+        Limpia notificaciones antiguas (más de X días). Borra en lotes de `lote` filas,
+        cada uno en su transacción, para no mantener locks largos en purgas grandes.
+        - Propias: sólo leídas y no urgentes, así que los contadores de no leídas no cambian.
+        - Globales (su fila no cambia al leerlas): las no urgentes que ya leyeron todos los
+          usuarios y, sin importar la lectura, las de más de NOTIFICACIONES_GLOBALES_RETENCION_DIAS.
+        """
+        lote = lote or settings.NOTIFICACIONES_LOTE_LIMPIEZA
+        fecha_limite = datetime.utcnow() - timedelta(days=dias)
+        
+        total = NotificacionService._borrar_en_lotes(db, [
+            Notificacion.fecha_creacion < fecha_limite,
+            Notificacion.estado == EstadoNotificacion.LEIDA,
+            Notificacion.es_urgente == False
+        ], lote)
+        
+        total += NotificacionService._borrar_en_lotes(db, [
+            Notificacion.usuario_id.is_(None),
+            Notificacion.fecha_creacion < fecha_limite,
+            Notificacion.es_urgente == False,
+            Notificacion.id <= NotificacionService._marca_minima_global(db)
+        ], lote)
+        
+        retencion = settings.NOTIFICACIONES_GLOBALES_RETENCION_DIAS
+        if retencion > 0:
+            total += NotificacionService._borrar_en_lotes(db, [
+                Notificacion.usuario_id.is_(None),
+                Notificacion.fecha_creacion < datetime.utcnow() - timedelta(days=max(retencion, dias))
+            ], lote)
+        
+        return total
@@ -9,6 +9,7 @@ from app.models.precio_model import (
     PrecioProducto, PrecioVolumen, PrecioCategoria, PrecioEstacional,
     PrecioHistorial, PrecioAplicado, TipoPrecio, EstadoPrecio
 )
+from app.services.transicion_service import calcular_proxima_transicion
 from app.schemas.precio_schema import (
     PrecioProductoCreate, PrecioProductoUpdate,
     PrecioVolumenCreate, PrecioVolumenUpdate,
@@ -47,6 +48,8 @@ class PrecioService:
             prioridad=precio.prioridad,
             creado_por=creado_por
         )
+        db_precio.estado = EstadoPrecio.ACTIVO.value
+        PrecioService.programar_transicion(db_precio)
         
         db.add(db_precio)
         db.commit()
@@ -127,6 +130,7 @@ class PrecioService:
             setattr(db_precio, field, value)
         
         db_precio.fecha_actualizacion = datetime.utcnow()
+        PrecioService.programar_transicion(db_precio)
         
         db.commit()
         db.refresh(db_precio)
@@ -140,6 +144,59 @@ class PrecioService:
         
         return db_precio
     
+    @staticmethod
+    def programar_transicion(precio: PrecioProducto) -> None:
+        """Recalcula la próxima transición de estado según estado y fechas"""
+        precio.proxima_transicion = calcular_proxima_transicion(
+            precio.estado, precio.fecha_inicio, precio.fecha_fin
+        )
+    
+    @staticmethod
+    def actualizar_estados_precios(db: Session) -> int:
+        """
+        Aplica las transiciones de estado vencidas de precios de producto
+        (activo -> expirado, inactivo -> activo). Sólo recorre las filas con
+        `proxima_transicion <= ahora`.
+        """
+        ahora = datetime.utcnow()
+        vencidos = PrecioProducto.proxima_transicion <= ahora
+        
+        expirados = db.query(PrecioProducto).filter(
+            and_(
+                vencidos,
+                PrecioProducto.estado == EstadoPrecio.ACTIVO.value,
+                PrecioProducto.fecha_fin <= ahora
+            )
+        ).update({
+            PrecioProducto.estado: EstadoPrecio.EXPIRADO.value,
+            PrecioProducto.activo: False,
+            PrecioProducto.proxima_transicion: None
+        }, synchronize_session=False)
+        
+        activados = db.query(PrecioProducto).filter(
+            and_(
+                vencidos,
+                PrecioProducto.estado == EstadoPrecio.INACTIVO.value,
+                PrecioProducto.fecha_inicio <= ahora,
+                or_(
+                    PrecioProducto.fecha_fin.is_(None),
+                    PrecioProducto.fecha_fin > ahora
+                )
+            )
+        ).update({
+            PrecioProducto.estado: EstadoPrecio.ACTIVO.value,
+            PrecioProducto.activo: True,
+            PrecioProducto.proxima_transicion: PrecioProducto.fecha_fin
+        }, synchronize_session=False)
+        
+        db.query(PrecioProducto).filter(vencidos).update(
+            {PrecioProducto.proxima_transicion: None}, synchronize_session=False
+        )
+        
+        db.commit()
+        
+        return expirados + activados
+    
     # === PRECIOS POR VOLUMEN ===
     
     @staticmethod
@@ -1,13 +1,259 @@
+from typing import NamedTuple, Optional
+from sqlalchemy import and_, case, func, select
 from sqlalchemy.orm import Session
-from app.models.compra_model import StockMovimiento
+from app.core.settings import settings
+from app.db.upsert import dialect_insert
+from app.models.compra_model import StockMovimiento, StockSaldo, StockSaldoDeposito
+from app.models.deposito_model import Deposito
+from app.models.producto_model import Producto
 
-def stock_actual(db: Session, producto_id: int) -> float:
-    movs = (
-        db.query(StockMovimiento)
-        .filter(StockMovimiento.producto_id == producto_id)
+# Tolerancia para comparar saldos Float contra el ledger
+TOLERANCIA_CONSISTENCIA = 1e-6
+
+class Saldos(NamedTuple):
+    """Saldos resultantes de un movimiento: total del producto y del depósito afectado"""
+    total: float
+    deposito: float
+    movimiento: Optional[StockMovimiento] = None  # el movimiento agregado al ledger (sin flush)
+
+def _delta(tipo: str, cantidad: float) -> float:
+    return float(cantidad) if tipo == "IN" else -float(cantidad)
+
+def aplicar_delta_saldo(db: Session, producto_id: int, delta: float) -> float:
+    """
+    Suma `delta` al saldo del producto con un upsert atómico (el UPDATE toma el lock
+    de la fila, así que dos transacciones concurrentes no pisan el saldo).
+    Devuelve el saldo resultante. No hace commit.
+    """
+    stmt = dialect_insert(db, StockSaldo).values(producto_id=producto_id, cantidad=delta)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StockSaldo.producto_id],
+        set_={
+            "cantidad": StockSaldo.cantidad + stmt.excluded.cantidad,
+            "actualizado": func.now(),
+        },
+    ).returning(StockSaldo.cantidad)
+    return float(db.execute(stmt).scalar_one())
+
+def aplicar_delta_saldo_deposito(db: Session, deposito_id: int, producto_id: int, delta: float) -> float:
+    """Igual que aplicar_delta_saldo, sobre el saldo del producto en un depósito. No hace commit."""
+    stmt = dialect_insert(db, StockSaldoDeposito).values(
+        deposito_id=deposito_id, producto_id=producto_id, cantidad=delta
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StockSaldoDeposito.deposito_id, StockSaldoDeposito.producto_id],
+        set_={
+            "cantidad": StockSaldoDeposito.cantidad + stmt.excluded.cantidad,
+            "actualizado": func.now(),
+        },
+    ).returning(StockSaldoDeposito.cantidad)
+    return float(db.execute(stmt).scalar_one())
+
+def registrar_movimiento(
+    db: Session,
+    producto_id: int,
+    tipo: str,
+    cantidad: float,
+    motivo: str | None = None,
+    ref_tipo: str | None = None,
+    ref_id: int | None = None,
+    deposito_id: int | None = None,
+) -> Saldos:
+    """
+    Único punto de escritura del stock: agrega el movimiento al ledger y actualiza
+    el saldo total y el del depósito en la misma transacción. Sin depósito se usa
+    DEPOSITO_DEFAULT_ID. Devuelve los saldos resultantes. No hace commit.
+    """
+    deposito_id = deposito_id or settings.DEPOSITO_DEFAULT_ID
+    movimiento = StockMovimiento(
+        producto_id=producto_id,
+        tipo=tipo,
+        cantidad=float(cantidad),
+        motivo=motivo,
+        ref_tipo=ref_tipo,
+        ref_id=ref_id,
+        deposito_id=deposito_id,
+    )
+    db.add(movimiento)
+    delta = _delta(tipo, cantidad)
+    return Saldos(
+        total=aplicar_delta_saldo(db, producto_id, delta),
+        deposito=aplicar_delta_saldo_deposito(db, deposito_id, producto_id, delta),
+        movimiento=movimiento,
+    )
+
+def stock_actual(db: Session, producto_id: int, deposito_id: int | None = None) -> float:
+    """Stock actual leído del saldo denormalizado (O(1)); total o de un depósito"""
+    if deposito_id is not None:
+        cantidad = (
+            db.query(StockSaldoDeposito.cantidad)
+            .filter(StockSaldoDeposito.deposito_id == deposito_id, StockSaldoDeposito.producto_id == producto_id)
+            .scalar()
+        )
+    else:
+        cantidad = (
+            db.query(StockSaldo.cantidad)
+            .filter(StockSaldo.producto_id == producto_id)
+            .scalar()
+        )
+    return float(cantidad or 0.0)
+
+def stock_por_deposito(db: Session, producto_id: int) -> list[StockSaldoDeposito]:
+    """Saldo de un producto en cada depósito donde tuvo movimientos"""
+    return (
+        db.query(StockSaldoDeposito)
+        .filter(StockSaldoDeposito.producto_id == producto_id)
+        .order_by(StockSaldoDeposito.deposito_id)
         .all()
     )
-    total = 0.0
-    for m in movs:
-        total += float(m.cantidad) if m.tipo == "IN" else -float(m.cantidad)
-    return total
+
+def stock_deposito(db: Session, deposito_id: int) -> list[StockSaldoDeposito]:
+    """Saldos de todos los productos de un depósito (sólo lee las filas de ese depósito)"""
+    return (
+        db.query(StockSaldoDeposito)
+        .filter(StockSaldoDeposito.deposito_id == deposito_id)
+        .order_by(StockSaldoDeposito.producto_id)
+        .all()
+    )
+
+def validar_deposito(db: Session, deposito_id: int) -> None:
+    """ValueError si el depósito no existe o está inactivo"""
+    existe = (
+        db.query(Deposito.id)
+        .filter(Deposito.id == deposito_id, Deposito.activo == True)
+        .first()
+    )
+    if existe is None:
+        raise ValueError(f"Depósito {deposito_id} inexistente o inactivo")
+
+def transferir(
+    db: Session,
+    producto_id: int,
+    deposito_origen_id: int,
+    deposito_destino_id: int,
+    cantidad: float,
+    motivo: str | None = None,
+) -> Saldos:
+    """
+    Mueve stock entre depósitos con un par de movimientos OUT/IN (vía registrar_movimiento)
+    en una sola transacción. Falla (sin dejar rastro) si el origen no tiene stock suficiente.
+    Devuelve (saldo total, saldo en destino).
+    """
+    if cantidad <= 0:
+        raise ValueError("Cantidad inválida")
+    if deposito_origen_id == deposito_destino_id:
+        raise ValueError("El depósito de origen y destino deben ser distintos")
+    if db.query(Producto.id).filter(Producto.id == producto_id).first() is None:
+        raise ValueError(f"Producto {producto_id} inexistente")
+    validar_deposito(db, deposito_origen_id)
+    validar_deposito(db, deposito_destino_id)
+
+    try:
+        salida = registrar_movimiento(
+            db, producto_id, "OUT", cantidad,
+            motivo="TRANSFERENCIA", ref_tipo="transferencia", deposito_id=deposito_origen_id,
+        )
+        if salida.deposito < 0:
+            raise ValueError(
+                f"Stock insuficiente para producto {producto_id} en depósito {deposito_origen_id} "
+                f"(disp: {salida.deposito + float(cantidad)})"
+            )
+        db.flush()  # el id de la salida identifica la transferencia
+        salida.movimiento.ref_id = salida.movimiento.id
+
+        # El total del producto no cambia: baja con la salida y vuelve con la entrada
+        entrada = registrar_movimiento(
+            db, producto_id, "IN", cantidad,
+            motivo="TRANSFERENCIA", ref_tipo="transferencia", ref_id=salida.movimiento.id,
+            deposito_id=deposito_destino_id,
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return Saldos(total=entrada.total, deposito=entrada.deposito)
+
+def stock_ledger(db: Session, producto_id: int) -> float:
+    """Stock recalculado desde el ledger (para verificaciones)"""
+    total = (
+        db.query(func.sum(case((StockMovimiento.tipo == "IN", StockMovimiento.cantidad), else_=-StockMovimiento.cantidad)))
+        .filter(StockMovimiento.producto_id == producto_id)
+        .scalar()
+    )
+    return float(total or 0.0)
+
+def _ledger(*claves):
+    """Suma con signo de los movimientos del ledger agrupada por `claves`"""
+    return select(
+        *[c.label(c.key) for c in claves],
+        func.sum(
+            case((StockMovimiento.tipo == "IN", StockMovimiento.cantidad), else_=-StockMovimiento.cantidad)
+        ).label("cantidad"),
+    ).group_by(*claves).subquery("ledger")
+
+def _diferencias(db: Session, saldo_tabla, claves: list[str]) -> list:
+    """Filas (claves..., saldo, ledger) de `saldo_tabla` vs ledger, incluidas las que faltan de un lado"""
+    ledger = _ledger(*[getattr(StockMovimiento, c) for c in claves])
+    ledger_cantidad = func.coalesce(ledger.c.cantidad, 0.0)
+    saldo_cantidad = func.coalesce(saldo_tabla.cantidad, 0.0)
+    union = [getattr(saldo_tabla, c) == ledger.c[c] for c in claves]
+
+    # Claves con ledger (con o sin saldo) + saldos sin ledger
+    con_ledger = select(
+        *[ledger.c[c] for c in claves], saldo_cantidad.label("saldo"), ledger_cantidad.label("ledger")
+    ).select_from(ledger).outerjoin(saldo_tabla, and_(*union))
+    sin_ledger = select(
+        *[getattr(saldo_tabla, c) for c in claves], saldo_cantidad.label("saldo"), ledger_cantidad.label("ledger")
+    ).select_from(saldo_tabla).outerjoin(ledger, and_(*union))\
+     .where(ledger.c[claves[0]].is_(None))
+
+    filas = db.execute(con_ledger.union_all(sin_ledger)).all()
+    return [f for f in filas if abs(float(f.saldo) - float(f.ledger)) > TOLERANCIA_CONSISTENCIA]
+
+def verificar_consistencia(db: Session) -> list[dict]:
+    """
+    Compara contra la suma del ledger el saldo total de cada producto y su saldo en
+    cada depósito. Devuelve las diferencias encontradas (lista vacía si todo cuadra);
+    las de un depósito traen su deposito_id.
+    """
+    diferencias = [
+        (None, f.producto_id, f) for f in _diferencias(db, StockSaldo, ["producto_id"])
+    ] + [
+        (f.deposito_id, f.producto_id, f) for f in _diferencias(db, StockSaldoDeposito, ["deposito_id", "producto_id"])
+    ]
+    return [
+        {
+            "producto_id": producto_id,
+            "deposito_id": deposito_id,
+            "saldo": float(f.saldo),
+            "ledger": float(f.ledger),
+            "diferencia": round(float(f.saldo) - float(f.ledger), 6),
+        }
+        for deposito_id, producto_id, f in diferencias
+    ]
+
+def reconstruir_saldos(db: Session) -> int:
+    """
+    Recalcula desde el ledger los saldos inconsistentes, totales y por depósito
+    (reparación tras una inconsistencia). Devuelve la cantidad de saldos corregidos.
+    """
+    diferencias = verificar_consistencia(db)
+    for d in diferencias:
+        if d["deposito_id"] is None:
+            stmt = dialect_insert(db, StockSaldo).values(producto_id=d["producto_id"], cantidad=d["ledger"])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[StockSaldo.producto_id],
+                set_={"cantidad": stmt.excluded.cantidad, "actualizado": func.now()},
+            )
+        else:
+            stmt = dialect_insert(db, StockSaldoDeposito).values(
+                deposito_id=d["deposito_id"], producto_id=d["producto_id"], cantidad=d["ledger"]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[StockSaldoDeposito.deposito_id, StockSaldoDeposito.producto_id],
+                set_={"cantidad": stmt.excluded.cantidad, "actualizado": func.now()},
+            )
+        db.execute(stmt)
+    db.commit()
+    return len(diferencias)
@@ -0,0 +1,49 @@
+# app/services/transicion_service.py
+from datetime import datetime
+from typing import Dict, Optional
+
+from app.db.database import SessionLocal
+
+# Estados compartidos por descuentos y precios (mismos valores en ambos enums)
+ESTADO_ACTIVO = "activo"
+ESTADO_INACTIVO = "inactivo"
+
+
+def calcular_proxima_transicion(
+    estado: Optional[str],
+    fecha_inicio: Optional[datetime],
+    fecha_fin: Optional[datetime],
+    ahora: Optional[datetime] = None
+) -> Optional[datetime]:
+    """
+    Devuelve el próximo instante en que la fila debe cambiar de estado:
+    - activo: vence en fecha_fin (None si no tiene fin)
+    - inactivo con inicio futuro: se activa en fecha_inicio
+    - cualquier otro caso: no tiene transiciones programadas
+    """
+    ahora = ahora or datetime.utcnow()
+    estado = getattr(estado, "value", estado)
+
+    if estado == ESTADO_ACTIVO:
+        return fecha_fin
+    if estado == ESTADO_INACTIVO and fecha_inicio and fecha_inicio > ahora:
+        if fecha_fin is None or fecha_fin > fecha_inicio:
+            return fecha_inicio
+    return None
+
+
+def ejecutar_transiciones_programadas() -> Dict[str, int]:
+    """
+    Tick del scheduler: aplica las transiciones vencidas de descuentos y precios.
+    Cada UPDATE filtra por `proxima_transicion <= ahora` (índice parcial), así que
+    sólo se tocan las filas cuyo límite ya pasó.
+    """
+    # Imports adentro para evitar ciclos con los servicios
+    from app.services.descuento_service import DescuentoService
+    from app.services.precio_service import PrecioService
+
+    with SessionLocal() as db:
+        return {
+            "descuentos": DescuentoService.actualizar_estados_descuentos(db),
+            "precios": PrecioService.actualizar_estados_precios(db),
+        }
@@ -1,10 +1,15 @@
 # app/services/venta_service.py
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
-from app.models.venta_model import Venta, VentaItem
-from app.models.compra_model import StockMovimiento
+from app.models.venta_model import Venta, VentaItem, VentaDiaria, VentaProductoDiaria
 from app.models.producto_model import Producto
 from app.schemas.venta_schema import VentaCreate
-from app.services.stock_service import stock_actual  # usamos la versión robusta (Python)
+from app.services.stock_service import stock_actual, registrar_movimiento, validar_deposito  # saldo denormalizado
+from app.services import costo_service
+from app.core.settings import settings
+from app.db.upsert import dialect_insert
+from app.services.dashboard_service import dashboard_cache
 
 def _producto_precio(db: Session, producto_id: int) -> float | None:
     prod = db.query(Producto).filter(Producto.id == producto_id).first()
@@ -12,40 +17,172 @@ def _producto_precio(db: Session, producto_id: int) -> float | None:
         return None
     return float(prod.precio)
 
+def _acumular_venta_diaria(db: Session, venta: Venta) -> None:
+    """Suma la venta al acumulado diario de su depósito (upsert atómico, misma transacción)"""
+    stmt = dialect_insert(db, VentaDiaria).values(
+        fecha=venta.fecha.date(),
+        deposito_id=venta.deposito_id,
+        cantidad_ventas=1,
+        monto_total=venta.total,
+        venta_min=venta.total,
+        venta_max=venta.total,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VentaDiaria.fecha, VentaDiaria.deposito_id],
+        set_={
+            "cantidad_ventas": VentaDiaria.cantidad_ventas + 1,
+            "monto_total": VentaDiaria.monto_total + stmt.excluded.monto_total,
+            "venta_min": case(
+                (stmt.excluded.venta_min < VentaDiaria.venta_min, stmt.excluded.venta_min),
+                else_=VentaDiaria.venta_min,
+            ),
+            "venta_max": case(
+                (stmt.excluded.venta_max > VentaDiaria.venta_max, stmt.excluded.venta_max),
+                else_=VentaDiaria.venta_max,
+            ),
+        },
+    )
+    db.execute(stmt)
+
+def _recalcular_venta_diaria(db: Session, dia: date, deposito_id: int) -> None:
+    """
+    Recalcula el acumulado de un día/depósito desde `ventas` (mínimo y máximo no se
+    pueden "restar"). Es un rango sobre un solo día, así que es barato.
+    La fila se bloquea (FOR UPDATE) antes de leer `ventas`: un `crear_venta` concurrente
+    espera y suma su incremento sobre el valor recalculado en lugar de perderse.
+    """
+    acumulado = db.query(VentaDiaria).filter(
+        VentaDiaria.fecha == dia, VentaDiaria.deposito_id == deposito_id
+    ).with_for_update().one_or_none()
+
+    desde = datetime.combine(dia, time.min)
+    fila = db.query(
+        func.count(Venta.id).label("cantidad"),
+        func.sum(Venta.total).label("monto"),
+        func.min(Venta.total).label("minimo"),
+        func.max(Venta.total).label("maximo"),
+    ).filter(
+        Venta.deposito_id == deposito_id,
+        Venta.fecha >= desde,
+        Venta.fecha < desde + timedelta(days=1),
+    ).one()
+
+    if not fila.cantidad:
+        if acumulado:
+            db.delete(acumulado)
+        return
+    if acumulado is None:
+        acumulado = VentaDiaria(fecha=dia, deposito_id=deposito_id)
+        db.add(acumulado)
+    acumulado.cantidad_ventas = fila.cantidad
+    acumulado.monto_total = fila.monto or 0.0
+    acumulado.venta_min = fila.minimo or 0.0
+    acumulado.venta_max = fila.maximo or 0.0
+
+def _acumular_productos_diarios(db: Session, dia: date, por_producto: dict[int, tuple[float, float]]) -> None:
+    """Suma (cantidad, monto) de cada producto vendido al acumulado diario (un solo upsert multi-fila)"""
+    stmt = dialect_insert(db, VentaProductoDiaria).values([
+        {"fecha": dia, "producto_id": pid, "cantidad": cantidad, "monto_total": monto, "ventas_count": 1}
+        for pid, (cantidad, monto) in por_producto.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VentaProductoDiaria.fecha, VentaProductoDiaria.producto_id],
+        set_={
+            "cantidad": VentaProductoDiaria.cantidad + stmt.excluded.cantidad,
+            "monto_total": VentaProductoDiaria.monto_total + stmt.excluded.monto_total,
+            "ventas_count": VentaProductoDiaria.ventas_count + 1,
+        },
+    )
+    db.execute(stmt)
+
+def ventas_por_producto(db: Session, desde: datetime, hasta: datetime, producto_ids=None):
+    """
+    Agregado por producto sobre `venta_items` para un rango de `ventas.fecha`
+    (usa ix_ventas_fecha y el índice compuesto (venta_id, producto_id)).
+    """
+    query = db.query(
+        VentaItem.producto_id,
+        func.sum(VentaItem.cantidad).label("cantidad"),
+        func.sum(VentaItem.subtotal).label("monto"),
+        func.count(func.distinct(VentaItem.venta_id)).label("ventas_count"),
+    ).join(Venta, Venta.id == VentaItem.venta_id)\
+     .filter(Venta.fecha >= desde, Venta.fecha < hasta)
+    if producto_ids is not None:
+        query = query.filter(VentaItem.producto_id.in_(producto_ids))
+    return query.group_by(VentaItem.producto_id).all()
+
+def _recalcular_productos_diarios(db: Session, dia: date, producto_ids: set[int]) -> None:
+    """
+    Recalcula desde los items el acumulado de un día para los productos indicados,
+    con las filas bloqueadas antes de leer (como `_recalcular_venta_diaria`).
+    """
+    acumulados = {
+        a.producto_id: a for a in db.query(VentaProductoDiaria).filter(
+            VentaProductoDiaria.fecha == dia,
+            VentaProductoDiaria.producto_id.in_(producto_ids),
+        ).order_by(VentaProductoDiaria.producto_id).with_for_update().all()
+    }
+    desde = datetime.combine(dia, time.min)
+    filas = {f.producto_id: f for f in ventas_por_producto(db, desde, desde + timedelta(days=1), producto_ids)}
+
+    for producto_id in producto_ids:
+        acumulado, fila = acumulados.get(producto_id), filas.get(producto_id)
+        if fila is None:
+            if acumulado is not None:
+                db.delete(acumulado)
+            continue
+        if acumulado is None:
+            acumulado = VentaProductoDiaria(fecha=dia, producto_id=producto_id)
+            db.add(acumulado)
+        acumulado.cantidad = fila.cantidad or 0.0
+        acumulado.monto_total = fila.monto or 0.0
+        acumulado.ventas_count = fila.ventas_count
+
 def crear_venta(db: Session, data: VentaCreate) -> Venta:
     if not data.items:
         raise ValueError("Se requiere al menos un item")
 
-    # Validar stock suficiente y determinar precio_unitario
-    precios: dict[int, float] = {}
+    # Sin depósito explícito se vende desde el depósito por defecto
+    deposito_id = data.deposito_id or settings.DEPOSITO_DEFAULT_ID
+    if data.deposito_id is not None:
+        validar_deposito(db, data.deposito_id)
+
+    # Determinar precio_unitario de cada item y la cantidad total por producto
+    precios: list[float] = []
+    cantidades: dict[int, float] = {}
     for it in data.items:
-        disponible = stock_actual(db, it.producto_id)
         if it.cantidad <= 0:
             raise ValueError("Cantidad inválida")
-        if disponible < it.cantidad:
-            raise ValueError(
-                f"Stock insuficiente para producto {it.producto_id} (disp: {disponible})"
-            )
-
         pu = it.precio_unitario if it.precio_unitario is not None else _producto_precio(db, it.producto_id)
         if pu is None:
             raise ValueError(f"Producto {it.producto_id} no existe")
-        precios[it.producto_id] = float(pu)
+        precios.append(float(pu))
+        cantidades[it.producto_id] = cantidades.get(it.producto_id, 0.0) + float(it.cantidad)
+
+    # Validar stock suficiente (los items repetidos del mismo producto se suman)
+    for producto_id, cantidad in cantidades.items():
+        disponible = stock_actual(db, producto_id, deposito_id)
+        if disponible < cantidad:
+            raise ValueError(
+                f"Stock insuficiente para producto {producto_id} (disp: {disponible})"
+            )
 
     try:
         # Crear cabecera
-        venta = Venta(cliente_id=data.cliente_id)
+        venta = Venta(cliente_id=data.cliente_id, deposito_id=deposito_id)
         if data.fecha:
             venta.fecha = data.fecha
         db.add(venta)
         db.flush()  # para obtener venta.id
 
-        # Crear items + movimientos OUT + total
+        # Crear items + total
         total = 0.0
-        for it in data.items:
-            pu = precios[it.producto_id]
+        por_producto: dict[int, tuple[float, float]] = {}
+        for it, pu in zip(data.items, precios):
             subtotal = float(it.cantidad) * pu
             total += subtotal
+            cantidad, monto = por_producto.get(it.producto_id, (0.0, 0.0))
+            por_producto[it.producto_id] = (cantidad + float(it.cantidad), monto + subtotal)
 
             db.add(VentaItem(
                 venta_id=venta.id,
@@ -55,17 +192,39 @@ def crear_venta(db: Session, data: VentaCreate) -> Venta:
                 subtotal=subtotal,
             ))
 
-            db.add(StockMovimiento(
-                producto_id=it.producto_id,
+        # Movimientos OUT, uno por producto y en orden de producto_id: las ventas
+        # concurrentes bloquean las filas de saldos y costos en el mismo orden (sin deadlocks)
+        for producto_id in sorted(cantidades):
+            cantidad = cantidades[producto_id]
+            saldos = registrar_movimiento(
+                db,
+                producto_id=producto_id,
                 tipo="OUT",
-                cantidad=float(it.cantidad),
+                cantidad=cantidad,
                 motivo="VENTA",
                 ref_tipo="venta",
                 ref_id=venta.id,
-            ))
+                deposito_id=deposito_id,
+            )
+            # Re-chequeo atómico: otra venta concurrente pudo consumir el stock
+            if saldos.deposito < 0:
+                raise ValueError(
+                    f"Stock insuficiente para producto {producto_id} (disp: {saldos.deposito + cantidad})"
+                )
+
+            # Costo de la mercadería vendida (consume capas FIFO)
+            costo_service.registrar_salida(
+                db,
+                producto_id=producto_id,
+                cantidad=cantidad,
+                dia=data.fecha.date() if data.fecha else None,
+            )
 
         venta.total = total
+        _acumular_venta_diaria(db, venta)
+        _acumular_productos_diarios(db, venta.fecha.date(), por_producto)
         db.commit()
+        dashboard_cache.invalidate()  # los agregados del dashboard cambiaron
         db.refresh(venta)
         return venta
 
@@ -97,10 +256,18 @@ def eliminar_venta(db: Session, venta_id: int) -> bool:
     MVP: elimina la venta y (ATENCIÓN) no revierte stock.
     Lo correcto sería agregar movimientos de reversa (IN) por cada item.
     Lo implementamos en la siguiente iteración.
+    Los acumulados diarios sí se corrigen en la misma transacción.
     """
     v = obtener_venta(db, venta_id)
     if not v:
         return False
+    dia, deposito_id = v.fecha.date(), v.deposito_id
+    producto_ids = {it.producto_id for it in v.items}
     db.delete(v)
+    db.flush()
+    _recalcular_venta_diaria(db, dia, deposito_id)
+    if producto_ids:
+        _recalcular_productos_diarios(db, dia, producto_ids)
     db.commit()
+    dashboard_cache.invalidate()
     return True
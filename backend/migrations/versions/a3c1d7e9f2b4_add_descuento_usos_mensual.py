@@ -0,0 +1,58 @@
+"""add_descuento_usos_mensual
+
+Revision ID: a3c1d7e9f2b4
+Revises: 9e5daa1a210c
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c1d7e9f2b4'
+down_revision: Union[str, Sequence[str], None] = '9e5daa1a210c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Las tablas de descuentos pueden no existir si se crearon por fuera de Alembic
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('descuentos'):
+        return
+    
+    # Rollup mensual de usos de descuentos
+    op.create_table('descuento_usos_mensual',
+        sa.Column('descuento_id', sa.Integer(), nullable=False),
+        sa.Column('mes', sa.Date(), nullable=False),
+        sa.Column('usos', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('monto_descuentado', sa.Float(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['descuento_id'], ['descuentos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('descuento_id', 'mes')
+    )
+    op.create_index('ix_descuento_usos_mensual_mes', 'descuento_usos_mensual', ['mes'], unique=False)
+    
+    # Backfill desde el historial existente
+    if not inspector.has_table('descuento_usos'):
+        return
+    op.execute("""
+        INSERT INTO descuento_usos_mensual (descuento_id, mes, usos, monto_descuentado)
+        SELECT descuento_id,
+               CAST(date_trunc('month', fecha_uso) AS DATE),
+               COUNT(*),
+               COALESCE(SUM(monto_descuento), 0)
+        FROM descuento_usos
+        GROUP BY descuento_id, CAST(date_trunc('month', fecha_uso) AS DATE)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table('descuento_usos_mensual'):
+        return
+    op.drop_index('ix_descuento_usos_mensual_mes', table_name='descuento_usos_mensual')
+    op.drop_table('descuento_usos_mensual')
@@ -0,0 +1,58 @@
+"""add_notificaciones_globales_lectura
+
+Revision ID: a5b9e3c7d1f2
+Revises: f4a8d2b6c9e1
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5b9e3c7d1f2'
+down_revision: Union[str, Sequence[str], None] = 'f4a8d2b6c9e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('notificaciones'):
+        return
+    # Marca de lectura de notificaciones globales por usuario
+    op.create_table(
+        'notificaciones_globales_lectura',
+        sa.Column('usuario_id', sa.Integer(), nullable=False),
+        sa.Column('ultima_leida_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('fecha_actualizacion', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('usuario_id')
+    )
+    # notificaciones_usuarios guarda las excepciones por encima de la marca: una por (usuario, notificación)
+    if inspector.has_table('notificaciones_usuarios'):
+        op.execute(
+            """
+            DELETE FROM notificaciones_usuarios
+            WHERE id NOT IN (
+                SELECT MIN(id) FROM notificaciones_usuarios GROUP BY usuario_id, notificacion_id
+            )
+            """
+        )
+        op.create_index(
+            'ux_notificaciones_usuarios_usuario_notificacion',
+            'notificaciones_usuarios',
+            ['usuario_id', 'notificacion_id'],
+            unique=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('notificaciones_usuarios'):
+        op.drop_index('ux_notificaciones_usuarios_usuario_notificacion', table_name='notificaciones_usuarios')
+    if inspector.has_table('notificaciones_globales_lectura'):
+        op.drop_table('notificaciones_globales_lectura')
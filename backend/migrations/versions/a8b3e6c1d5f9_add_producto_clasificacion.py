@@ -0,0 +1,62 @@
+"""add_producto_clasificacion
+
+Revision ID: a8b3e6c1d5f9
+Revises: f7a2d5b9c4e8
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8b3e6c1d5f9'
+down_revision: Union[str, Sequence[str], None] = 'f7a2d5b9c4e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    
+    if not inspector.has_table('producto_clasificacion'):
+        op.create_table(
+            'producto_clasificacion',
+            sa.Column('producto_id', sa.Integer(), nullable=False),
+            sa.Column('clase_abc', sa.String(length=1), nullable=False),
+            sa.Column('clase_xyz', sa.String(length=1), nullable=False),
+            sa.Column('ingresos', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('participacion_acumulada', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('demanda_semanal_media', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('coeficiente_variacion', sa.Float(), nullable=True),
+            sa.Column('semanas', sa.Integer(), nullable=False),
+            sa.Column('fecha_calculo', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['producto_id'], ['productos.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('producto_id')
+        )
+        op.create_index(op.f('ix_producto_clasificacion_clase_abc'), 'producto_clasificacion', ['clase_abc'], unique=False)
+        op.create_index(op.f('ix_producto_clasificacion_clase_xyz'), 'producto_clasificacion', ['clase_xyz'], unique=False)
+    
+    if inspector.has_table('configuracion_inventario'):
+        columnas = {c['name'] for c in inspector.get_columns('configuracion_inventario')}
+        if 'usar_clasificacion' not in columnas:
+            op.add_column(
+                'configuracion_inventario',
+                sa.Column('usar_clasificacion', sa.Boolean(), nullable=False, server_default=sa.false())
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('configuracion_inventario'):
+        columnas = {c['name'] for c in inspector.get_columns('configuracion_inventario')}
+        if 'usar_clasificacion' in columnas:
+            op.drop_column('configuracion_inventario', 'usar_clasificacion')
+    if inspector.has_table('producto_clasificacion'):
+        op.drop_index(op.f('ix_producto_clasificacion_clase_xyz'), table_name='producto_clasificacion')
+        op.drop_index(op.f('ix_producto_clasificacion_clase_abc'), table_name='producto_clasificacion')
+        op.drop_table('producto_clasificacion')
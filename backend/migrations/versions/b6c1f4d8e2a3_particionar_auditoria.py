@@ -0,0 +1,134 @@
+"""particionar_auditoria
+
+Revision ID: b6c1f4d8e2a3
+Revises: a5b9e3c7d1f2
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from datetime import date
+from typing import List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6c1f4d8e2a3'
+down_revision: Union[str, Sequence[str], None] = 'a5b9e3c7d1f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Particiones futuras creadas por la migración (después las mantiene el job particiones_auditoria)
+MESES_ADELANTE = 3
+
+# tabla -> (columna de partición, índices a recrear en la tabla padre)
+TABLAS = {
+    'audit_logs': ('created_at', [
+        'CREATE INDEX ix_audit_logs_id ON audit_logs (id)',
+        'CREATE INDEX ix_audit_created_at ON audit_logs (created_at DESC)',
+        'CREATE INDEX ix_audit_tbl_rec_time ON audit_logs (table_name, record_id, created_at DESC)',
+    ]),
+    'auditoria': ('ts', []),
+}
+
+
+def _sumar_mes(mes: date, n: int = 1) -> date:
+    total = mes.year * 12 + (mes.month - 1) + n
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def _liberar_nombres(bind, vieja: str) -> None:
+    """Renombra la PK y borra los índices de la tabla vieja para reutilizar sus nombres"""
+    inspector = sa.inspect(bind)
+    pk = inspector.get_pk_constraint(vieja).get('name')
+    if pk:
+        op.execute(f'ALTER TABLE "{vieja}" RENAME CONSTRAINT "{pk}" TO "{vieja}_pkey"')
+    for indice in inspector.get_indexes(vieja):
+        op.execute(f'DROP INDEX IF EXISTS "{indice["name"]}"')
+
+
+def _secuencias(bind, tabla: str) -> List[str]:
+    return [
+        s for s in bind.execute(sa.text(
+            "SELECT pg_get_serial_sequence(:tabla, a.attname) FROM pg_attribute a "
+            "WHERE a.attrelid = CAST(:tabla AS regclass) AND a.attnum > 0 AND NOT a.attisdropped"
+        ), {"tabla": tabla}).scalars().all() if s
+    ]
+
+
+def _particionar(bind, tabla: str, columna: str, indices: List[str]) -> None:
+    vieja = f'{tabla}_sin_particionar'
+    op.execute(f'ALTER TABLE "{tabla}" RENAME TO "{vieja}"')
+    _liberar_nombres(bind, vieja)
+
+    # Misma estructura (columnas, NOT NULL, defaults con la secuencia del id), particionada
+    op.execute(
+        f'CREATE TABLE "{tabla}" (LIKE "{vieja}" INCLUDING DEFAULTS) '
+        f'PARTITION BY RANGE ("{columna}")'
+    )
+    op.execute(f'ALTER TABLE "{tabla}" ADD PRIMARY KEY (id, "{columna}")')
+
+    # Una partición por mes desde el registro más viejo hasta MESES_ADELANTE meses
+    minimo = bind.execute(sa.text(f'SELECT MIN("{columna}") FROM "{vieja}"')).scalar()
+    hoy = date.today().replace(day=1)
+    mes = minimo.date().replace(day=1) if minimo else hoy
+    while mes <= _sumar_mes(hoy, MESES_ADELANTE):
+        op.execute(
+            f'CREATE TABLE "{tabla}_p{mes:%Y%m}" PARTITION OF "{tabla}" '
+            f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{_sumar_mes(mes).isoformat()}')"
+        )
+        mes = _sumar_mes(mes)
+
+    op.execute(f'INSERT INTO "{tabla}" SELECT * FROM "{vieja}"')
+    for secuencia in _secuencias(bind, vieja):
+        op.execute(f'ALTER SEQUENCE {secuencia} OWNED BY "{tabla}".id')
+    op.execute(f'DROP TABLE "{vieja}"')
+    for indice in indices:
+        op.execute(indice)
+
+
+def _desparticionar(bind, tabla: str, columna: str, indices: List[str]) -> None:
+    particionada = f'{tabla}_particionada'
+    op.execute(f'ALTER TABLE "{tabla}" RENAME TO "{particionada}"')
+    for indice in sa.inspect(bind).get_indexes(particionada):
+        op.execute(f'DROP INDEX IF EXISTS "{indice["name"]}"')
+    op.execute(f'ALTER TABLE "{particionada}" DROP CONSTRAINT IF EXISTS "{tabla}_pkey"')
+
+    op.execute(f'CREATE TABLE "{tabla}" (LIKE "{particionada}" INCLUDING DEFAULTS)')
+    op.execute(f'INSERT INTO "{tabla}" SELECT * FROM "{particionada}"')
+    op.execute(f'ALTER TABLE "{tabla}" ADD PRIMARY KEY (id)')
+    for secuencia in _secuencias(bind, particionada):
+        op.execute(f'ALTER SEQUENCE {secuencia} OWNED BY "{tabla}".id')
+    # Borra también las particiones
+    op.execute(f'DROP TABLE "{particionada}"')
+    for indice in indices:
+        op.execute(indice)
+
+
+def _es_particionada(bind, tabla: str) -> bool:
+    return bind.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = :tabla AND pg_table_is_visible(c.oid)"
+    ), {"tabla": tabla}).first() is not None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    inspector = sa.inspect(bind)
+    for tabla, (columna, indices) in TABLAS.items():
+        # `auditoria` la crea el router al arrancar: si todavía no existe, nace particionada
+        if inspector.has_table(tabla) and not _es_particionada(bind, tabla):
+            _particionar(bind, tabla, columna, indices)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    for tabla, (columna, indices) in TABLAS.items():
+        if _es_particionada(bind, tabla):
+            _desparticionar(bind, tabla, columna, indices)
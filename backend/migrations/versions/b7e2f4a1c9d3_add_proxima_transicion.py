@@ -0,0 +1,57 @@
+"""add_proxima_transicion
+
+Revision ID: b7e2f4a1c9d3
+Revises: a3c1d7e9f2b4
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2f4a1c9d3'
+down_revision: Union[str, Sequence[str], None] = 'a3c1d7e9f2b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    for tabla in ('descuentos', 'precios_producto'):
+        if not inspector.has_table(tabla):
+            continue
+        op.add_column(tabla, sa.Column('proxima_transicion', sa.DateTime(), nullable=True))
+        
+        # Índice parcial: el tick sólo recorre filas con transición pendiente
+        op.create_index(
+            f'ix_{tabla}_proxima_transicion', tabla, ['proxima_transicion'],
+            unique=False, postgresql_where=sa.text('proxima_transicion IS NOT NULL')
+        )
+        
+        # Backfill: activos vencen en fecha_fin, inactivos con inicio futuro se activan en fecha_inicio
+        op.execute(f"""
+            UPDATE {tabla}
+            SET proxima_transicion = fecha_fin
+            WHERE estado = 'activo' AND fecha_fin IS NOT NULL
+        """)
+        op.execute(f"""
+            UPDATE {tabla}
+            SET proxima_transicion = fecha_inicio
+            WHERE estado = 'inactivo'
+              AND fecha_inicio > (NOW() AT TIME ZONE 'utc')
+              AND (fecha_fin IS NULL OR fecha_fin > fecha_inicio)
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    for tabla in ('precios_producto', 'descuentos'):
+        if not inspector.has_table(tabla):
+            continue
+        op.drop_index(f'ix_{tabla}_proxima_transicion', table_name=tabla)
+        op.drop_column(tabla, 'proxima_transicion')
@@ -0,0 +1,84 @@
+"""add_depositos
+
+Revision ID: b9c4f7d2e6a1
+Revises: a8b3e6c1d5f9
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9c4f7d2e6a1'
+down_revision: Union[str, Sequence[str], None] = 'a8b3e6c1d5f9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    
+    if not inspector.has_table('depositos'):
+        op.create_table(
+            'depositos',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('nombre', sa.String(), nullable=False),
+            sa.Column('direccion', sa.String(), nullable=True),
+            sa.Column('activo', sa.Boolean(), nullable=False, server_default=sa.true()),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_depositos_id'), 'depositos', ['id'], unique=False)
+        op.create_index(op.f('ix_depositos_nombre'), 'depositos', ['nombre'], unique=True)
+        # Depósito por defecto (id 1): recibe todo el stock existente
+        op.execute("INSERT INTO depositos (nombre, activo) VALUES ('Central', true)")
+    
+    op.add_column(
+        'stock_movimientos',
+        sa.Column('deposito_id', sa.Integer(), nullable=False, server_default=sa.text('1'))
+    )
+    op.create_foreign_key(
+        'fk_stock_movimientos_deposito_id', 'stock_movimientos', 'depositos', ['deposito_id'], ['id']
+    )
+    op.create_index(
+        'ix_stock_movimientos_deposito_producto', 'stock_movimientos', ['deposito_id', 'producto_id'], unique=False
+    )
+    
+    op.create_table(
+        'stock_saldos_deposito',
+        sa.Column('deposito_id', sa.Integer(), nullable=False),
+        sa.Column('producto_id', sa.Integer(), nullable=False),
+        sa.Column('cantidad', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('actualizado', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['deposito_id'], ['depositos.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['producto_id'], ['productos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('deposito_id', 'producto_id')
+    )
+    op.create_index(op.f('ix_stock_saldos_deposito_producto_id'), 'stock_saldos_deposito', ['producto_id'], unique=False)
+    
+    op.execute(
+        """
+        INSERT INTO stock_saldos_deposito (deposito_id, producto_id, cantidad, actualizado)
+        SELECT deposito_id,
+               producto_id,
+               SUM(CASE WHEN tipo = 'IN' THEN cantidad ELSE -cantidad END),
+               now()
+        FROM stock_movimientos
+        GROUP BY deposito_id, producto_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_stock_saldos_deposito_producto_id'), table_name='stock_saldos_deposito')
+    op.drop_table('stock_saldos_deposito')
+    op.drop_index('ix_stock_movimientos_deposito_producto', table_name='stock_movimientos')
+    op.drop_constraint('fk_stock_movimientos_deposito_id', 'stock_movimientos', type_='foreignkey')
+    op.drop_column('stock_movimientos', 'deposito_id')
+    op.drop_index(op.f('ix_depositos_nombre'), table_name='depositos')
+    op.drop_index(op.f('ix_depositos_id'), table_name='depositos')
+    op.drop_table('depositos')
@@ -0,0 +1,60 @@
+"""add_ventas_diarias
+
+Revision ID: c1d5a8e3f7b2
+Revises: b9c4f7d2e6a1
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1d5a8e3f7b2'
+down_revision: Union[str, Sequence[str], None] = 'b9c4f7d2e6a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Las ventas existentes quedan asignadas al depósito por defecto
+    op.add_column(
+        'ventas',
+        sa.Column('deposito_id', sa.Integer(), nullable=False, server_default=sa.text('1'))
+    )
+    op.create_foreign_key('fk_ventas_deposito_id', 'ventas', 'depositos', ['deposito_id'], ['id'])
+    
+    # Rollup diario de ventas por depósito
+    op.create_table('ventas_diarias',
+        sa.Column('fecha', sa.Date(), nullable=False),
+        sa.Column('deposito_id', sa.Integer(), nullable=False),
+        sa.Column('cantidad_ventas', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('monto_total', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('venta_min', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('venta_max', sa.Float(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['deposito_id'], ['depositos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('fecha', 'deposito_id')
+    )
+    
+    # Backfill desde el historial existente
+    op.execute("""
+        INSERT INTO ventas_diarias (fecha, deposito_id, cantidad_ventas, monto_total, venta_min, venta_max)
+        SELECT CAST(fecha AS DATE),
+               deposito_id,
+               COUNT(*),
+               COALESCE(SUM(total), 0),
+               COALESCE(MIN(total), 0),
+               COALESCE(MAX(total), 0)
+        FROM ventas
+        GROUP BY CAST(fecha AS DATE), deposito_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('ventas_diarias')
+    op.drop_constraint('fk_ventas_deposito_id', 'ventas', type_='foreignkey')
+    op.drop_column('ventas', 'deposito_id')
@@ -0,0 +1,57 @@
+"""unique_alerta_pendiente
+
+Revision ID: c4d8a2e6f1b5
+Revises: b7e2f4a1c9d3
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d8a2e6f1b5'
+down_revision: Union[str, Sequence[str], None] = 'b7e2f4a1c9d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('alertas_inventario'):
+        return
+    
+    # Dejar una sola alerta pendiente por (producto, tipo): las duplicadas se ignoran
+    op.execute(
+        """
+        UPDATE alertas_inventario
+        SET estado = 'ignorada'
+        WHERE estado = 'pendiente'
+          AND id NOT IN (
+              SELECT MIN(id)
+              FROM alertas_inventario
+              WHERE estado = 'pendiente'
+              GROUP BY producto_id, tipo
+          )
+        """
+    )
+    
+    # El barrido de alertas inserta con ON CONFLICT DO NOTHING sobre este índice
+    op.create_index(
+        'ux_alertas_inventario_pendiente',
+        'alertas_inventario',
+        ['producto_id', 'tipo'],
+        unique=True,
+        postgresql_where=sa.text("estado = 'pendiente'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('alertas_inventario'):
+        return
+    op.drop_index('ux_alertas_inventario_pendiente', table_name='alertas_inventario')
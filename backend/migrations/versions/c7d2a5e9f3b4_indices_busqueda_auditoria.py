@@ -0,0 +1,58 @@
+"""indices_busqueda_auditoria
+
+Revision ID: c7d2a5e9f3b4
+Revises: b6c1f4d8e2a3
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2a5e9f3b4'
+down_revision: Union[str, Sequence[str], None] = 'b6c1f4d8e2a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# tabla -> (nombre, definición): paginación por cursor (tiempo, id), filtros y GIN sobre el JSONB
+INDICES = {
+    'audit_logs': [
+        ('ix_audit_created_id', '(created_at DESC, id DESC)'),
+        ('ix_audit_user_time', '(username, created_at DESC, id DESC)'),
+        ('ix_audit_action_time', '(action, created_at DESC, id DESC)'),
+        ('ix_audit_details_gin', 'USING gin (details)'),
+    ],
+    'auditoria': [
+        ('ix_auditoria_ts_id', '(ts DESC, id DESC)'),
+        ('ix_auditoria_actor_ts', '(actor, ts DESC, id DESC)'),
+        ('ix_auditoria_accion_ts', '(accion, ts DESC, id DESC)'),
+        ('ix_auditoria_detalle_gin', 'USING gin (detalle)'),
+    ],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    inspector = sa.inspect(bind)
+    for tabla, indices in INDICES.items():
+        # `auditoria` la crea el router al arrancar junto con estos índices
+        if not inspector.has_table(tabla):
+            continue
+        for nombre, definicion in indices:
+            op.execute(f'CREATE INDEX IF NOT EXISTS "{nombre}" ON "{tabla}" {definicion}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    for indices in INDICES.values():
+        for nombre, _ in indices:
+            op.execute(f'DROP INDEX IF EXISTS "{nombre}"')
@@ -0,0 +1,57 @@
+"""add_ventas_producto_diarias
+
+Revision ID: d2e6b9f4a8c3
+Revises: c1d5a8e3f7b2
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2e6b9f4a8c3'
+down_revision: Union[str, Sequence[str], None] = 'c1d5a8e3f7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_ventas_fecha', 'ventas', ['fecha'], unique=False)
+    op.create_index('ix_venta_items_venta_producto', 'venta_items', ['venta_id', 'producto_id'], unique=False)
+    
+    # Rollup diario de ventas por producto
+    op.create_table('ventas_producto_diarias',
+        sa.Column('fecha', sa.Date(), nullable=False),
+        sa.Column('producto_id', sa.Integer(), nullable=False),
+        sa.Column('cantidad', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('monto_total', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('ventas_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['producto_id'], ['productos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('fecha', 'producto_id')
+    )
+    op.create_index(op.f('ix_ventas_producto_diarias_producto_id'), 'ventas_producto_diarias', ['producto_id'], unique=False)
+    
+    # Backfill desde el historial existente
+    op.execute("""
+        INSERT INTO ventas_producto_diarias (fecha, producto_id, cantidad, monto_total, ventas_count)
+        SELECT CAST(v.fecha AS DATE),
+               vi.producto_id,
+               SUM(vi.cantidad),
+               SUM(vi.subtotal),
+               COUNT(DISTINCT vi.venta_id)
+        FROM venta_items vi
+        JOIN ventas v ON v.id = vi.venta_id
+        GROUP BY CAST(v.fecha AS DATE), vi.producto_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_ventas_producto_diarias_producto_id'), table_name='ventas_producto_diarias')
+    op.drop_table('ventas_producto_diarias')
+    op.drop_index('ix_venta_items_venta_producto', table_name='venta_items')
+    op.drop_index('ix_ventas_fecha', table_name='ventas')
@@ -0,0 +1,53 @@
+"""add_stock_saldos
+
+Revision ID: d5e9b3f7a2c6
+Revises: c4d8a2e6f1b5
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e9b3f7a2c6'
+down_revision: Union[str, Sequence[str], None] = 'c4d8a2e6f1b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('stock_saldos'):
+        return
+    
+    op.create_table(
+        'stock_saldos',
+        sa.Column('producto_id', sa.Integer(), nullable=False),
+        sa.Column('cantidad', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('actualizado', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['producto_id'], ['productos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('producto_id')
+    )
+    
+    # Saldo inicial = IN - OUT del ledger existente
+    op.execute(
+        """
+        INSERT INTO stock_saldos (producto_id, cantidad, actualizado)
+        SELECT producto_id,
+               SUM(CASE WHEN tipo = 'IN' THEN cantidad ELSE -cantidad END),
+               now()
+        FROM stock_movimientos
+        GROUP BY producto_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('stock_saldos'):
+        op.drop_table('stock_saldos')
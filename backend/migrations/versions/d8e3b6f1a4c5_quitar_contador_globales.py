@@ -0,0 +1,40 @@
+"""quitar_contador_globales
+
+Revision ID: d8e3b6f1a4c5
+Revises: c7d2a5e9f3b4
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8e3b6f1a4c5'
+down_revision: Union[str, Sequence[str], None] = 'c7d2a5e9f3b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table('notificaciones_no_leidas'):
+        return
+    # Las globales se cuentan con la marca de lectura de cada usuario: la fila 0 ya no se usa
+    op.execute("DELETE FROM notificaciones_no_leidas WHERE usuario_id = 0")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table('notificaciones_no_leidas'):
+        return
+    op.execute(
+        """
+        INSERT INTO notificaciones_no_leidas (usuario_id, no_leidas)
+        SELECT 0, COUNT(*)
+        FROM notificaciones
+        WHERE usuario_id IS NULL AND LOWER(CAST(estado AS TEXT)) IN ('pendiente', 'enviada')
+        """
+    )
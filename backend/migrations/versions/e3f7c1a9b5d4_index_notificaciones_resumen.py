@@ -0,0 +1,39 @@
+"""index_notificaciones_resumen
+
+Revision ID: e3f7c1a9b5d4
+Revises: d2e6b9f4a8c3
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f7c1a9b5d4'
+down_revision: Union[str, Sequence[str], None] = 'd2e6b9f4a8c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table('notificaciones'):
+        return
+    # Índice cubriente para los conteos de resumen/estadísticas por usuario
+    op.create_index(
+        'ix_notificaciones_usuario_estado_tipo_fecha',
+        'notificaciones',
+        ['usuario_id', 'estado', 'tipo', 'fecha_creacion'],
+        unique=False,
+        postgresql_include=['es_urgente']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table('notificaciones'):
+        return
+    op.drop_index('ix_notificaciones_usuario_estado_tipo_fecha', table_name='notificaciones')
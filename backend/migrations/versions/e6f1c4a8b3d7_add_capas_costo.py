@@ -0,0 +1,113 @@
+"""add_capas_costo
+
+Revision ID: e6f1c4a8b3d7
+Revises: d5e9b3f7a2c6
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6f1c4a8b3d7'
+down_revision: Union[str, Sequence[str], None] = 'd5e9b3f7a2c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    
+    if not inspector.has_table('capas_costo'):
+        op.create_table(
+            'capas_costo',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('producto_id', sa.Integer(), nullable=False),
+            sa.Column('fecha', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.Column('cantidad_inicial', sa.Float(), nullable=False),
+            sa.Column('cantidad_restante', sa.Float(), nullable=False),
+            sa.Column('costo_unitario', sa.Float(), nullable=False),
+            sa.Column('ref_tipo', sa.String(), nullable=True),
+            sa.Column('ref_id', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['producto_id'], ['productos.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_capas_costo_id'), 'capas_costo', ['id'], unique=False)
+        op.create_index(op.f('ix_capas_costo_producto_id'), 'capas_costo', ['producto_id'], unique=False)
+        op.create_index(
+            'ix_capas_costo_abiertas',
+            'capas_costo',
+            ['producto_id', 'id'],
+            unique=False,
+            postgresql_where=sa.text('cantidad_restante > 0'),
+        )
+    
+    if not inspector.has_table('costo_productos'):
+        op.create_table(
+            'costo_productos',
+            sa.Column('producto_id', sa.Integer(), nullable=False),
+            sa.Column('cantidad', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('costo_promedio', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('valor_fifo', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('actualizado', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.ForeignKeyConstraint(['producto_id'], ['productos.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('producto_id')
+        )
+        
+        # Estado inicial: el stock actual como una única capa al costo promedio histórico de compra
+        op.execute(
+            """
+            INSERT INTO costo_productos (producto_id, cantidad, costo_promedio, valor_fifo, actualizado)
+            SELECT s.producto_id,
+                   s.cantidad,
+                   COALESCE(c.costo_promedio, 0),
+                   GREATEST(s.cantidad, 0) * COALESCE(c.costo_promedio, 0),
+                   now()
+            FROM stock_saldos s
+            LEFT JOIN (
+                SELECT producto_id, SUM(subtotal) / NULLIF(SUM(cantidad), 0) AS costo_promedio
+                FROM compra_items
+                GROUP BY producto_id
+            ) c ON c.producto_id = s.producto_id
+            """
+        )
+        op.execute(
+            """
+            INSERT INTO capas_costo (producto_id, fecha, cantidad_inicial, cantidad_restante, costo_unitario, ref_tipo)
+            SELECT producto_id, now(), cantidad, cantidad, costo_promedio, 'inicial'
+            FROM costo_productos
+            WHERE cantidad > 0
+            """
+        )
+    
+    if not inspector.has_table('costo_ventas_diario'):
+        op.create_table(
+            'costo_ventas_diario',
+            sa.Column('producto_id', sa.Integer(), nullable=False),
+            sa.Column('dia', sa.Date(), nullable=False),
+            sa.Column('cantidad', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('cogs_fifo', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('cogs_promedio', sa.Float(), nullable=False, server_default='0'),
+            sa.ForeignKeyConstraint(['producto_id'], ['productos.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('producto_id', 'dia')
+        )
+        op.create_index(op.f('ix_costo_ventas_diario_dia'), 'costo_ventas_diario', ['dia'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('costo_ventas_diario'):
+        op.drop_index(op.f('ix_costo_ventas_diario_dia'), table_name='costo_ventas_diario')
+        op.drop_table('costo_ventas_diario')
+    if inspector.has_table('costo_productos'):
+        op.drop_table('costo_productos')
+    if inspector.has_table('capas_costo'):
+        op.drop_index('ix_capas_costo_abiertas', table_name='capas_costo')
+        op.drop_index(op.f('ix_capas_costo_producto_id'), table_name='capas_costo')
+        op.drop_index(op.f('ix_capas_costo_id'), table_name='capas_costo')
+        op.drop_table('capas_costo')
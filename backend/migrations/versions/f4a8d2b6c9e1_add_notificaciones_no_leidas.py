@@ -0,0 +1,49 @@
+"""add_notificaciones_no_leidas
+
+Revision ID: f4a8d2b6c9e1
+Revises: e3f7c1a9b5d4
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a8d2b6c9e1'
+down_revision: Union[str, Sequence[str], None] = 'e3f7c1a9b5d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table('notificaciones'):
+        return
+    # Contador de no leídas por usuario (usuario_id 0 = notificaciones globales)
+    op.create_table(
+        'notificaciones_no_leidas',
+        sa.Column('usuario_id', sa.Integer(), nullable=False),
+        sa.Column('no_leidas', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('usuario_id')
+    )
+    # Backfill desde las notificaciones existentes (el estado se compara como texto
+    # para no depender de si el enum guarda nombres o valores)
+    op.execute(
+        """
+        INSERT INTO notificaciones_no_leidas (usuario_id, no_leidas)
+        SELECT COALESCE(usuario_id, 0), COUNT(*)
+        FROM notificaciones
+        WHERE LOWER(CAST(estado AS TEXT)) IN ('pendiente', 'enviada')
+        GROUP BY COALESCE(usuario_id, 0)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table('notificaciones_no_leidas'):
+        return
+    op.drop_table('notificaciones_no_leidas')
@@ -0,0 +1,37 @@
+"""index_fechas_estadisticas
+
+Revision ID: f7a2d5b9c4e8
+Revises: e6f1c4a8b3d7
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7a2d5b9c4e8'
+down_revision: Union[str, Sequence[str], None] = 'e6f1c4a8b3d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    # Las estadísticas filtran el ledger y las alertas resueltas por ventana de fechas
+    op.create_index(op.f('ix_stock_movimientos_fecha'), 'stock_movimientos', ['fecha'], unique=False)
+    if inspector.has_table('alertas_inventario'):
+        op.create_index(
+            op.f('ix_alertas_inventario_fecha_resolucion'), 'alertas_inventario', ['fecha_resolucion'], unique=False
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('alertas_inventario'):
+        op.drop_index(op.f('ix_alertas_inventario_fecha_resolucion'), table_name='alertas_inventario')
+    op.drop_index(op.f('ix_stock_movimientos_fecha'), table_name='stock_movimientos')
@@ -0,0 +1,66 @@
+# tests/test_audit_orm.py
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import audit_orm
+from app.models.auditoria import AuditAction
+from app.services import auditoria_service
+
+BasePrueba = declarative_base()
+
+
+class ItemAuditado(BasePrueba):
+    __tablename__ = "items_auditados_prueba"
+    __auditoria_tabla__ = "items"
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String(50))
+    precio = Column(Integer)
+    hashed_password = Column(String(50))
+
+
+class ItemSinAuditar(BasePrueba):
+    __tablename__ = "items_sin_auditar_prueba"
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String(50))
+
+
+def test_captura_cambios_del_orm_al_confirmar(monkeypatch):
+    """Test de que se registran sólo las columnas cambiadas, con el actor, y recién al hacer commit"""
+    registrados = []
+    monkeypatch.setattr(audit_orm, "tablas_auditadas", lambda: frozenset({"items_auditados_prueba"}))
+    monkeypatch.setattr(auditoria_service, "enqueue_audit_rows", registrados.extend)
+    audit_orm.instalar_auditoria_orm()
+
+    engine = create_engine("sqlite://")
+    BasePrueba.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.info[audit_orm.ACTOR] = {"user_id": 7, "username": "admin"}
+        audit_orm.fijar_contexto(db, payload={"nombre": "Yerba"})
+        item = ItemAuditado(nombre="Yerba", precio=100, hashed_password="secreto")
+        db.add_all([item, ItemSinAuditar(nombre="no")])
+        db.flush()
+        assert registrados == []  # todavía sin confirmar
+        db.commit()
+
+        assert item.precio == 100  # como en los servicios: se lee antes de modificar
+        item.precio = 120
+        item.nombre = "Yerba"  # mismo valor: no es un cambio
+        db.commit()
+
+        db.delete(item)
+        db.rollback()  # descartado
+        db.delete(item)
+        db.commit()
+
+    assert [(r["action"], r["record_id"]) for r in registrados] == [
+        (AuditAction.CREATE, "1"), (AuditAction.UPDATE, "1"), (AuditAction.DELETE, "1")
+    ]
+    assert all(r["username"] == "admin" and r["table_name"] == "items" for r in registrados)
+    assert registrados[0]["details"]["after"]["hashed_password"] == "***"
+    # El contexto extra va sólo con los registros del commit siguiente
+    assert registrados[0]["details"]["extra"] == {"payload": {"nombre": "Yerba"}}
+    assert registrados[1]["details"] == {"changes": {"precio": {"before": 100, "after": 120}}}
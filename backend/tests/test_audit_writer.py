@@ -0,0 +1,56 @@
+# tests/test_audit_writer.py
+import threading
+import time
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.audit_writer import AuditWriter
+
+
+def test_escribe_en_lotes_y_flush():
+    """Test de que las filas encoladas se escriben agrupadas en lotes"""
+    lotes = []
+    writer = AuditWriter(lotes.append, lote=10, intervalo_ms=50)
+
+    for i in range(25):
+        assert writer.encolar({"i": i})
+    assert writer.flush(timeout=2)
+
+    assert [f["i"] for lote in lotes for f in lote] == list(range(25))
+    assert max(len(lote) for lote in lotes) <= 10
+    assert len(lotes) < 25
+    stats = writer.estadisticas()
+    assert stats["escritas"] == 25 and stats["pendientes"] == 0
+    writer.cerrar()
+
+
+def test_cola_llena_descarta_y_cuenta():
+    """Test de la política "descartar": con la base trabada no se bloquea al que audita"""
+    liberar = threading.Event()
+    writer = AuditWriter(lambda filas: liberar.wait(2), max_cola=2, lote=1, intervalo_ms=10)
+
+    writer.encolar({"i": 0})
+    time.sleep(0.05)  # el hilo toma la primera y queda trabado escribiéndola
+    aceptadas = [writer.encolar({"i": i}) for i in range(1, 6)]
+
+    assert aceptadas == [True, True, False, False, False]
+    assert writer.estadisticas()["descartadas_cola_llena"] == 3
+    liberar.set()
+    writer.cerrar()
+    assert writer.estadisticas()["escritas"] == 3
+
+
+def test_error_de_escritura_cuenta_descartadas():
+    """Test de que un lote que falla no traba el flush y queda contado"""
+    def fallar(filas):
+        raise RuntimeError("base caída")
+
+    writer = AuditWriter(fallar, lote=5, intervalo_ms=10)
+    for i in range(3):
+        writer.encolar({"i": i})
+
+    assert writer.flush(timeout=2)
+    assert writer.estadisticas()["descartadas_error"] == 3
+    writer.cerrar()
@@ -1,3 +1,13 @@
+import csv
+import io
+import zipfile
+
+from sqlalchemy import create_engine, text
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 def test_backup_download_requires_admin(client, admin_token):
     # primero generamos uno
     r = client.post("/backup/run", headers={"Authorization": f"Bearer {admin_token}"})
@@ -6,3 +16,27 @@ def test_backup_download_requires_admin(client, admin_token):
     r2 = client.get("/backup/download", headers={"Authorization": f"Bearer {admin_token}"})
     assert r2.status_code == 200
     assert r2.headers.get("content-type") in ("application/zip", "application/octet-stream")
+
+
+def test_export_por_lotes_a_zip(tmp_path):
+    """Test de que la tabla se exporta completa al CSV del ZIP aunque se lea de a lotes"""
+    from app.services.backup_service import _export_table
+
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE clientes (id INTEGER PRIMARY KEY, nombre TEXT, email TEXT)"))
+        conn.execute(
+            text("INSERT INTO clientes (id, nombre, email) VALUES (:id, :nombre, :email)"),
+            [{"id": i, "nombre": f"Cliente, {i}", "email": None if i % 2 else f"c{i}@x.com"} for i in range(1, 11)]
+        )
+
+    zip_path = tmp_path / "backup.zip"
+    with engine.connect() as conn, zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        _export_table(conn, zf, "clientes", ["id", "nombre", "email"], lote=3)
+
+    with zipfile.ZipFile(zip_path) as zf:
+        filas = list(csv.reader(io.StringIO(zf.read("clientes.csv").decode("utf-8"))))
+    assert filas[0] == ["id", "nombre", "email"]
+    assert len(filas) == 11
+    assert filas[1] == ["1", "Cliente, 1", ""]
+    assert filas[2] == ["2", "Cliente, 2", "c2@x.com"]
@@ -0,0 +1,96 @@
+# tests/test_buckets.py
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, Table, create_engine, func, select
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.settings import settings
+from app.db.buckets import fecha_bucket, inicio_bucket, rango_buckets, sumar_buckets
+
+metadata = MetaData()
+ventas_prueba = Table(
+    "ventas_buckets_prueba", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("fecha", DateTime, nullable=False, index=True),
+    Column("total", Float, nullable=False),
+    prefixes=["TEMPORARY"],
+)
+
+# Fechas que cruzan bordes de semana (domingo/lunes), mes y año
+FECHAS = [
+    datetime(2024, 12, 29, 23, 59), datetime(2024, 12, 30, 0, 0), datetime(2024, 12, 31, 12, 0),
+    datetime(2025, 1, 1, 0, 0), datetime(2025, 1, 5, 10, 0), datetime(2025, 1, 6, 9, 30),
+    datetime(2025, 2, 28, 18, 0), datetime(2025, 3, 1, 0, 0), datetime(2025, 3, 2, 23, 0),
+    datetime(2025, 3, 3, 8, 0), datetime(2025, 6, 15, 12, 0), datetime(2025, 12, 31, 23, 59),
+]
+
+
+def _engines():
+    engines = [pytest.param("sqlite://", id="sqlite")]
+    if settings.DATABASE_URL.startswith("postgresql"):
+        engines.append(pytest.param(settings.DATABASE_URL, id="postgresql"))
+    return engines
+
+
+def _analitica(url: str, unidad: str, desde: date):
+    """Ventas agrupadas por período en el motor dado: {inicio_periodo: (cantidad, monto)}"""
+    try:
+        engine = create_engine(url)
+        conn = engine.connect()
+    except Exception as e:
+        pytest.skip(f"Base no disponible: {e}")
+    with conn:
+        metadata.create_all(conn)
+        conn.execute(ventas_prueba.insert(), [{"fecha": f, "total": float(i + 1)} for i, f in enumerate(FECHAS)])
+        bucket = fecha_bucket(unidad, ventas_prueba.c.fecha)
+        filas = conn.execute(
+            select(bucket.label("periodo"), func.count(), func.sum(ventas_prueba.c.total))
+            .where(ventas_prueba.c.fecha >= desde)
+            .group_by(bucket)
+            .order_by(bucket)
+        ).all()
+        conn.rollback()
+    return {periodo: (cantidad, monto) for periodo, cantidad, monto in filas}
+
+
+@pytest.mark.parametrize("url", _engines())
+@pytest.mark.parametrize("unidad", ["day", "week", "month", "year"])
+def test_buckets_sql_coinciden_con_referencia(url, unidad):
+    """Test de que el GROUP BY por período da lo mismo que agrupar en Python, en cada motor"""
+    desde = date(2024, 12, 30)
+    esperado_cantidad = Counter()
+    esperado_monto = Counter()
+    for i, f in enumerate(FECHAS):
+        if f.date() >= desde:
+            esperado_cantidad[inicio_bucket(unidad, f)] += 1
+            esperado_monto[inicio_bucket(unidad, f)] += float(i + 1)
+
+    resultado = _analitica(url, unidad, desde)
+
+    assert all(isinstance(periodo, date) for periodo in resultado)
+    assert resultado == {p: (esperado_cantidad[p], esperado_monto[p]) for p in esperado_cantidad}
+
+
+def test_inicio_bucket_semana_empieza_lunes():
+    """Test de la regla de semanas (lunes, como date_trunc('week'))"""
+    assert inicio_bucket("week", date(2025, 1, 5)) == date(2024, 12, 30)  # domingo
+    assert inicio_bucket("week", date(2025, 1, 6)) == date(2025, 1, 6)  # lunes
+
+
+def test_rango_buckets():
+    """Test de los inicios de los últimos N períodos"""
+    assert rango_buckets("month", 3, date(2025, 2, 14)) == [date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1)]
+    assert rango_buckets("week", 2, date(2025, 1, 8)) == [date(2024, 12, 30), date(2025, 1, 6)]
+    assert rango_buckets("day", 1, datetime(2025, 3, 1, 10, 0)) == [date(2025, 3, 1)]
+    assert sumar_buckets("year", date(2025, 1, 1), -2) == date(2023, 1, 1)
+
+
+def test_unidad_invalida():
+    """Test de unidad de tiempo no soportada"""
+    with pytest.raises(ValueError):
+        fecha_bucket("hour", ventas_prueba.c.fecha)
@@ -0,0 +1,195 @@
+# tests/test_cache.py
+import fnmatch
+import threading
+import time
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.cache import TTLCache, RedisTTLCache
+
+
+class FakeRedis:
+    """Cliente Redis en memoria con el subconjunto de comandos que usa el cache"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _vigente(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key):
+        with self._lock:
+            return self._vigente(key)
+
+    def set(self, key, value, px=None, nx=False):
+        with self._lock:
+            if nx and self._vigente(key) is not None:
+                return None
+            expires_at = time.monotonic() + px / 1000 if px else None
+            self._data[key] = (value.encode() if isinstance(value, str) else value, expires_at)
+            return True
+
+    def incr(self, key):
+        with self._lock:
+            valor = int(self._vigente(key) or 0) + 1
+            self._data[key] = (str(valor).encode(), None)
+            return valor
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for k in keys if self._data.pop(k.decode() if isinstance(k, bytes) else k, None))
+
+    def scan_iter(self, match="*"):
+        with self._lock:
+            return [k.encode() for k in list(self._data) if fnmatch.fnmatch(k, match)]
+
+
+class RedisCaido:
+    """Cliente que falla en todo, como un Redis inaccesible"""
+
+    def __getattr__(self, name):
+        def fallar(*args, **kwargs):
+            raise ConnectionError("redis caído")
+        return fallar
+
+
+def _concurrente(cache, key, factory, hilos=10):
+    resultados = []
+    barrera = threading.Barrier(hilos)
+
+    def pedir():
+        barrera.wait()
+        resultados.append(cache.get_or_set(key, factory))
+
+    threads = [threading.Thread(target=pedir) for _ in range(hilos)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return resultados
+
+
+def _factory_lenta(llamadas):
+    def factory():
+        llamadas.append(1)
+        time.sleep(0.1)
+        return {"total": 42}
+    return factory
+
+
+def test_ttl_cache_single_flight():
+    """Test de que pedidos simultáneos de la misma clave calculan una sola vez"""
+    cache = TTLCache(ttl_seconds=60)
+    llamadas = []
+    resultados = _concurrente(cache, "resumen", _factory_lenta(llamadas))
+
+    assert len(llamadas) == 1
+    assert resultados == [{"total": 42}] * 10
+
+
+def test_ttl_cache_vence():
+    """Test de vencimiento por TTL"""
+    cache = TTLCache(ttl_seconds=0.05)
+    cache.set("k", 1)
+    assert cache.get("k") == 1
+    time.sleep(0.06)
+    assert cache.get("k") is None
+
+
+def test_ttl_cache_invalidar_durante_calculo_no_guarda_valor_viejo():
+    """Test de que un cálculo que empezó antes de invalidar no queda cacheado"""
+    cache = TTLCache(ttl_seconds=60)
+
+    def factory():
+        cache.invalidate()  # p. ej. se registró una venta mientras se calculaba
+        return "viejo"
+
+    assert cache.get_or_set("k", factory) == "viejo"
+    assert cache.get("k") is None
+
+
+def test_ttl_cache_max_entries():
+    """Test de que el cache no crece más allá de max_entries"""
+    cache = TTLCache(ttl_seconds=60, max_entries=3)
+    for i in range(10):
+        cache.set(i, i)
+    assert len(cache._data) == 3
+    assert cache.get(9) == 9
+
+
+def test_redis_cache_get_or_set_e_invalidate():
+    """Test del backend Redis: cachea como JSON e invalida sólo su prefijo"""
+    redis = FakeRedis()
+    cache = RedisTTLCache(redis, ttl_seconds=60, prefix="dashboard")
+    otro = RedisTTLCache(redis, ttl_seconds=60, prefix="otro")
+    llamadas = []
+
+    assert cache.get_or_set("metricas", _factory_lenta(llamadas)) == {"total": 42}
+    assert cache.get_or_set("metricas", _factory_lenta(llamadas)) == {"total": 42}
+    assert len(llamadas) == 1
+    otro.set("x", 1)
+
+    cache.invalidate()
+    assert cache.get("metricas") is None
+    assert otro.get("x") == 1
+
+
+def test_redis_cache_single_flight_entre_procesos():
+    """Test de que dos workers con el mismo Redis calculan una sola vez por clave"""
+    redis = FakeRedis()
+    worker_a = RedisTTLCache(redis, ttl_seconds=60, prefix="dashboard", poll_interval=0.01)
+    worker_b = RedisTTLCache(redis, ttl_seconds=60, prefix="dashboard", poll_interval=0.01)
+    llamadas = []
+    factory = _factory_lenta(llamadas)
+
+    resultados = []
+    barrera = threading.Barrier(6)
+
+    def pedir(cache):
+        barrera.wait()
+        resultados.append(cache.get_or_set("completo", factory))
+
+    threads = [threading.Thread(target=pedir, args=(c,)) for c in [worker_a, worker_b] * 3]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(llamadas) == 1
+    assert resultados == [{"total": 42}] * 6
+    assert redis.get("dashboard:completo:lock") is None
+
+
+def test_redis_cache_invalidar_durante_calculo_no_guarda_valor_viejo():
+    """Test de que en Redis tampoco queda cacheado un cálculo que cruzó un invalidate"""
+    redis = FakeRedis()
+    cache = RedisTTLCache(redis, ttl_seconds=60, prefix="dashboard")
+    otro_worker = RedisTTLCache(redis, ttl_seconds=60, prefix="dashboard")
+
+    def factory():
+        otro_worker.invalidate()  # p. ej. otro worker registró una venta
+        return {"total": "viejo"}
+
+    assert cache.get_or_set("metricas", factory) == {"total": "viejo"}
+    assert cache.get("metricas") is None
+
+    # La generación sobrevive al invalidate total y los cálculos siguientes sí se guardan
+    assert cache.get_or_set("metricas", lambda: {"total": 1}) == {"total": 1}
+    assert cache.get("metricas") == {"total": 1}
+
+
+def test_redis_caido_calcula_sin_cache():
+    """Test de que sin Redis el endpoint sigue respondiendo"""
+    cache = RedisTTLCache(RedisCaido(), ttl_seconds=60, prefix="dashboard")
+    assert cache.get_or_set("resumen", lambda: {"ok": True}) == {"ok": True}
+    cache.invalidate()  # no lanza
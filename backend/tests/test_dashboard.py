@@ -13,6 +13,7 @@ from app.models.venta_model import Venta, VentaItem
 from app.models.producto_model import Producto
 from app.models.cliente_model import Cliente
 from app.models.compra_model import StockMovimiento
+from app.services.dashboard_service import dashboard_cache
 
 client = TestClient(app)
 
@@ -39,6 +40,22 @@ def test_dashboard_ventas_resumen(auth_headers):
     assert "ventas_hoy" in data
     assert "monto_hoy" in data
 
+def test_dashboard_ventas_resumen_consistente(auth_headers):
+    """Test de que los agregados del resumen (una sola consulta) son coherentes entre sí"""
+    data = client.get("/dashboard/ventas/resumen", headers=auth_headers).json()
+    assert data["ventas_hoy"] <= data["total_ventas"]
+    assert data["monto_hoy"] <= data["total_monto"]
+    assert data["venta_menor"] <= data["venta_mayor"]
+    if data["total_ventas"]:
+        # total_monto ya viene redondeado: el promedio puede diferir en el último decimal
+        assert data["promedio_venta"] == pytest.approx(data["total_monto"] / data["total_ventas"], abs=0.01)
+    
+    # Un rango que termina ayer no cuenta ventas de hoy
+    ayer = (date.today() - timedelta(days=1)).isoformat()
+    data = client.get(f"/dashboard/ventas/resumen?fecha_fin={ayer}", headers=auth_headers).json()
+    assert data["ventas_hoy"] == 0
+    assert data["monto_hoy"] == 0.0
+
 def test_dashboard_ventas_periodo(auth_headers):
     """Test del endpoint de ventas por período"""
     response = client.get("/dashboard/ventas/periodo?periodo=dia&limite=7", headers=auth_headers)
@@ -151,6 +168,35 @@ def test_dashboard_completo(auth_headers):
     assert "tendencias" in data
     assert "ultima_actualizacion" in data
 
+def test_dashboard_completo_paralelo_igual_a_secuencial(auth_headers):
+    """Test de que el armado en paralelo devuelve lo mismo que el secuencial e informa tiempos"""
+    partes = ["resumen_ventas", "ventas_por_periodo", "productos_mas_vendidos",
+              "clientes_top", "stock_bajo", "metricas", "tendencias"]
+    dashboard_cache.invalidate()
+    
+    paralelo = client.get("/dashboard/completo", headers=auth_headers)
+    secuencial = client.get("/dashboard/completo?paralelo=false", headers=auth_headers)
+    assert paralelo.status_code == 200
+    assert secuencial.status_code == 200
+    
+    for response in (paralelo, secuencial):
+        timing = response.headers["Server-Timing"]
+        for parte in partes + ["total"]:
+            assert f"{parte};dur=" in timing
+    
+    for parte in partes:
+        assert paralelo.json()[parte] == secuencial.json()[parte]
+
+def test_dashboard_completo_cacheado(auth_headers):
+    """Test de que una segunda consulta dentro del TTL sale del cache"""
+    dashboard_cache.invalidate()
+    primera = client.get("/dashboard/completo", headers=auth_headers)
+    segunda = client.get("/dashboard/completo", headers=auth_headers)
+    
+    assert primera.headers["X-Cache"] == "MISS"
+    assert segunda.headers["X-Cache"] == "HIT"
+    assert segunda.json() == primera.json()
+
 def test_dashboard_ventas_estadisticas(auth_headers):
     """Test del endpoint de estadísticas detalladas"""
     response = client.get("/dashboard/ventas/estadisticas", headers=auth_headers)
@@ -189,6 +189,32 @@ def test_obtener_estadisticas_descuentos(auth_headers):
     assert "monto_total_descuentado" in data
     assert "descuentos_por_tipo" in data
 
+def test_estadisticas_reflejan_usos_registrados(auth_headers):
+    """Test de que el rollup mensual acumula cada uso aplicado"""
+    antes = client.get("/descuentos/estadisticas", headers=auth_headers).json()
+
+    descuento_data = {
+        "codigo": "ROLLUP5",
+        "nombre": "Descuento Rollup",
+        "tipo": "porcentaje",
+        "valor": 5.0,
+        "fecha_inicio": datetime.utcnow().isoformat()
+    }
+    client.post("/descuentos", json=descuento_data, headers=auth_headers)
+
+    aplicacion_data = {
+        "codigo": "ROLLUP5",
+        "monto_total": 200.0,
+        "productos_ids": [1]
+    }
+    response = client.post("/descuentos/aplicar", json=aplicacion_data, headers=auth_headers)
+    assert response.json()["aplicable"] == True
+
+    despues = client.get("/descuentos/estadisticas", headers=auth_headers).json()
+    assert despues["total_usos"] == antes["total_usos"] + 1
+    assert despues["monto_total_descuentado"] == round(antes["monto_total_descuentado"] + 10.0, 2)
+    assert any(mes["usos"] >= 1 for mes in despues["usos_por_mes"])
+
 def test_obtener_descuentos_disponibles(auth_headers):
     """Test de descuentos disponibles"""
     response = client.get("/descuentos/disponibles", headers=auth_headers)
@@ -240,6 +266,39 @@ def test_desactivar_descuento(auth_headers):
     assert data["estado"] == "inactivo"
     assert data["es_activo"] == False
 
+def test_desactivar_descuento_futuro_no_se_reactiva(auth_headers, monkeypatch):
+    """Test de que el tick no reactiva un descuento desactivado a mano antes de su inicio"""
+    descuento_data = {
+        "codigo": "FUTURO_OFF",
+        "nombre": "Descuento futuro desactivado",
+        "tipo": "porcentaje",
+        "valor": 10.0,
+        "fecha_inicio": (datetime.utcnow() + timedelta(days=1)).isoformat(),
+        "fecha_fin": (datetime.utcnow() + timedelta(days=10)).isoformat()
+    }
+    response = client.post("/descuentos", json=descuento_data, headers=auth_headers)
+    descuento_id = response.json()["id"]
+    
+    response = client.patch(f"/descuentos/{descuento_id}/desactivar", headers=auth_headers)
+    assert response.status_code == 200
+    
+    # El tick corre dos días después, pasada la fecha de inicio
+    from app.services import descuento_service
+    
+    class Despues(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime.utcnow() + timedelta(days=2)
+    
+    monkeypatch.setattr(descuento_service, "datetime", Despues)
+    response = client.post("/descuentos/actualizar-estados", headers=auth_headers)
+    assert response.status_code == 200
+    monkeypatch.undo()
+    
+    data = client.get(f"/descuentos/{descuento_id}", headers=auth_headers).json()
+    assert data["estado"] == "inactivo"
+    assert data["es_activo"] == False
+
 def test_actualizar_estados_descuentos(auth_headers):
     """Test de actualización de estados de descuentos"""
     response = client.post("/descuentos/actualizar-estados", headers=auth_headers)
@@ -249,6 +308,26 @@ def test_actualizar_estados_descuentos(auth_headers):
     assert "message" in data
     assert "actualizados" in data
 
+def test_transicion_expira_descuento_vencido(auth_headers):
+    """Test de que el tick de transiciones expira descuentos con fecha_fin pasada"""
+    descuento_data = {
+        "codigo": "VENCE_TICK",
+        "nombre": "Descuento que vence",
+        "tipo": "porcentaje",
+        "valor": 10.0,
+        "fecha_inicio": (datetime.utcnow() - timedelta(days=5)).isoformat(),
+        "fecha_fin": (datetime.utcnow() - timedelta(minutes=1)).isoformat()
+    }
+    client.post("/descuentos", json=descuento_data, headers=auth_headers)
+    
+    response = client.post("/descuentos/actualizar-estados", headers=auth_headers)
+    assert response.status_code == 200
+    
+    response = client.get("/descuentos/codigo/VENCE_TICK", headers=auth_headers)
+    data = response.json()
+    assert data["estado"] == "expirado"
+    assert data["es_activo"] == False
+
 def test_codigo_descuento_duplicado(auth_headers):
     """Test de código de descuento duplicado"""
     descuento_data = {
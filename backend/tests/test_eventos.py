@@ -0,0 +1,72 @@
+# tests/test_eventos.py
+import asyncio
+import threading
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.eventos import EventHub, Evento
+
+
+def test_hub_filtra_por_usuario():
+    """Test de que cada conexión recibe sus eventos y los globales, publicados desde otro hilo"""
+    hub = EventHub()
+
+    async def main():
+        usuario_1 = hub.suscribir(1)
+        usuario_2 = hub.suscribir(2)
+
+        def publicar():
+            hub.publicar(Evento("notificacion", 1, usuario_id=2))
+            hub.publicar(Evento("notificacion", 2, usuario_id=1))
+            hub.publicar(Evento("alerta_inventario", 7))
+
+        hilo = threading.Thread(target=publicar)
+        hilo.start()
+        hilo.join()
+        recibidos_1 = [await asyncio.wait_for(usuario_1.cola.get(), 1) for _ in range(2)]
+        recibidos_2 = [await asyncio.wait_for(usuario_2.cola.get(), 1) for _ in range(2)]
+        hub.desuscribir(usuario_1)
+        hub.desuscribir(usuario_2)
+        return recibidos_1, recibidos_2
+
+    recibidos_1, recibidos_2 = asyncio.run(main())
+
+    assert [(e.canal, e.id) for e in recibidos_1] == [("notificacion", 2), ("alerta_inventario", 7)]
+    assert [(e.canal, e.id) for e in recibidos_2] == [("notificacion", 1), ("alerta_inventario", 7)]
+    assert hub.conexiones == 0
+
+
+def test_hub_marca_desbordada_la_conexion_lenta():
+    """Test de que un cliente que no consume no bloquea la publicación"""
+    hub = EventHub(max_cola=2)
+
+    async def main():
+        suscripcion = hub.suscribir(1)
+        for i in range(5):
+            hub.publicar(Evento("notificacion", i, usuario_id=1))
+        await asyncio.sleep(0.01)
+        return suscripcion
+
+    suscripcion = asyncio.run(main())
+
+    assert suscripcion.desbordada
+    assert suscripcion.cola.qsize() == 2
+
+
+def test_hub_con_puente_publica_por_el_puente():
+    """Test de que con puente los eventos no se difunden dos veces en el worker que publica"""
+    hub = EventHub()
+    enviados = []
+    hub.puente = enviados.append
+
+    hub.publicar(Evento("notificacion", 1))
+    assert enviados == [Evento("notificacion", 1)]
+
+    # Si el puente falla, se difunde localmente
+    def puente_caido(evento):
+        raise ConnectionError("sin base")
+
+    hub.puente = puente_caido
+    hub.publicar(Evento("notificacion", 2))  # no lanza
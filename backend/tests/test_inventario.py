@@ -149,6 +149,66 @@ def test_obtener_estadisticas_inventario(auth_headers):
     assert "alertas_resueltas_mes" in data
     assert "tiempo_promedio_resolucion" in data
 
+def test_valorizacion_y_costo_ventas(auth_headers):
+    """Test de valorización FIFO / promedio y costo de ventas con dos costos de compra"""
+    response = client.post("/productos", json={"nombre": "Producto Valorizacion", "precio": 30.0}, headers=auth_headers)
+    assert response.status_code == 201
+    producto_id = response.json()["id"]
+    response = client.post("/proveedores", json={"nombre": "Proveedor Valorizacion", "email": "valorizacion@test.com"}, headers=auth_headers)
+    proveedor_id = response.json()["id"]
+    
+    # 10 u. a $10 y luego 10 u. a $20: promedio ponderado $15
+    for costo in (10.0, 20.0):
+        compra_data = {
+            "proveedor_id": proveedor_id,
+            "items": [{"producto_id": producto_id, "cantidad": 10, "costo_unitario": costo}]
+        }
+        assert client.post("/compras", json=compra_data, headers=auth_headers).status_code == 201
+    
+    venta_data = {"cliente_id": None, "items": [{"producto_id": producto_id, "cantidad": 15}]}
+    assert client.post("/ventas", json=venta_data, headers=auth_headers).status_code == 201
+    
+    # Quedan 5 u. de la capa de $20; al promedio valen 5 * 15
+    response = client.get(f"/inventario/valorizacion?producto_id={producto_id}", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["cantidad"] == 5.0
+    assert data["valor_fifo"] == 100.0
+    assert data["valor_promedio"] == 75.0
+    
+    # FIFO: 10 * 10 + 5 * 20; promedio: 15 * 15
+    hoy = datetime.utcnow().date()
+    response = client.get(
+        f"/inventario/costo-ventas?desde={(hoy - timedelta(days=1)).isoformat()}&hasta={hoy.isoformat()}&producto_id={producto_id}",
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["cantidad"] == 15.0
+    assert data["cogs_fifo"] == 200.0
+    assert data["cogs_promedio"] == 225.0
+    
+    # Rango invertido
+    response = client.get(
+        f"/inventario/costo-ventas?desde={hoy.isoformat()}&hasta={(hoy - timedelta(days=1)).isoformat()}",
+        headers=auth_headers
+    )
+    assert response.status_code == 400
+
+def test_estadisticas_inventario_valores_reales(auth_headers):
+    """Test de que las estadísticas se calculan (y se sirven cacheadas)"""
+    response = client.get("/inventario/estadisticas", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    
+    assert set(data["valor_inventario_por_categoria"]) == {"sin_configuracion", "stock_bajo", "normal", "sobre_stock"}
+    assert data["productos_configurados"] <= data["total_productos"]
+    for dia in data["tendencia_stock"]:
+        assert dia["neto"] == round(dia["entradas"] - dia["salidas"], 2)
+    
+    # Dentro del TTL la respuesta es la misma
+    assert client.get("/inventario/estadisticas", headers=auth_headers).json() == data
+
 def test_procesar_alertas(auth_headers):
     """Test de procesamiento de alertas"""
     response = client.post("/inventario/procesar-alertas", headers=auth_headers)
@@ -160,6 +220,14 @@ def test_procesar_alertas(auth_headers):
     assert "procesadas" in data
     assert isinstance(data["procesadas"], int)
 
+def test_procesar_alertas_no_duplica_pendientes(auth_headers):
+    """Test de que un segundo barrido no vuelve a crear las alertas pendientes"""
+    client.post("/inventario/procesar-alertas", headers=auth_headers)
+
+    response = client.post("/inventario/procesar-alertas", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["procesadas"] == 0
+
 def test_generar_reorden_automatico(auth_headers):
     """Test de generación de reorden automático"""
     response = client.post("/inventario/generar-reorden/1", headers=auth_headers)
@@ -167,6 +235,38 @@ def test_generar_reorden_automatico(auth_headers):
     # Debería fallar porque no hay configuración, pero verificar estructura
     assert response.status_code in [200, 400, 404]
 
+def test_generar_reordenes_todos(auth_headers):
+    """Test de generación masiva de reordenes por demanda"""
+    response = client.post("/inventario/reordenes/generar-todos", headers=auth_headers)
+    
+    assert response.status_code == 200
+    data = response.json()
+    
+    assert "generados" in data
+    assert isinstance(data["por_proveedor"], list)
+    assert data["generados"] == sum(g["reordenes"] for g in data["por_proveedor"])
+    
+    # Una segunda pasada no duplica reordenes pendientes
+    response = client.post("/inventario/reordenes/generar-todos", headers=auth_headers)
+    assert response.json()["generados"] == 0
+
+def test_clasificacion_abc_xyz(auth_headers):
+    """Test de recálculo y listado de la clasificación ABC/XYZ"""
+    response = client.post("/inventario/clasificacion/recalcular", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["productos"] == sum(data["abc"].values()) == sum(data["xyz"].values())
+    
+    response = client.get("/inventario/clasificacion?clase_abc=A", headers=auth_headers)
+    assert response.status_code == 200
+    for item in response.json():
+        assert item["clase_abc"] == "A"
+        assert item["clase_xyz"] in ("X", "Y", "Z")
+    
+    # Clase inválida
+    response = client.get("/inventario/clasificacion?clase_abc=D", headers=auth_headers)
+    assert response.status_code == 422
+
 def test_filtros_configuraciones(auth_headers):
     """Test de filtros en configuraciones"""
     # Test con filtro de producto
@@ -0,0 +1,52 @@
+# tests/test_keyset.py
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, create_engine, select, tuple_
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.keyset import codificar_cursor, decodificar_cursor
+
+metadata = MetaData()
+eventos_prueba = Table(
+    "eventos_keyset_prueba", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("ts", DateTime, nullable=False),
+)
+
+
+def test_cursor_ida_y_vuelta():
+    """Test de que el cursor conserva (ts, id) y rechaza basura"""
+    ts = datetime(2025, 3, 1, 12, 30, 15, 123456)
+    assert decodificar_cursor(codificar_cursor(ts, 42)) == (ts, 42)
+    with pytest.raises(ValueError):
+        decodificar_cursor("no-es-un-cursor")
+
+
+def test_paginas_por_cursor_sin_huecos_ni_repetidos():
+    """Test de que recorrer por (ts, id) devuelve cada fila una vez aunque haya ts repetidos"""
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    base = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(eventos_prueba.insert(), [
+            {"id": i, "ts": base + timedelta(minutes=i // 3)} for i in range(1, 26)
+        ])
+
+    vistos, cursor = [], None
+    with engine.connect() as conn:
+        while True:
+            consulta = select(eventos_prueba).order_by(eventos_prueba.c.ts.desc(), eventos_prueba.c.id.desc()).limit(4)
+            if cursor:
+                ts, id_ = decodificar_cursor(cursor)
+                consulta = consulta.where(tuple_(eventos_prueba.c.ts, eventos_prueba.c.id) < tuple_(ts, id_))
+            filas = conn.execute(consulta).all()
+            if not filas:
+                break
+            vistos.extend(f.id for f in filas)
+            cursor = codificar_cursor(filas[-1].ts, filas[-1].id)
+
+    assert vistos == sorted(range(1, 26), key=lambda i: (i // 3, i), reverse=True)
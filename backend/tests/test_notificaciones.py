@@ -6,6 +6,7 @@ from datetime import datetime
 
 import sys
 import os
+import uuid
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.main import app
@@ -73,6 +74,28 @@ def test_obtener_estadisticas_notificaciones(auth_headers):
     assert "notificaciones_mes" in data
     assert "tasa_lectura" in data
 
+def test_resumen_y_estadisticas_consistentes(auth_headers):
+    """Test de que los conteos agrupados cuadran entre sí y reflejan una notificación nueva"""
+    antes = client.get("/notificaciones/resumen", headers=auth_headers).json()
+    
+    client.post("/notificaciones", json={
+        "titulo": "Conteo agrupado",
+        "mensaje": "Notificación para el resumen",
+        "tipo": "warning",
+        "es_urgente": True
+    }, headers=auth_headers)
+    
+    resumen = client.get("/notificaciones/resumen", headers=auth_headers).json()
+    assert resumen["total"] == antes["total"] + 1
+    assert resumen["urgentes"] == antes["urgentes"] + 1
+    assert resumen["por_tipo"]["warning"] == antes["por_tipo"]["warning"] + 1
+    assert resumen["total"] == sum(resumen["por_tipo"].values())
+    assert resumen["pendientes"] + resumen["leidas"] <= resumen["total"]
+    
+    stats = client.get("/notificaciones/estadisticas", headers=auth_headers).json()
+    assert stats["total_notificaciones"] == sum(stats["notificaciones_por_tipo"].values())
+    assert 1 <= stats["notificaciones_hoy"] <= stats["notificaciones_semana"] <= stats["notificaciones_mes"]
+
 def test_obtener_pendientes(auth_headers):
     """Test de notificaciones pendientes"""
     response = client.get("/notificaciones/pendientes", headers=auth_headers)
@@ -197,3 +220,150 @@ def test_crear_notificacion_sin_permisos():
         "tipo": "info"
     })
     assert response.status_code == 401
+
+def test_contador_no_leidas(auth_headers):
+    """Test de que el contador de no leídas acompaña a crear y marcar como leída"""
+    response = client.get("/notificaciones/no-leidas/count", headers=auth_headers)
+    assert response.status_code == 200
+    antes = response.json()["no_leidas"]
+    
+    response = client.post("/notificaciones", json={
+        "titulo": "Contador",
+        "mensaje": "Notificación para el contador de no leídas",
+        "tipo": "info"
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    notificacion_id = response.json()["id"]
+    
+    assert client.get("/notificaciones/no-leidas/count", headers=auth_headers).json()["no_leidas"] == antes + 1
+    
+    client.patch(f"/notificaciones/{notificacion_id}/leer", headers=auth_headers)
+    # Marcarla dos veces no descuenta dos veces
+    client.patch(f"/notificaciones/{notificacion_id}/leer", headers=auth_headers)
+    assert client.get("/notificaciones/no-leidas/count", headers=auth_headers).json()["no_leidas"] == antes
+
+def test_recalcular_no_leidas(auth_headers):
+    """Test de que recalcular los contadores no cambia un contador correcto"""
+    antes = client.get("/notificaciones/no-leidas/count", headers=auth_headers).json()["no_leidas"]
+    
+    response = client.post("/notificaciones/no-leidas/recalcular", headers=auth_headers)
+    assert response.status_code == 200
+    assert "usuarios" in response.json()
+    assert client.get("/notificaciones/no-leidas/count", headers=auth_headers).json()["no_leidas"] == antes
+
+def test_operaciones_masivas(auth_headers):
+    """Test de leer, archivar y eliminar en bloque por IDs y por filtros"""
+    ids = []
+    for i in range(3):
+        response = client.post("/notificaciones", json={
+            "titulo": f"Masiva {i}",
+            "mensaje": "Notificación para operaciones masivas",
+            "tipo": "info"
+        }, headers=auth_headers)
+        ids.append(response.json()["id"])
+    antes = client.get("/notificaciones/no-leidas/count", headers=auth_headers).json()["no_leidas"]
+    
+    # Formato original: lista de IDs
+    response = client.patch("/notificaciones/bulk/leer", json=ids[:2], headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["afectadas"] == 2
+    assert client.get("/notificaciones/no-leidas/count", headers=auth_headers).json()["no_leidas"] == antes - 2
+    
+    # Las ya leídas no se vuelven a contar
+    response = client.patch("/notificaciones/bulk/leer", json={"notificacion_ids": ids}, headers=auth_headers)
+    assert response.json()["afectadas"] == 1
+    
+    response = client.patch("/notificaciones/bulk/archivar", json={"notificacion_ids": ids}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["afectadas"] == 3
+    
+    response = client.post("/notificaciones/bulk/eliminar", json={
+        "notificacion_ids": ids,
+        "filtros": {"estado": "archivada"}
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["afectadas"] == 3
+    
+    # Sin selección
+    response = client.post("/notificaciones/bulk/eliminar", json={}, headers=auth_headers)
+    assert response.status_code == 422
+    
+    # Filtros vacíos tampoco: no se actúa sobre toda la tabla
+    for metodo, ruta in (("post", "/notificaciones/bulk/eliminar"), ("patch", "/notificaciones/bulk/archivar"),
+                         ("patch", "/notificaciones/bulk/leer")):
+        response = getattr(client, metodo)(ruta, json={"filtros": {}}, headers=auth_headers)
+        assert response.status_code == 422
+
+def test_archivar_globales_solo_admin(auth_headers):
+    """Test de que un usuario sin permisos no archiva las globales para los demás"""
+    response = client.post("/notificaciones", json={
+        "titulo": "Global archivo",
+        "mensaje": "Notificación global",
+        "tipo": "sistema"
+    }, headers=auth_headers)
+    notificacion_id = response.json()["id"]
+    
+    username = f"notif_{uuid.uuid4().hex[:8]}"
+    response = client.post("/usuarios/", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": "vend1234",
+        "is_admin": False,
+        "is_active": True,
+    }, headers=auth_headers)
+    assert response.status_code == 201
+    login = client.post("/auth/login", json={"username": username, "password": "vend1234"})
+    usuario_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    
+    for seleccion in ({"notificacion_ids": [notificacion_id]}, {"filtros": {"tipo": "sistema"}}):
+        response = client.patch("/notificaciones/bulk/archivar", json=seleccion, headers=usuario_headers)
+        assert response.status_code == 200
+    
+    # La global sigue sin archivar para el admin (y para cualquier otro usuario)
+    assert client.get(f"/notificaciones/{notificacion_id}", headers=auth_headers).json()["estado"] == "pendiente"
+    pendientes = client.get("/notificaciones/pendientes?limit=200", headers=auth_headers).json()
+    assert notificacion_id in [n["id"] for n in pendientes]
+
+def test_lectura_de_globales_por_usuario(auth_headers):
+    """Test de que leer una global la marca como leída sólo para el usuario"""
+    response = client.post("/notificaciones", json={
+        "titulo": "Global",
+        "mensaje": "Notificación global",
+        "tipo": "sistema"
+    }, headers=auth_headers)
+    notificacion_id = response.json()["id"]
+    assert response.json()["usuario_id"] is None
+    
+    pendientes = client.get("/notificaciones/pendientes?limit=200", headers=auth_headers).json()
+    assert notificacion_id in [n["id"] for n in pendientes]
+    
+    client.patch(f"/notificaciones/{notificacion_id}/leer", headers=auth_headers)
+    
+    pendientes = client.get("/notificaciones/pendientes?limit=200", headers=auth_headers).json()
+    assert notificacion_id not in [n["id"] for n in pendientes]
+    leidas = client.get("/notificaciones?estado=leida&limit=1000", headers=auth_headers).json()
+    assert notificacion_id in [n["id"] for n in leidas]
+    
+    # La fila compartida no cambia: sigue pendiente para los demás usuarios
+    assert client.get(f"/notificaciones/{notificacion_id}", headers=auth_headers).json()["estado"] == "pendiente"
+    
+    # Marcarla leída con PUT tampoco cambia la fila compartida
+    response = client.post("/notificaciones", json={
+        "titulo": "Global PUT",
+        "mensaje": "Notificación global",
+        "tipo": "sistema"
+    }, headers=auth_headers)
+    otra_id = response.json()["id"]
+    response = client.put(f"/notificaciones/{otra_id}", json={"estado": "leida"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["estado"] == "leida"
+    assert client.get(f"/notificaciones/{otra_id}", headers=auth_headers).json()["estado"] == "pendiente"
+
+def test_marcar_todas_leidas(auth_headers):
+    """Test de que marcar todas deja en cero las no leídas del usuario, propias y globales"""
+    client.post("/notificaciones", json={"titulo": "Global", "mensaje": "Global", "tipo": "sistema"}, headers=auth_headers)
+    assert client.get("/notificaciones/no-leidas/count", headers=auth_headers).json()["no_leidas"] > 0
+    
+    response = client.patch("/notificaciones/leer-todas", headers=auth_headers)
+    assert response.status_code == 200
+    assert client.get("/notificaciones/no-leidas/count", headers=auth_headers).json()["no_leidas"] == 0
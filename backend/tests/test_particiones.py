@@ -0,0 +1,57 @@
+# tests/test_particiones.py
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.settings import settings
+from app.db.particiones import (
+    crear_particiones, eliminar_particiones_anteriores, es_particionada, nombre_particion, particiones
+)
+
+TABLA = "auditoria_particiones_prueba"
+
+
+@pytest.fixture
+def conn():
+    if not settings.DATABASE_URL.startswith("postgresql"):
+        pytest.skip("El particionado requiere PostgreSQL")
+    try:
+        engine = create_engine(settings.DATABASE_URL)
+        conexion = engine.connect()
+    except Exception as e:
+        pytest.skip(f"Base no disponible: {e}")
+    with conexion:
+        conexion.execute(text(
+            f"CREATE TABLE {TABLA} (id BIGSERIAL, ts TIMESTAMPTZ NOT NULL, PRIMARY KEY (id, ts)) "
+            "PARTITION BY RANGE (ts)"
+        ))
+        yield conexion
+        conexion.rollback()
+
+
+def test_nombre_particion():
+    """Test del nombre de la partición mensual"""
+    assert nombre_particion("audit_logs", date(2025, 1, 15)) == "audit_logs_p202501"
+
+
+def test_crear_y_retener_particiones(conn):
+    """Test de creación idempotente de particiones y retención por DROP de meses enteros"""
+    assert es_particionada(conn, TABLA)
+
+    creadas = crear_particiones(conn, TABLA, date(2024, 11, 20), date(2025, 2, 1))
+    assert creadas == [f"{TABLA}_p202411", f"{TABLA}_p202412", f"{TABLA}_p202501", f"{TABLA}_p202502"]
+    assert crear_particiones(conn, TABLA, date(2024, 11, 1), date(2025, 2, 1)) == []
+
+    # Cada fila cae en la partición de su mes
+    conn.execute(text(f"INSERT INTO {TABLA} (ts) VALUES ('2024-11-30 23:59:59'), ('2024-12-01'), ('2025-02-10')"))
+    assert conn.execute(text(f"SELECT count(*) FROM {TABLA}_p202411")).scalar() == 1
+
+    eliminadas = eliminar_particiones_anteriores(conn, TABLA, date(2025, 1, 1))
+    assert eliminadas == [f"{TABLA}_p202411", f"{TABLA}_p202412"]
+    assert [mes for _, mes in particiones(conn, TABLA)] == [date(2025, 1, 1), date(2025, 2, 1)]
+    assert conn.execute(text(f"SELECT count(*) FROM {TABLA}")).scalar() == 1
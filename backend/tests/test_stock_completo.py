@@ -1,4 +1,6 @@
 # tests/test_stock_completo.py
+import uuid
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
@@ -188,6 +190,86 @@ def test_stock_multiples_movimientos(client: TestClient, admin_token: str, db: S
     stock_final = response.json()["stock"]
     assert stock_final == 10.0
 
+def test_stock_saldo_consistente_con_ledger(client: TestClient, admin_token: str):
+    """Test que el saldo denormalizado coincide con el ledger tras compras y ventas"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = client.post("/productos", json={"nombre": "Producto Saldo", "precio": 100.0}, headers=headers)
+    assert response.status_code == 201
+    producto_id = response.json()["id"]
+    
+    response = client.post("/proveedores", json={"nombre": "Proveedor Saldo", "email": "saldo@test.com"}, headers=headers)
+    proveedor_id = response.json()["id"]
+    
+    compra_data = {
+        "proveedor_id": proveedor_id,
+        "items": [{"producto_id": producto_id, "cantidad": 8, "costo_unitario": 50.0}]
+    }
+    assert client.post("/compras", json=compra_data, headers=headers).status_code == 201
+    
+    venta_data = {"cliente_id": None, "items": [{"producto_id": producto_id, "cantidad": 3}]}
+    assert client.post("/ventas", json=venta_data, headers=headers).status_code == 201
+    
+    response = client.get("/stock/consistencia", headers=headers)
+    assert response.status_code == 200
+    assert all(d["producto_id"] != producto_id for d in response.json())
+    
+    response = client.get(f"/stock/{producto_id}", headers=headers)
+    assert response.json()["stock"] == 5.0
+
+def test_transferencia_entre_depositos(client: TestClient, admin_token: str):
+    """Test de stock por depósito y transferencia entre depósitos"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = client.post("/productos", json={"nombre": "Producto Deposito", "precio": 100.0}, headers=headers)
+    producto_id = response.json()["id"]
+    
+    response = client.post("/proveedores", json={"nombre": "Proveedor Deposito", "email": "deposito@test.com"}, headers=headers)
+    proveedor_id = response.json()["id"]
+    
+    # Deposito.nombre es único: el sufijo permite repetir el test sobre la misma base
+    response = client.post("/stock/depositos", json={"nombre": f"Sucursal Test Transferencia {uuid.uuid4().hex[:8]}"}, headers=headers)
+    assert response.status_code == 201
+    sucursal_id = response.json()["id"]
+    
+    compra_data = {
+        "proveedor_id": proveedor_id,
+        "deposito_id": 1,
+        "items": [{"producto_id": producto_id, "cantidad": 10, "costo_unitario": 50.0}]
+    }
+    assert client.post("/compras", json=compra_data, headers=headers).status_code == 201
+    
+    transferencia = {
+        "producto_id": producto_id,
+        "deposito_origen_id": 1,
+        "deposito_destino_id": sucursal_id,
+        "cantidad": 4
+    }
+    response = client.post("/stock/transferencias", json=transferencia, headers=headers)
+    assert response.status_code == 201
+    assert response.json()["stock_origen"] == 6.0
+    assert response.json()["stock_destino"] == 4.0
+    
+    # Más de lo disponible en origen: no se mueve nada
+    transferencia["cantidad"] = 50
+    response = client.post("/stock/transferencias", json=transferencia, headers=headers)
+    assert response.status_code == 400
+    
+    response = client.get(f"/stock/{producto_id}/depositos", headers=headers)
+    saldos = {s["deposito_id"]: s["cantidad"] for s in response.json()}
+    assert saldos == {1: 6.0, sucursal_id: 4.0}
+    
+    # El total no cambia con las transferencias
+    response = client.get(f"/stock/{producto_id}", headers=headers)
+    assert response.json()["stock"] == 10.0
+    
+    # Los saldos por depósito cuadran con el ledger
+    response = client.get("/stock/consistencia", headers=headers)
+    assert all(d["producto_id"] != producto_id for d in response.json())
+    
+    # Producto inexistente: 400, no un error de FK
+    transferencia.update(producto_id=999999, cantidad=1)
+    response = client.post("/stock/transferencias", json=transferencia, headers=headers)
+    assert response.status_code == 400
+
 def test_stock_producto_inexistente(client: TestClient, admin_token: str):
     """Test obtener stock de producto inexistente"""
     response = client.get("/stock/99999", headers={"Authorization": f"Bearer {admin_token}"})
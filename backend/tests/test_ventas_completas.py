@@ -104,6 +104,65 @@ def test_eliminar_venta(client: TestClient, admin_token: str, db: Session):
         response = client.get(f"/ventas/{venta_id}", headers={"Authorization": f"Bearer {admin_token}"})
         assert response.status_code == 404
 
+def test_resumen_diario_refleja_alta_y_baja_de_venta(client: TestClient, admin_token: str):
+    """Test que el acumulado diario que lee el dashboard se mantiene al crear y eliminar ventas"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = client.post("/productos", json={"nombre": "Producto Rollup", "precio": 100.0}, headers=headers)
+    producto_id = response.json()["id"]
+    response = client.post("/proveedores", json={"nombre": "Proveedor Rollup", "email": "rollup@test.com"}, headers=headers)
+    proveedor_id = response.json()["id"]
+    
+    compra_data = {
+        "proveedor_id": proveedor_id,
+        "items": [{"producto_id": producto_id, "cantidad": 10, "costo_unitario": 50.0}]
+    }
+    assert client.post("/compras", json=compra_data, headers=headers).status_code == 201
+    
+    antes = client.get("/dashboard/ventas/resumen", headers=headers).json()
+    
+    venta_data = {"cliente_id": None, "items": [{"producto_id": producto_id, "cantidad": 2}]}
+    response = client.post("/ventas", json=venta_data, headers=headers)
+    assert response.status_code == 201
+    venta_id = response.json()["id"]
+    
+    despues = client.get("/dashboard/ventas/resumen", headers=headers).json()
+    assert despues["ventas_hoy"] == antes["ventas_hoy"] + 1
+    assert despues["monto_hoy"] == round(antes["monto_hoy"] + 200.0, 2)
+    assert despues["venta_mayor"] >= 200.0
+    
+    client.delete(f"/ventas/{venta_id}", headers=headers)
+    final = client.get("/dashboard/ventas/resumen", headers=headers).json()
+    assert final["ventas_hoy"] == antes["ventas_hoy"]
+    assert final["monto_hoy"] == antes["monto_hoy"]
+
+def test_productos_mas_vendidos_desde_items(client: TestClient, admin_token: str):
+    """Test que el ranking de más vendidos refleja las cantidades reales de venta_items"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = client.post("/productos", json={"nombre": "Producto Top Ventas", "precio": 1.0}, headers=headers)
+    producto_id = response.json()["id"]
+    response = client.post("/proveedores", json={"nombre": "Proveedor Top Ventas", "email": "top@test.com"}, headers=headers)
+    proveedor_id = response.json()["id"]
+    
+    compra_data = {
+        "proveedor_id": proveedor_id,
+        "items": [{"producto_id": producto_id, "cantidad": 100000, "costo_unitario": 0.5}]
+    }
+    assert client.post("/compras", json=compra_data, headers=headers).status_code == 201
+    
+    # Dos items del mismo producto en una venta cuentan como una sola venta
+    venta_data = {"cliente_id": None, "items": [
+        {"producto_id": producto_id, "cantidad": 60000},
+        {"producto_id": producto_id, "cantidad": 30000}
+    ]}
+    assert client.post("/ventas", json=venta_data, headers=headers).status_code == 201
+    
+    response = client.get("/dashboard/productos/mas-vendidos?limite=100&dias=30", headers=headers)
+    assert response.status_code == 200
+    top = {p["producto_id"]: p for p in response.json()}
+    assert top[producto_id]["cantidad_vendida"] == 90000.0
+    assert top[producto_id]["monto_total"] == 90000.0
+    assert top[producto_id]["ventas_count"] == 1
+
 def test_listar_ventas_paginado(client: TestClient, admin_token: str):
     """Test listar ventas con paginación"""
     response = client.get("/ventas?page=1&size=5", headers={"Authorization": f"Bearer {admin_token}"})